@@ -0,0 +1,140 @@
+// Genre charts rebuilt in the browser from the preloaded per-genre aggregates
+// (see MarketingDataset.chart_aggregates), so switching genres needs no server round trip.
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    marketing: {
+        lifecycleFunnel: function(selectedGenre, store) {
+            if (!store) {
+                return window.dash_clientside.no_update;
+            }
+            var charts = store.genres[selectedGenre];
+            if (!charts) {
+                return {
+                    data: [{type: 'funnel', y: ['No Data'], x: [0], text: ['No games found for this genre']}],
+                    layout: {template: store.template}
+                };
+            }
+            return {
+                data: [{
+                    type: 'funnel',
+                    y: ['Awareness', 'Ownership', 'Completion', 'Active Use'],
+                    x: charts.funnel.values,
+                    textinfo: 'value+percent initial',
+                    marker: {color: ['#FF6B6B', '#4ECDC4', '#45B7D1', '#96CEB4']}
+                }],
+                layout: {
+                    template: store.template,
+                    title: {text: 'User Engagement Funnel - ' + selectedGenre + ' Popular Games (' + charts.funnel.games + ' games)' +
+                                  '<br><sub>Community-reported data: Current players vs Total completions - Games with 100+ community members</sub>'},
+                    font: {size: 12},
+                    height: 500
+                }
+            };
+        },
+
+        engagementDistribution: function(selectedGenre, store) {
+            if (!store) {
+                return window.dash_clientside.no_update;
+            }
+            var charts = store.genres[selectedGenre];
+            var engagement = charts ? charts.engagement : {counts: [], edges: [], average: null, percentiles: [], games: 0};
+            var centers = [], widths = [];
+            for (var i = 0; i < engagement.counts.length; i++) {
+                centers.push((engagement.edges[i] + engagement.edges[i + 1]) / 2);
+                widths.push(engagement.edges[i + 1] - engagement.edges[i]);
+            }
+
+            var layout = {
+                template: store.template,
+                title: {text: 'Engagement Score Distribution - ' + selectedGenre + ' (' + engagement.games + ' games)'},
+                xaxis: {title: {text: 'Engagement Score (0-100)'}},
+                yaxis: {title: {text: 'count'}},
+                bargap: 0,
+                shapes: [],
+                annotations: []
+            };
+
+            // Shade the 10th-90th percentile band and mark the median
+            var bands = engagement.percentiles || [];
+            if (bands.length === 3 && bands[1] !== null) {
+                layout.shapes.push({
+                    type: 'rect', xref: 'x', yref: 'paper', x0: bands[0], x1: bands[2], y0: 0, y1: 1,
+                    fillcolor: 'gray', opacity: 0.12, line: {width: 0}, layer: 'below'
+                });
+                layout.shapes.push({
+                    type: 'line', xref: 'x', yref: 'paper', x0: bands[1], x1: bands[1], y0: 0, y1: 1,
+                    line: {dash: 'dot', color: 'gray'}
+                });
+                layout.annotations.push({
+                    xref: 'x', yref: 'paper', x: bands[1], y: 0.92, xanchor: 'right', yanchor: 'top',
+                    showarrow: false, text: 'Median: ' + bands[1].toFixed(1) + ' (P10-P90: ' +
+                        bands[0].toFixed(1) + '-' + bands[2].toFixed(1) + ')'
+                });
+            }
+
+            // Add average line
+            if (engagement.average !== null) {
+                layout.shapes.push({
+                    type: 'line', xref: 'x', yref: 'paper', x0: engagement.average, x1: engagement.average, y0: 0, y1: 1,
+                    line: {dash: 'dash', color: 'red'}
+                });
+                layout.annotations.push({
+                    xref: 'x', yref: 'paper', x: engagement.average, y: 1, xanchor: 'left', yanchor: 'top',
+                    showarrow: false, text: 'Average: ' + engagement.average.toFixed(1)
+                });
+            }
+
+            return {
+                data: [{
+                    type: 'bar', x: centers, y: engagement.counts, width: widths,
+                    marker: {color: '#45B7D1'},
+                    hovertemplate: 'Engagement Score (0-100)=%{x}<br>count=%{y}<extra></extra>'
+                }],
+                layout: layout
+            };
+        },
+
+        marketPenetration: function(selectedGenre, store) {
+            if (!store) {
+                return window.dash_clientside.no_update;
+            }
+            var charts = store.genres[selectedGenre];
+            if (!charts || charts.platforms.platform.length === 0) {
+                return {data: [], layout: {template: store.template, title: {text: 'No platform data available'}}};
+            }
+            var platforms = charts.platforms;
+            return {
+                data: [{
+                    type: 'bar',
+                    x: platforms.platform,
+                    y: platforms.total_users,
+                    marker: {color: platforms.engagement_score, coloraxis: 'coloraxis'},
+                    hovertemplate: 'Platform=%{x}<br>Total Users=%{y}<br>engagement_score=%{marker.color}<extra></extra>'
+                }],
+                layout: {
+                    template: store.template,
+                    title: {text: 'Market Penetration by Platform - ' + selectedGenre},
+                    xaxis: {title: {text: 'Platform'}, tickangle: 45},
+                    yaxis: {title: {text: 'Total Users'}},
+                    coloraxis: {colorscale: 'Blues', colorbar: {title: {text: 'engagement_score'}}}
+                }
+            };
+        },
+
+        genreOptions: function(options) {
+            // The same option list for every genre dropdown
+            var outputs = window.dash_clientside.callback_context.outputs_list;
+            return outputs.map(function() { return options; });
+        },
+
+        exportLinks: function(selectedGenre, filterQuery, weights) {
+            var query = '?genre=' + encodeURIComponent(selectedGenre || 'All Games');
+            if (filterQuery) {
+                query += '&filter=' + encodeURIComponent(filterQuery);
+            }
+            if (weights) {
+                query += '&weights=' + weights.join(',');
+            }
+            return ['/export/marketing-targets.csv' + query, '/export/marketing-targets.parquet' + query];
+        }
+    }
+});
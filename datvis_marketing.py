@@ -1,173 +1,194 @@
-from dash import Dash, dcc, html, Input, Output, dash_table
+from dash import Dash, dcc, html, Input, Output, State, ClientsideFunction, DiskcacheManager, Patch, dash_table
+from dash.dash_table.Format import Format, Scheme, Trim
 import plotly.express as px
 import plotly.graph_objects as go
+import plotly.io as pio
 from plotly.subplots import make_subplots
 import pandas as pd
 import numpy as np
 from datetime import datetime
+from collections import OrderedDict, Counter
+from concurrent.futures import Future
+from functools import wraps
+import itertools
+import threading
+import json
+import logging
+import os
+import diskcache
+from flask import Flask
 
-# Initialize the Dash app
-app = Dash(__name__, suppress_callback_exceptions=True)
-
-# For deployment
-server = app.server
-
-# Read and preprocess the data
-df_countries = pd.read_csv('countries_table.csv')
-df = pd.read_csv('game_info.csv')
-
-# Clean data to prevent JSON serialization issues
-def clean_text(text):
-    if pd.isna(text) or not isinstance(text, str):
-        return text
-    # Remove control characters that cause JSON issues
-    import re
-    return re.sub(r'[\x00-\x1f\x7f-\x9f]', '', text)
-
-# Clean text columns that might have control characters
-text_columns = ['name', 'slug', 'website', 'platforms', 'developers', 'genres', 'publishers', 'esrb_rating']
-for col in text_columns:
-    if col in df.columns:
-        df[col] = df[col].apply(clean_text)
-
-df['released'] = pd.to_datetime(df['released'], errors='coerce')
-df['year'] = df['released'].dt.year
-df['genres'] = df['genres'].apply(lambda x: x.split('||') if pd.notna(x) and isinstance(x, str) else [])
-
-# Marketing Data Preprocessing
-df_metacritic = df[df['metacritic'].notna() & (df['metacritic'] > 0)].copy()
-df_metacritic = df_metacritic.explode('genres')
-
-# Create Marketing KPIs
-def calculate_marketing_metrics(df):
-    """Calculate key marketing metrics for each game"""
-    marketing_df = df.copy()
-    
-    # Customer Lifecycle Metrics
-    marketing_df['total_users'] = (marketing_df['added_status_yet'].fillna(0) + 
-                                  marketing_df['added_status_owned'].fillna(0) + 
-                                  marketing_df['added_status_beaten'].fillna(0) + 
-                                  marketing_df['added_status_toplay'].fillna(0) + 
-                                  marketing_df['added_status_dropped'].fillna(0) + 
-                                  marketing_df['added_status_playing'].fillna(0))
-    
-    # Conversion Funnel Metrics
-    marketing_df['awareness_rate'] = marketing_df['total_users'] / marketing_df['total_users'].max()
-    marketing_df['ownership_rate'] = marketing_df['added_status_owned'].fillna(0) / marketing_df['total_users'].replace(0, 1)
-    marketing_df['engagement_rate'] = marketing_df['added_status_playing'].fillna(0) / marketing_df['added_status_owned'].fillna(1).replace(0, 1)
-    marketing_df['completion_rate'] = marketing_df['added_status_beaten'].fillna(0) / marketing_df['added_status_owned'].fillna(1).replace(0, 1)
-    marketing_df['churn_rate'] = marketing_df['added_status_dropped'].fillna(0) / marketing_df['added_status_owned'].fillna(1).replace(0, 1)
-    
-    # Engagement Score (0-100)
-    marketing_df['engagement_score'] = (
-        (marketing_df['ownership_rate'] * 0.3) + 
-        (marketing_df['engagement_rate'] * 0.4) + 
-        (marketing_df['completion_rate'] * 0.3)
-    ) * 100
-    
-    # Customer Lifetime Value Proxy
-    marketing_df['clv_proxy'] = (marketing_df['playtime'].fillna(0) * 
-                                marketing_df['rating'].fillna(0) * 
-                                marketing_df['completion_rate'])
-    
-    return marketing_df
+from marketing_data import (
+    CorrelationStats, SUCCESS_FACTOR_COLUMNS, SUCCESS_FACTOR_LABELS,
+    SCORE_WEIGHTS, SCORE_WEIGHT_KEYS, DEFAULT_SCORE_WEIGHTS, normalize_score_weights,
+    GAME_DATA_PATH, GAME_DATA_DELTA_PATH, GAME_DATA_ROWS, DATA_REFRESH_INTERVAL, REVIEW_MATRIX_MIN_REVIEWS,
+    current_dataset, data_layer
+)
+from marketing_export import export_blueprint
+from marketing_api import api_blueprint
+from marketing_static import static_blueprint
+from marketing_snapshot import SNAPSHOT_DIR, snapshot_store
+from marketing_profiling import PROFILE, PROFILE_DIR, profiling
+from marketing_versions import VERSION_STORE_DIR, version_store, compare_versions, game_changes
 
-# Apply marketing metrics
-df_marketing = calculate_marketing_metrics(df)
-df_marketing_exploded = df_marketing.explode('genres')
+# Application settings - create_app() takes overrides, e.g. a small sample file for tests
+DEFAULT_CONFIG = {
+    'GAME_DATA_PATH': GAME_DATA_PATH,
+    'GAME_DATA_DELTA_PATH': GAME_DATA_DELTA_PATH,
+    'GAME_DATA_ROWS': GAME_DATA_ROWS,
+    'DATA_REFRESH_INTERVAL': DATA_REFRESH_INTERVAL,
+    # Load the data while the app is created instead of on the first request
+    'PRELOAD_DATA': False,
+    # Heavy callbacks run as background jobs in local processes, results are kept on disk
+    'BACKGROUND_CACHE_DIR': os.environ.get('BACKGROUND_CACHE_DIR', os.path.join('cache', 'background')),
+    # Callback and layout responses are compressed (flask-compress)
+    'COMPRESS_LEVEL': int(os.environ.get('COMPRESS_LEVEL', 6)),
+    'COMPRESS_BR_LEVEL': int(os.environ.get('COMPRESS_BR_LEVEL', 4)),
+    'COMPRESS_MIN_SIZE': int(os.environ.get('COMPRESS_MIN_SIZE', 1024)),
+    # Answer callbacks from a prerendered snapshot (python marketing_snapshot.py build) while the data matches
+    'SNAPSHOT_DIR': SNAPSHOT_DIR,
+    # Keep every loaded dataset version here, for the version comparison (python marketing_versions.py)
+    'VERSION_STORE_DIR': VERSION_STORE_DIR,
+    # Sampling profiles of the data pipeline and callbacks (startup, request or all), written to PROFILE_DIR
+    'PROFILE': PROFILE,
+    'PROFILE_DIR': PROFILE_DIR,
+}
 
-# Pre-calculate heavy operations to improve performance
-print("Pre-calculating analytics data...")
+# Callbacks are collected here and attached to every app built by create_app()
+CALLBACKS = []
+CLIENTSIDE_CALLBACKS = []
 
-# Cache frequently used data
-df_marketing_clean = df_marketing[df_marketing['total_users'] > 0].copy()
-df_marketing_exploded_clean = df_marketing_exploded[df_marketing_exploded['total_users'] > 0].copy()
+def dashboard_callback(*args, **kwargs):
+    """Register a server-side callback, leaving the function importable as is"""
+    def decorator(func):
+        CALLBACKS.append((func, args, kwargs))
+        return func
+    return decorator
 
-# Fix the funnel logic - Keep realistic interpretation  
-def recalculate_funnel_metrics(df):
-    """Recalculate funnel with realistic business logic"""
-    df = df.copy()
-    
-    # Total users (awareness/reach)
-    df['total_users'] = (df['added_status_yet'].fillna(0) + 
-                        df['added_status_owned'].fillna(0) + 
-                        df['added_status_beaten'].fillna(0) + 
-                        df['added_status_toplay'].fillna(0) + 
-                        df['added_status_dropped'].fillna(0) + 
-                        df['added_status_playing'].fillna(0))
-    
-    # Ownership (purchased/acquired)
-    df['owned_users'] = df['added_status_owned'].fillna(0)
-    
-    # Active Use = Currently playing (snapshot)
-    df['active_users'] = df['added_status_playing'].fillna(0)
-    
-    # Completion = Total ever completed (cumulative)
-    df['completed_users'] = df['added_status_beaten'].fillna(0)
-    
-    return df
+def dashboard_clientside_callback(*args, **kwargs):
+    """Register a browser-side callback"""
+    CLIENTSIDE_CALLBACKS.append((args, kwargs))
 
-# Recalculate with better logic
-df_marketing_clean = recalculate_funnel_metrics(df_marketing_clean)
-df_marketing_exploded_clean = recalculate_funnel_metrics(df_marketing_exploded_clean)
+# Callback output cache - entries are only valid for the dataset version they were built from
+class VersionedCache:
+    """Small LRU cache of callback outputs keyed by dataset version"""
 
-print("Data pre-processing complete!")
+    def __init__(self, maxsize=512):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._version = None
+        self._lock = threading.Lock()
+        self.stats = Counter()
 
-# Cohort Analysis by Release Year
-def create_cohort_data(df):
-    """Create cohort analysis data"""
-    cohort_data = []
-    years = sorted(df['year'].dropna().unique())
-    
-    for year in years:
-        if year >= 2000 and year <= 2020:  # Focus on relevant years
-            year_games = df[df['year'] == year]
-            avg_ownership = year_games['ownership_rate'].mean()
-            avg_engagement = year_games['engagement_rate'].mean() 
-            avg_completion = year_games['completion_rate'].mean()
-            avg_churn = year_games['churn_rate'].mean()
-            
-            cohort_data.append({
-                'year': year,
-                'avg_ownership_rate': avg_ownership,
-                'avg_engagement_rate': avg_engagement,
-                'avg_completion_rate': avg_completion,
-                'avg_churn_rate': avg_churn,
-                'games_released': len(year_games)
-            })
-    
-    return pd.DataFrame(cohort_data)
-
-cohort_df = create_cohort_data(df_marketing)
-
-# Genre Performance Analysis
-def analyze_genre_performance():
-    """Analyze marketing performance by genre"""
-    genre_perf = df_marketing_exploded.groupby('genres').agg({
-        'engagement_score': 'mean',
-        'ownership_rate': 'mean',
-        'completion_rate': 'mean',
-        'churn_rate': 'mean',
-        'clv_proxy': 'mean',
-        'total_users': 'sum',
-        'metacritic': 'mean'
-    }).round(3)
-    
-    genre_perf = genre_perf.sort_values('engagement_score', ascending=False)
-    return genre_perf.reset_index()
+    def get(self, key, version):
+        with self._lock:
+            if version != self._version:
+                # New dataset version - drop everything built from the old one
+                self._entries.clear()
+                self._version = version
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.stats['hits'] += 1
+                return True, self._entries[key]
+            self.stats['misses'] += 1
+            return False, None
+
+    def put(self, key, version, value):
+        with self._lock:
+            if version != self._version:
+                return
+            self._entries[key] = value
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+class SingleFlight:
+    """Share one in-flight computation between identical concurrent calls"""
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.stats = Counter()
 
-genre_performance = analyze_genre_performance()
+    def do(self, key, func):
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+            self.stats['computed' if leader else 'coalesced'] += 1
 
-# Create unique genres list
-unique_genres = df_marketing_exploded['genres'].dropna().unique().tolist()
+        if not leader:
+            return future.result()
+        try:
+            result = func()
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+figure_cache = VersionedCache()
+callback_flights = SingleFlight()
+
+def callback_key(func, args):
+    """Hashable (name, args) of a callback call; store data such as the score weights arrives as lists"""
+    return func.__name__, tuple(tuple(arg) if isinstance(arg, list) else arg for arg in args)
+
+def versioned_cache(func):
+    """Cache a callback's output for the current dataset version, computing it once across threads"""
+    @wraps(func)
+    def wrapper(*args):
+        version = current_dataset().version
+        key = callback_key(func, args)
+        hit, value = figure_cache.get(key, version)
+        if hit:
+            return value
+
+        def compute():
+            found, value = snapshot_store.get(*key, current_dataset())
+            if not found:
+                value = func(*args)
+            figure_cache.put(key, version, value)
+            return value
+
+        # Concurrent duplicates wait for the first request and share its result
+        return callback_flights.do(key + (version,), compute)
+    return wrapper
+
+def snapshot_backed(func):
+    """Answer a background callback from the snapshot when it covers the call, inside the job process"""
+    # Jobs run in processes forked from the web worker, where the in-process output cache would be lost;
+    # the background callback manager keeps their results per dataset content instead
+    @wraps(func)
+    def wrapper(*args):
+        found, value = snapshot_store.get(*callback_key(func, args), current_dataset())
+        return value if found else func(*args)
+    return wrapper
+
+def callback_stats():
+    """Cache and request-coalescing counters for this worker"""
+    return {
+        'dataset_version': current_dataset().version,
+        'cache': dict(figure_cache.stats),
+        'single_flight': dict(callback_flights.stats),
+        'layout': dict(layout_stats),
+        'snapshot': dict(snapshot_store.stats),
+    }
 
 # Marketing Dashboard Layout Components
-def create_marketing_kpi_cards():
+def genre_options(genres):
+    """Dropdown options for 'All Games' followed by each genre"""
+    return [{'label': 'All Games', 'value': 'All Games'}] + [{'label': genre, 'value': genre} for genre in genres]
+
+def create_marketing_kpi_cards(ds):
     """Create KPI cards for key marketing metrics"""
-    total_games = len(df_marketing)
-    avg_engagement = df_marketing['engagement_score'].mean()
-    avg_completion_rate = df_marketing['completion_rate'].mean() * 100
-    top_genre = genre_performance.iloc[0]['genres']
+    total_games = len(ds.df_marketing)
+    avg_engagement = ds.df_marketing['engagement_score'].mean()
+    avg_completion_rate = ds.df_marketing['completion_rate'].mean() * 100
+    top_genre = ds.genre_performance.iloc[0]['genres']
     
     return html.Div([
         html.Div([
@@ -191,7 +212,47 @@ def create_marketing_kpi_cards():
         ], className="kpi-card"),
     ], className="kpi-container")
 
-def create_enhanced_chart_section(title, chart_id, include_dropdown=False, description=None):
+# Score weight sliders
+SCORE_TITLES = {
+    'engagement_score': "Engagement Score",
+    'combined_score': "Marketing Appeal",
+    'marketing_score': "Marketing Priority",
+}
+SCORE_COMPONENT_LABELS = {
+    'ownership_rate': "Ownership",
+    'engagement_rate': "Active Play",
+    'completion_rate': "Completion",
+    'metacritic': "Critic Score",
+    'rating': "User Rating",
+    'engagement_score': "Engagement Score",
+}
+
+def create_score_weight_section():
+    """Sliders for the weights behind the engagement, appeal and priority scores"""
+    groups = []
+    for score, weights in SCORE_WEIGHTS.items():
+        sliders = []
+        for component, weight in weights.items():
+            sliders.extend([
+                html.Label(SCORE_COMPONENT_LABELS[component], className="weight-label"),
+                dcc.Slider(id=f'weight-{score}-{component}', min=0, max=1, step=0.05, value=weight,
+                           marks=None, tooltip={'placement': 'bottom'})
+            ])
+        groups.append(html.Div([html.H4(SCORE_TITLES[score], className="rec-title")] + sliders,
+                               className="weight-group"))
+
+    return html.Div([
+        html.H2("Scoring Weights", className="chart-title"),
+        html.P("Tune how each score weighs its inputs - weights are relative within a score. "
+               "Rankings, the genre matrix, recommendations and genre charts follow the chosen weights.",
+               className="chart-description"),
+        dcc.Store(id='score-weights', data=list(DEFAULT_SCORE_WEIGHTS)),
+        html.Div(groups, className="weight-container"),
+        html.Hr(className="section-divider")
+    ], className="chart-section")
+
+def create_enhanced_chart_section(title, chart_id, include_dropdown=False, description=None, background=False,
+                                  metric_options=None):
     """Enhanced chart section with business context"""
     layout = [
         html.H2(title, className="chart-title"),
@@ -201,14 +262,28 @@ def create_enhanced_chart_section(title, chart_id, include_dropdown=False, descr
         layout.append(html.P(description, className="chart-description"))
     
     if include_dropdown:
+        # Options come from the shared genre-options store
         dropdown = dcc.Dropdown(
             id=f'{chart_id}-dropdown',
-            options=[{'label': 'All Games', 'value': 'All Games'}] + 
-                   [{'label': genre, 'value': genre} for genre in unique_genres],
+            options=[],
             value='All Games',
             className="genre-dropdown"
         )
         layout.append(dropdown)
+
+    if metric_options:
+        # Metric toggle, the first option selected
+        layout.append(dcc.RadioItems(
+            id=f'{chart_id}-metric',
+            options=[{'label': label, 'value': value} for value, label in metric_options.items()],
+            value=next(iter(metric_options)),
+            inline=True,
+            className="metric-toggle"
+        ))
+    
+    if background:
+        # Progress placeholder while the background job runs
+        layout.append(html.Div(id=f'{chart_id}-status', className="chart-status"))
     
     layout.extend([
         dcc.Loading(
@@ -222,394 +297,471 @@ def create_enhanced_chart_section(title, chart_id, include_dropdown=False, descr
     
     return html.Div(layout, className="chart-section")
 
+# Metrics the genre combination heatmaps can show
+COMBINATION_METRIC_LABELS = {'total_users': 'Total Users', 'engagement_score': 'Mean Engagement Score'}
+COMBINATION_CHARTS = ['genre-pairs', 'genre-platforms']
+CROSSTAB_PLATFORMS = 15
+
+# Genre dropdowns all take their options from the shared genre-options store
+GENRE_DROPDOWNS = [f'{chart_id}-dropdown' for chart_id in [
+    'lifecycle-funnel', 'engagement-distribution', 'churn-analysis', 'market-penetration',
+    'top-games-analysis', 'review-matrix', 'top-reviewed', 'marketing-table', 'success-factors'
+]]
+
+# Marketing targets table - numeric columns as browser-side formats (d3), blank values shown as N/A
+TABLE_NUMERIC_COLUMNS = ['metacritic', 'rating', 'engagement_score', 'total_users', 'completion_rate', 'year']
+TABLE_FORMATS = {
+    'whole': Format(precision=0, scheme=Scheme.fixed, nully='N/A').to_plotly_json(),
+    'rating': Format(precision=1, scheme=Scheme.fixed, nully='N/A').to_plotly_json(),
+    'users': Format(precision=3, scheme=Scheme.decimal_si_prefix, trim=Trim.yes, nully='N/A').to_plotly_json(),
+    'share': Format(precision=0, scheme=Scheme.percentage, nully='N/A').to_plotly_json(),
+}
+
 # Marketing-focused layout
-marketing_layout = html.Div([
-    html.H1("Gaming Marketing Analytics Dashboard", className="main-title"),
-    html.P("Data-driven insights for marketing strategy and customer engagement optimization", 
-           className="main-subtitle"),
+def build_marketing_layout(ds):
+    """Build the dashboard layout for a dataset version"""
+    genres = ds.unique_genres
+
+    return html.Div([
+        html.H1("Gaming Marketing Analytics Dashboard", className="main-title"),
+        html.P("Data-driven insights for marketing strategy and customer engagement optimization", 
+               className="main-subtitle"),
     
-    # Data Disclaimer
-    html.Div([
-        html.H4("📊 Data Source & Methodology", style={"color": "#2c3e50", "margin-bottom": "10px"}),
-        html.P([
-            "This dashboard analyzes ", html.Strong("850K+ games"), " from the RAWG gaming database. ",
-            "The metrics represent ", html.Strong("user-generated engagement data"), " where community members mark games as 'owned', 'playing', 'completed', etc. ",
-            html.Br(),
-            "⚠️ ", html.Strong("Important:"), " These are ", html.Em("not actual sales figures"), " but rather community engagement patterns that provide insights into user behavior and game popularity trends."
-        ], style={"margin": "10px 0", "line-height": "1.6"}),
-        html.P([
-            "🎯 ", html.Strong("Business Value:"), " This type of engagement data is valuable for marketing teams to understand genre preferences, completion rates, and user lifecycle patterns."
-        ], style={"margin": "10px 0", "color": "#27ae60", "font-weight": "500"})
-    ], style={
-        "background-color": "#f8f9fa", 
-        "padding": "20px", 
-        "border-radius": "8px", 
-        "border-left": "4px solid #3498db",
-        "margin": "20px 0"
-    }),
+        # Data Disclaimer
+        html.Div([
+            html.H4("📊 Data Source & Methodology", style={"color": "#2c3e50", "margin-bottom": "10px"}),
+            html.P([
+                "This dashboard analyzes ", html.Strong("850K+ games"), " from the RAWG gaming database. ",
+                "The metrics represent ", html.Strong("user-generated engagement data"), " where community members mark games as 'owned', 'playing', 'completed', etc. ",
+                html.Br(),
+                "⚠️ ", html.Strong("Important:"), " These are ", html.Em("not actual sales figures"), " but rather community engagement patterns that provide insights into user behavior and game popularity trends."
+            ], style={"margin": "10px 0", "line-height": "1.6"}),
+            html.P([
+                "🎯 ", html.Strong("Business Value:"), " This type of engagement data is valuable for marketing teams to understand genre preferences, completion rates, and user lifecycle patterns."
+            ], style={"margin": "10px 0", "color": "#27ae60", "font-weight": "500"})
+        ], style={
+            "background-color": "#f8f9fa", 
+            "padding": "20px", 
+            "border-radius": "8px", 
+            "border-left": "4px solid #3498db",
+            "margin": "20px 0"
+        }),
     
-    dcc.Loading(
-        id="loading-kpis",
-        type="default", 
-        children=[create_marketing_kpi_cards()],
-        style={"margin": "20px 0"}
-    ),
+        dcc.Loading(
+            id="loading-kpis",
+            type="default", 
+            children=[create_marketing_kpi_cards(ds)],
+            style={"margin": "20px 0"}
+        ),
+
+        # Genre options, shipped once for every genre dropdown
+        dcc.Store(id='genre-options-store', data=genre_options(genres)),
+
+        # Per-genre aggregates for the charts drawn in the browser
+        dcc.Store(id='genre-chart-store', data={
+            'template': pio.templates[pio.templates.default].to_plotly_json(),
+            'genres': ds.chart_aggregates
+        }),
+
+        create_score_weight_section(),
     
-    # User Engagement Analysis
-    create_enhanced_chart_section(
-        "User Engagement Funnel", 
-        "lifecycle-funnel",
-        include_dropdown=True,
-        description="Community engagement patterns from game discovery to completion - insights for user acquisition and retention strategies"
-    ),
+        # Game Lookup
+        html.Div([
+            html.H2("Game Lookup", className="chart-title"),
+            html.P("Search any game by title to see its engagement funnel and how it ranks within its genres", className="chart-description"),
+            dcc.Dropdown(
+                id='game-search',
+                options=[],
+                placeholder="Start typing a game title...",
+                className="genre-dropdown"
+            ),
+            dcc.Loading(
+                id="loading-game-drilldown",
+                type="default",
+                children=[html.Div(id='game-drilldown')],
+                style={"margin": "20px 0"}
+            ),
+            html.Hr(className="section-divider")
+        ], className="chart-section"),
+    
+        # User Engagement Analysis
+        create_enhanced_chart_section(
+            "User Engagement Funnel", 
+            "lifecycle-funnel",
+            include_dropdown=True,
+            description="Community engagement patterns from game discovery to completion - insights for user acquisition and retention strategies"
+        ),
     
-    # Cohort Analysis
-    create_enhanced_chart_section(
-        "Cohort Performance Analysis", 
-        "cohort-analysis",
-        description="Year-over-year performance trends to identify market shifts and opportunities"
-    ),
+        # Cohort Analysis
+        create_enhanced_chart_section(
+            "Cohort Performance Analysis", 
+            "cohort-analysis",
+            description="Year-over-year performance trends to identify market shifts and opportunities"
+        ),
     
-    # Genre Performance Matrix
-    create_enhanced_chart_section(
-        "Genre Performance Matrix", 
-        "genre-matrix",
-        description="ROI and engagement analysis by genre - key for content strategy decisions"
-    ),
+        # Genre Performance Matrix
+        create_enhanced_chart_section(
+            "Genre Performance Matrix", 
+            "genre-matrix",
+            description="ROI and engagement analysis by genre - key for content strategy decisions"
+        ),
     
-    # Engagement Scoring
-    create_enhanced_chart_section(
-        "Engagement Score Distribution", 
-        "engagement-distribution",
-        include_dropdown=True,
-        description="Proprietary engagement scoring model combining ownership, activity, and completion metrics"
-    ),
+        # Engagement Scoring
+        create_enhanced_chart_section(
+            "Engagement Score Distribution", 
+            "engagement-distribution",
+            include_dropdown=True,
+            description="Proprietary engagement scoring model combining ownership, activity, and completion metrics"
+        ),
     
-    # Churn Analysis
-    create_enhanced_chart_section(
-        "Churn vs Retention Analysis", 
-        "churn-analysis",
-        include_dropdown=True,
-        description="Identify patterns in user drop-off to inform retention strategies"
-    ),
+        # Churn Analysis
+        create_enhanced_chart_section(
+            "Churn vs Retention Analysis", 
+            "churn-analysis",
+            include_dropdown=True,
+            background=True,
+            description="Identify patterns in user drop-off to inform retention strategies"
+        ),
     
-    # Market Penetration
-    create_enhanced_chart_section(
-        "Market Penetration by Platform", 
-        "market-penetration",
-        include_dropdown=True,
-        description="Platform adoption rates and market share analysis for channel strategy"
-    ),
+        # Churn Risk Model
+        create_enhanced_chart_section(
+            "Predicted Churn Risk by Genre",
+            "churn-risk",
+            description="Share of players expected to drop a game, from a logistic model of play time, scores, popularity, genre and platform"
+        ),
     
-    # Business Recommendations
-    html.Div([
-        html.H2("Strategic Recommendations", className="recommendations-title"),
-        html.Div(id="business-recommendations", className="recommendations-content")
-    ], className="recommendations-section"),
+        # Genre Combinations
+        create_enhanced_chart_section(
+            "Genre Combinations",
+            "genre-pairs",
+            description="Audience and engagement of games that combine two genres - which hybrids are worth backing",
+            metric_options=COMBINATION_METRIC_LABELS
+        ),
     
-    # Top Critically Reviewed Games
-    html.Div([
-        html.H2("Top Critically Reviewed Games", className="chart-title"),
-        html.P("Highest-rated games by professional critics - shows critical acclaim vs community engagement patterns", className="chart-description"),
-        dcc.Dropdown(
-            id='top-reviewed-dropdown',
-            options=[{'label': 'All Games', 'value': 'All Games'}] + 
-                   [{'label': genre, 'value': genre} for genre in unique_genres],
-            value='All Games',
-            className="genre-dropdown"
+        # Genre x Platform
+        create_enhanced_chart_section(
+            "Genre x Platform Fit",
+            "genre-platforms",
+            description="How each genre performs on each platform - where to launch and which ports to prioritise",
+            metric_options=COMBINATION_METRIC_LABELS
         ),
-        dcc.Loading(
-            id="loading-top-reviewed-table",
-            type="default",
-            children=[dash_table.DataTable(
-                id='top-reviewed-table',
-                columns=[
-                    {"name": "Game Title", "id": "name", "type": "text"},
-                    {"name": "Genre", "id": "genres", "type": "text"},  
-                    {"name": "Score", "id": "metacritic", "type": "numeric"},
-                    {"name": "Rating", "id": "rating", "type": "numeric"},
-                    {"name": "Platform(s)", "id": "platforms", "type": "text"},
-                    {"name": "Year", "id": "year", "type": "numeric"},
-                    {"name": "Users", "id": "total_users", "type": "text"}
-                ],
-                style_table={
-                    'overflowX': 'auto',
-                    'minWidth': '100%',
-                    'width': '100%',
-                    'maxWidth': '100%'
-                },
-                style_cell={
-                    'textAlign': 'left', 
-                    'padding': '8px', 
-                    'fontSize': '13px',
-                    'fontFamily': 'Arial, sans-serif',
-                    'whiteSpace': 'normal',
-                    'height': 'auto',
-                    'minWidth': '80px',
-                    'maxWidth': '200px',
-                    'overflow': 'hidden',
-                    'textOverflow': 'ellipsis'
-                },
-                style_cell_conditional=[
-                    {'if': {'column_id': 'name'}, 'width': '25%', 'maxWidth': '200px'},
-                    {'if': {'column_id': 'genres'}, 'width': '12%', 'maxWidth': '100px'},
-                    {'if': {'column_id': 'metacritic'}, 'width': '8%', 'maxWidth': '80px', 'textAlign': 'center'},
-                    {'if': {'column_id': 'rating'}, 'width': '8%', 'maxWidth': '80px', 'textAlign': 'center'},
-                    {'if': {'column_id': 'platforms'}, 'width': '30%', 'maxWidth': '250px'},
-                    {'if': {'column_id': 'year'}, 'width': '8%', 'maxWidth': '80px', 'textAlign': 'center'},
-                    {'if': {'column_id': 'total_users'}, 'width': '9%', 'maxWidth': '90px', 'textAlign': 'right'}
-                ],
-                style_header={
-                    'backgroundColor': '#2c3e50', 
-                    'color': 'white', 
-                    'fontWeight': 'bold',
-                    'textAlign': 'center',
-                    'fontSize': '12px',
-                    'padding': '10px'
-                },
-                style_data_conditional=[
-                    {
-                        'if': {'column_id': 'metacritic'},
-                        'backgroundColor': '#e8f6f3',
-                        'color': 'black',
-                        'fontWeight': 'bold'
+    
+        # Market Penetration
+        create_enhanced_chart_section(
+            "Market Penetration by Platform", 
+            "market-penetration",
+            include_dropdown=True,
+            description="Platform adoption rates and market share analysis for channel strategy"
+        ),
+    
+        # Business Recommendations
+        html.Div([
+            html.H2("Strategic Recommendations", className="recommendations-title"),
+            html.Div(id="business-recommendations", className="recommendations-content")
+        ], className="recommendations-section"),
+    
+        # Top Critically Reviewed Games
+        html.Div([
+            html.H2("Top Critically Reviewed Games", className="chart-title"),
+            html.P("Highest-rated games by professional critics - shows critical acclaim vs community engagement patterns", className="chart-description"),
+            dcc.Dropdown(
+                id='top-reviewed-dropdown',
+                options=[],
+                value='All Games',
+                className="genre-dropdown"
+            ),
+            dcc.Loading(
+                id="loading-top-reviewed-table",
+                type="default",
+                children=[dash_table.DataTable(
+                    id='top-reviewed-table',
+                    columns=[
+                        {"name": "Game Title", "id": "name", "type": "text"},
+                        {"name": "Genre", "id": "genres", "type": "text"},  
+                        {"name": "Score", "id": "metacritic", "type": "numeric"},
+                        {"name": "Rating", "id": "rating", "type": "numeric"},
+                        {"name": "Platform(s)", "id": "platforms", "type": "text"},
+                        {"name": "Year", "id": "year", "type": "numeric"},
+                        {"name": "Users", "id": "total_users", "type": "text"}
+                    ],
+                    style_table={
+                        'overflowX': 'auto',
+                        'minWidth': '100%',
+                        'width': '100%',
+                        'maxWidth': '100%'
                     },
-                    {
-                        'if': {
-                            'filter_query': '{metacritic} >= 90',
-                            'column_id': 'metacritic'
-                        },
-                        'backgroundColor': '#27ae60',
-                        'color': 'white',
+                    style_cell={
+                        'textAlign': 'left', 
+                        'padding': '8px', 
+                        'fontSize': '13px',
+                        'fontFamily': 'Arial, sans-serif',
+                        'whiteSpace': 'normal',
+                        'height': 'auto',
+                        'minWidth': '80px',
+                        'maxWidth': '200px',
+                        'overflow': 'hidden',
+                        'textOverflow': 'ellipsis'
+                    },
+                    style_cell_conditional=[
+                        {'if': {'column_id': 'name'}, 'width': '25%', 'maxWidth': '200px'},
+                        {'if': {'column_id': 'genres'}, 'width': '12%', 'maxWidth': '100px'},
+                        {'if': {'column_id': 'metacritic'}, 'width': '8%', 'maxWidth': '80px', 'textAlign': 'center'},
+                        {'if': {'column_id': 'rating'}, 'width': '8%', 'maxWidth': '80px', 'textAlign': 'center'},
+                        {'if': {'column_id': 'platforms'}, 'width': '30%', 'maxWidth': '250px'},
+                        {'if': {'column_id': 'year'}, 'width': '8%', 'maxWidth': '80px', 'textAlign': 'center'},
+                        {'if': {'column_id': 'total_users'}, 'width': '9%', 'maxWidth': '90px', 'textAlign': 'right'}
+                    ],
+                    style_header={
+                        'backgroundColor': '#2c3e50', 
+                        'color': 'white', 
+                        'fontWeight': 'bold',
+                        'textAlign': 'center',
+                        'fontSize': '12px',
+                        'padding': '10px'
                     },
-                    {
-                        'if': {
-                            'filter_query': '{metacritic} >= 80 && {metacritic} < 90',
-                            'column_id': 'metacritic'
+                    style_data_conditional=[
+                        {
+                            'if': {'column_id': 'metacritic'},
+                            'backgroundColor': '#e8f6f3',
+                            'color': 'black',
+                            'fontWeight': 'bold'
                         },
-                        'backgroundColor': '#f39c12',
-                        'color': 'white',
-                    }
-                ],
-                page_size=20,
-                sort_action="native",
-                filter_action="native"
-            )],
-            style={"margin": "20px 0"}
+                        {
+                            'if': {
+                                'filter_query': '{metacritic} >= 90',
+                                'column_id': 'metacritic'
+                            },
+                            'backgroundColor': '#27ae60',
+                            'color': 'white',
+                        },
+                        {
+                            'if': {
+                                'filter_query': '{metacritic} >= 80 && {metacritic} < 90',
+                                'column_id': 'metacritic'
+                            },
+                            'backgroundColor': '#f39c12',
+                            'color': 'white',
+                        }
+                    ],
+                    page_size=20,
+                    sort_action="native",
+                    filter_action="native"
+                )],
+                style={"margin": "20px 0"}
+            ),
+            html.Hr(className="section-divider")
+        ], className="chart-section"),
+    
+        # Top Marketing Appeal Analysis
+        create_enhanced_chart_section(
+            "Top Marketing Appeal Analysis", 
+            "top-games-analysis",
+            include_dropdown=True,
+            description="Games with highest marketing potential based on community engagement, brand strength, and viral coefficient"
         ),
-        html.Hr(className="section-divider")
-    ], className="chart-section"),
-    
-    # Top Marketing Appeal Analysis
-    create_enhanced_chart_section(
-        "Top Marketing Appeal Analysis", 
-        "top-games-analysis",
-        include_dropdown=True,
-        description="Games with highest marketing potential based on community engagement, brand strength, and viral coefficient"
-    ),
     
-    # Review Quality vs Volume Matrix  
-    create_enhanced_chart_section(
-        "Review Quality vs Volume Matrix", 
-        "review-matrix",
-        include_dropdown=True,
-        description="Discover games with both high quality and high buzz - perfect targets for marketing partnerships"
-    ),
-    
-    # Marketing Performance Table
-    html.Div([
-        html.H2("Top Marketing Targets", className="chart-title"),
-        html.P("Games with highest marketing potential based on engagement, reviews, and user metrics", className="chart-description"),
-        dcc.Dropdown(
-            id='marketing-table-dropdown',
-            options=[{'label': 'All Games', 'value': 'All Games'}] + 
-                   [{'label': genre, 'value': genre} for genre in unique_genres],
-            value='All Games',
-            className="genre-dropdown"
+        # Review Quality vs Volume Matrix  
+        create_enhanced_chart_section(
+            "Review Quality vs Volume Matrix", 
+            "review-matrix",
+            include_dropdown=True,
+            background=True,
+            description="Discover games with both high quality and high buzz - perfect targets for marketing partnerships"
         ),
-        dcc.Loading(
-            id="loading-marketing-table",
-            type="default",
-            children=[dash_table.DataTable(
-                id='marketing-targets-table',
-                columns=[
-                    {"name": "Game Title", "id": "name", "type": "text"},
-                    {"name": "Genre", "id": "genres", "type": "text"},  
-                    {"name": "Critic Score", "id": "metacritic", "type": "text"},
-                    {"name": "User Rating", "id": "rating", "type": "text"},
-                    {"name": "Engagement", "id": "engagement_score", "type": "text"},
-                    {"name": "Total Users", "id": "total_users", "type": "text"},
-                    {"name": "Completion", "id": "completion_rate", "type": "text"},
-                    {"name": "Year", "id": "year", "type": "text"}
-                ],
-                style_table={
-                    'overflowX': 'auto',
-                    'minWidth': '100%',
-                    'width': '100%',
-                    'maxWidth': '100%'
-                },
-                style_cell={
-                    'textAlign': 'left', 
-                    'padding': '8px', 
-                    'fontSize': '13px',
-                    'fontFamily': 'Arial, sans-serif',
-                    'whiteSpace': 'normal',
-                    'height': 'auto',
-                    'minWidth': '70px',
-                    'maxWidth': '180px',
-                    'overflow': 'hidden',
-                    'textOverflow': 'ellipsis'
-                },
-                style_cell_conditional=[
-                    {'if': {'column_id': 'name'}, 'width': '22%', 'maxWidth': '180px'},
-                    {'if': {'column_id': 'genres'}, 'width': '12%', 'maxWidth': '100px'},
-                    {'if': {'column_id': 'metacritic'}, 'width': '10%', 'maxWidth': '90px', 'textAlign': 'center'},
-                    {'if': {'column_id': 'rating'}, 'width': '10%', 'maxWidth': '80px', 'textAlign': 'center'},
-                    {'if': {'column_id': 'engagement_score'}, 'width': '12%', 'maxWidth': '100px', 'textAlign': 'center'},
-                    {'if': {'column_id': 'total_users'}, 'width': '12%', 'maxWidth': '100px', 'textAlign': 'right'},
-                    {'if': {'column_id': 'completion_rate'}, 'width': '12%', 'maxWidth': '100px', 'textAlign': 'center'},
-                    {'if': {'column_id': 'year'}, 'width': '10%', 'maxWidth': '80px', 'textAlign': 'center'}
-                ],
-                style_header={
-                    'backgroundColor': '#3498db', 
-                    'color': 'white', 
-                    'fontWeight': 'bold',
-                    'textAlign': 'center',
-                    'fontSize': '12px',
-                    'padding': '10px'
-                },
-                style_data_conditional=[
-                    {
-                        'if': {'column_id': 'engagement_score'},
-                        'backgroundColor': '#e8f5e8',
-                        'color': 'black',
-                        'fontWeight': 'bold'
+    
+        # Marketing Performance Table
+        html.Div([
+            html.H2("Top Marketing Targets", className="chart-title"),
+            html.P("Games with highest marketing potential based on engagement, reviews, and user metrics", className="chart-description"),
+            dcc.Dropdown(
+                id='marketing-table-dropdown',
+                options=[],
+                value='All Games',
+                className="genre-dropdown"
+            ),
+            dcc.Loading(
+                id="loading-marketing-table",
+                type="default",
+                children=[dash_table.DataTable(
+                    id='marketing-targets-table',
+                    # Raw values, formatted in the browser, so table filters mean what they do in the export
+                    columns=[
+                        {"name": "Game Title", "id": "name", "type": "text"},
+                        {"name": "Genre", "id": "genres", "type": "text"},  
+                        {"name": "Critic Score", "id": "metacritic", "type": "numeric", "format": TABLE_FORMATS['whole']},
+                        {"name": "User Rating", "id": "rating", "type": "numeric", "format": TABLE_FORMATS['rating']},
+                        {"name": "Engagement", "id": "engagement_score", "type": "numeric", "format": TABLE_FORMATS['whole']},
+                        {"name": "Total Users", "id": "total_users", "type": "numeric", "format": TABLE_FORMATS['users']},
+                        {"name": "Completion", "id": "completion_rate", "type": "numeric", "format": TABLE_FORMATS['share']},
+                        {"name": "Year", "id": "year", "type": "numeric", "format": TABLE_FORMATS['whole']}
+                    ],
+                    style_table={
+                        'overflowX': 'auto',
+                        'minWidth': '100%',
+                        'width': '100%',
+                        'maxWidth': '100%'
                     },
-                    {
-                        'if': {
-                            'filter_query': '{engagement_score} >= 50',
-                            'column_id': 'engagement_score'
-                        },
-                        'backgroundColor': '#27ae60',
-                        'color': 'white',
+                    style_cell={
+                        'textAlign': 'left', 
+                        'padding': '8px', 
+                        'fontSize': '13px',
+                        'fontFamily': 'Arial, sans-serif',
+                        'whiteSpace': 'normal',
+                        'height': 'auto',
+                        'minWidth': '70px',
+                        'maxWidth': '180px',
+                        'overflow': 'hidden',
+                        'textOverflow': 'ellipsis'
+                    },
+                    style_cell_conditional=[
+                        {'if': {'column_id': 'name'}, 'width': '22%', 'maxWidth': '180px'},
+                        {'if': {'column_id': 'genres'}, 'width': '12%', 'maxWidth': '100px'},
+                        {'if': {'column_id': 'metacritic'}, 'width': '10%', 'maxWidth': '90px', 'textAlign': 'center'},
+                        {'if': {'column_id': 'rating'}, 'width': '10%', 'maxWidth': '80px', 'textAlign': 'center'},
+                        {'if': {'column_id': 'engagement_score'}, 'width': '12%', 'maxWidth': '100px', 'textAlign': 'center'},
+                        {'if': {'column_id': 'total_users'}, 'width': '12%', 'maxWidth': '100px', 'textAlign': 'right'},
+                        {'if': {'column_id': 'completion_rate'}, 'width': '12%', 'maxWidth': '100px', 'textAlign': 'center'},
+                        {'if': {'column_id': 'year'}, 'width': '10%', 'maxWidth': '80px', 'textAlign': 'center'}
+                    ],
+                    style_header={
+                        'backgroundColor': '#3498db', 
+                        'color': 'white', 
+                        'fontWeight': 'bold',
+                        'textAlign': 'center',
+                        'fontSize': '12px',
+                        'padding': '10px'
                     },
-                    {
-                        'if': {
-                            'filter_query': '{engagement_score} >= 30 && {engagement_score} < 50',
-                            'column_id': 'engagement_score'
+                    style_data_conditional=[
+                        {
+                            'if': {'column_id': 'engagement_score'},
+                            'backgroundColor': '#e8f5e8',
+                            'color': 'black',
+                            'fontWeight': 'bold'
                         },
-                        'backgroundColor': '#f39c12',
-                        'color': 'white',
-                    }
-                ],
-                page_size=15,
-                sort_action="native",
-                filter_action="native"
-            )],
-            style={"margin": "20px 0"}
+                        {
+                            'if': {
+                                'filter_query': '{engagement_score} >= 50',
+                                'column_id': 'engagement_score'
+                            },
+                            'backgroundColor': '#27ae60',
+                            'color': 'white',
+                        },
+                        {
+                            'if': {
+                                'filter_query': '{engagement_score} >= 30 && {engagement_score} < 50',
+                                'column_id': 'engagement_score'
+                            },
+                            'backgroundColor': '#f39c12',
+                            'color': 'white',
+                        }
+                    ],
+                    page_size=15,
+                    sort_action="native",
+                    filter_action="native",
+                    row_selectable="single",
+                    selected_rows=[]
+                )],
+                style={"margin": "20px 0"}
+            ),
+            # Full ranked list for the current genre and table filter
+            html.Div([
+                html.A("Download CSV", id='marketing-export-csv', className="export-link"),
+                html.A("Download Parquet", id='marketing-export-parquet', className="export-link")
+            ], className="export-links"),
+            # Similar games for the selected target
+            dcc.Checklist(
+                id='similar-games-same-genre',
+                options=[{'label': ' Only games sharing a genre', 'value': 'same-genre'}],
+                value=[]
+            ),
+            dcc.Loading(
+                id="loading-similar-games",
+                type="default",
+                children=[html.Div(id='similar-games')],
+                style={"margin": "20px 0"}
+            ),
+            html.Hr(className="section-divider")
+        ], className="chart-section"),
+    
+        # Critical Success Factors
+        create_enhanced_chart_section(
+            "Critical Success Factors", 
+            "success-factors",
+            include_dropdown=True,
+            description="Key metrics correlation analysis - what drives game success for strategic planning"
         ),
-        html.Hr(className="section-divider")
-    ], className="chart-section"),
-    
-    # Critical Success Factors
-    create_enhanced_chart_section(
-        "Critical Success Factors", 
-        "success-factors",
-        description="Key metrics correlation analysis - what drives game success for strategic planning"
-    )
-    
-], className="marketing-dashboard")
 
-# App layout for routing
-app.layout = html.Div([
-    dcc.Location(id='url', refresh=False),
-    html.Div(id='page-content')
-])
+        # Dataset version comparison
+        html.Div([
+            html.H2("What Moved Between Data Versions", className="chart-title"),
+            html.P("Genre engagement and funnel changes between two stored exports of the game data",
+                   className="chart-description"),
+            html.Div([
+                dcc.Dropdown(id='version-base', options=[], placeholder="Earlier version", className="genre-dropdown"),
+                dcc.Dropdown(id='version-compare', options=[], placeholder="Later version", className="genre-dropdown")
+            ], className="version-pickers"),
+            html.P(id='version-changes', className="chart-description"),
+            dcc.Loading(
+                id="loading-version-comparison",
+                type="default",
+                children=[dcc.Graph(id='version-comparison', className="chart-graph")],
+                style={"margin": "20px 0"}
+            )
+        ], className="chart-section")
+    
+    ], className="marketing-dashboard")
 
 # Marketing-focused callbacks
-@app.callback(
-    Output('lifecycle-funnel', 'figure'),
-    [Input('lifecycle-funnel-dropdown', 'value')]
+# Funnel, engagement distribution and platform charts are drawn in the browser
+# from the preloaded genre aggregates (assets/marketing_charts.js)
+for chart_id, function_name in [('lifecycle-funnel', 'lifecycleFunnel'),
+                                ('engagement-distribution', 'engagementDistribution'),
+                                ('market-penetration', 'marketPenetration')]:
+    dashboard_clientside_callback(
+        ClientsideFunction(namespace='marketing', function_name=function_name),
+        Output(chart_id, 'figure'),
+        [Input(f'{chart_id}-dropdown', 'value'), Input('genre-chart-store', 'data')]
+    )
+
+dashboard_clientside_callback(
+    ClientsideFunction(namespace='marketing', function_name='genreOptions'),
+    [Output(dropdown_id, 'options') for dropdown_id in GENRE_DROPDOWNS],
+    [Input('genre-options-store', 'data')]
 )
-def update_lifecycle_funnel(selected_genre):
-    try:
-        if selected_genre == 'All Games':
-            filtered_df = df_marketing_clean
-        else:
-            # Use exploded data for genre filtering
-            genre_mask = df_marketing_exploded_clean['genres'] == selected_genre
-            filtered_df = df_marketing_exploded_clean[genre_mask]
-            
-            # If no games found for this genre, return empty funnel
-            if filtered_df.empty:
-                return go.Figure().add_trace(go.Funnel(
-                    y=["No Data"],
-                    x=[0],
-                    text=["No games found for this genre"]
-                ))
-        
-        # Filter to commercial games (100+ total users) for realistic metrics
-        commercial_games = filtered_df[filtered_df['total_users'] >= 100]
-        
-        # Calculate funnel metrics using commercial games only
-        total_awareness = commercial_games['total_users'].sum()
-        total_owned = commercial_games['owned_users'].sum()
-        total_playing = commercial_games['active_users'].sum() 
-        total_completed = commercial_games['completed_users'].sum()
-        
-        # If no commercial games, fall back to top games
-        if len(commercial_games) == 0:
-            top_games = filtered_df.nlargest(50, 'total_users')
-            total_awareness = top_games['total_users'].sum()
-            total_owned = top_games['owned_users'].sum()
-            total_playing = top_games['active_users'].sum() 
-            total_completed = top_games['completed_users'].sum()
-        
-        stages = ['Awareness', 'Ownership', 'Completion', 'Active Use']
-        values = [total_awareness, total_owned, total_completed, total_playing]
-        
-        # Calculate conversion rates
-        conversion_rates = [100]
-        for i in range(1, len(values)):
-            if values[0] > 0:
-                conversion_rates.append((values[i] / values[0]) * 100)
-            else:
-                conversion_rates.append(0)
-        
-        fig = go.Figure()
-        
-        # Funnel chart with better colors
-        fig.add_trace(go.Funnel(
-            y=stages,
-            x=values,
-            textinfo="value+percent initial",
-            marker=dict(color=["#FF6B6B", "#4ECDC4", "#45B7D1", "#96CEB4"])
-        ))
-        
-        # Use appropriate game count for title
-        games_count = len(commercial_games) if len(commercial_games) > 0 else len(filtered_df.nlargest(50, 'total_users'))
-        
-        fig.update_layout(
-            title=f"User Engagement Funnel - {selected_genre} Popular Games ({games_count} games)<br><sub>Community-reported data: Current players vs Total completions - Games with 100+ community members</sub>",
-            font=dict(size=12),
-            height=500
-        )
-        
-        return fig
-        
-    except Exception as e:
-        # Return error funnel if something goes wrong
-        return go.Figure().add_trace(go.Funnel(
-            y=["Data Loading Error"],
-            x=[1],
-            text=[f"Error: {str(e)[:50]}..."]
-        ))
 
-@app.callback(
+dashboard_clientside_callback(
+    ClientsideFunction(namespace='marketing', function_name='exportLinks'),
+    [Output('marketing-export-csv', 'href'), Output('marketing-export-parquet', 'href')],
+    [Input('marketing-table-dropdown', 'value'), Input('marketing-targets-table', 'filter_query'),
+     Input('score-weights', 'data')]
+)
+
+@dashboard_callback(
+    Output('score-weights', 'data'),
+    [Input(f'weight-{score}-{component}', 'value') for score, component in SCORE_WEIGHT_KEYS],
+    prevent_initial_call=True
+)
+def update_score_weights(*values):
+    return list(normalize_score_weights(values))
+
+@dashboard_callback(
+    Output('genre-chart-store', 'data'),
+    [Input('score-weights', 'data')],
+    prevent_initial_call=True
+)
+def update_genre_chart_store(weights):
+    # Only the genre data changes, the template stays in the browser
+    store = Patch()
+    store['genres'] = current_dataset().rescore(weights)['chart_aggregates']
+    return store
+
+@dashboard_callback(
     Output('cohort-analysis', 'figure'),
     [Input('url', 'pathname')]
 )
+@versioned_cache
 def update_cohort_analysis(pathname):
+    cohort_df = current_dataset().cohort_df
     fig = make_subplots(
         rows=2, cols=2,
         subplot_titles=('Ownership Rate by Year', 'Engagement Rate by Year', 
@@ -654,14 +806,15 @@ def update_cohort_analysis(pathname):
     
     return fig
 
-@app.callback(
+@dashboard_callback(
     Output('genre-matrix', 'figure'),
-    [Input('url', 'pathname')]
+    [Input('url', 'pathname'), Input('score-weights', 'data')]
 )
-def update_genre_matrix(pathname):
+@versioned_cache
+def update_genre_matrix(pathname, weights):
     # Create bubble chart showing genre performance
     fig = px.scatter(
-        genre_performance.head(15), 
+        current_dataset().rescore(weights)['genre_performance'].head(15), 
         x='completion_rate', 
         y='engagement_score',
         size='total_users',
@@ -680,41 +833,19 @@ def update_genre_matrix(pathname):
     fig.update_layout(height=600)
     return fig
 
-@app.callback(
-    Output('engagement-distribution', 'figure'),
-    [Input('engagement-distribution-dropdown', 'value')]
-)
-def update_engagement_distribution(selected_genre):
-    if selected_genre == 'All Games':
-        filtered_df = df_marketing_clean
-    else:
-        filtered_df = df_marketing_exploded_clean[df_marketing_exploded_clean['genres'] == selected_genre]
-    
-    fig = px.histogram(
-        filtered_df, 
-        x='engagement_score',
-        nbins=20,
-        title=f'Engagement Score Distribution - {selected_genre} ({len(filtered_df)} games)',
-        labels={'engagement_score': 'Engagement Score (0-100)', 'count': 'Number of Games'},
-        color_discrete_sequence=['#45B7D1']
-    )
-    
-    # Add average line
-    avg_score = filtered_df['engagement_score'].mean()
-    fig.add_vline(x=avg_score, line_dash="dash", line_color="red", 
-                  annotation_text=f"Average: {avg_score:.1f}")
-    
-    return fig
-
-@app.callback(
+@dashboard_callback(
     Output('churn-analysis', 'figure'),
-    [Input('churn-analysis-dropdown', 'value')]
+    [Input('churn-analysis-dropdown', 'value')],
+    background=True,
+    running=[(Output('churn-analysis-status', 'children'), "Analyzing churn across the catalogue...", "")]
 )
+@snapshot_backed
 def update_churn_analysis(selected_genre):
+    ds = current_dataset()
     if selected_genre == 'All Games':
-        filtered_df = df_marketing_exploded_clean
+        filtered_df = ds.df_marketing_exploded_clean
     else:
-        filtered_df = df_marketing_exploded_clean[df_marketing_exploded_clean['genres'] == selected_genre]
+        filtered_df = ds.df_marketing_exploded_clean[ds.df_marketing_exploded_clean['genres'] == selected_genre]
     
     # Create churn vs completion scatter plot
     fig = px.scatter(
@@ -735,60 +866,92 @@ def update_churn_analysis(selected_genre):
     
     return fig
 
-@app.callback(
-    Output('market-penetration', 'figure'),
-    [Input('market-penetration-dropdown', 'value')]
+@dashboard_callback(
+    Output('churn-risk', 'figure'),
+    [Input('url', 'pathname')]
 )
-def update_market_penetration(selected_genre):
-    if selected_genre == 'All Games':
-        filtered_df = df_marketing_clean
-    else:
-        filtered_df = df_marketing_clean[df_marketing_clean['genres'].apply(lambda x: selected_genre in x if isinstance(x, list) else False)]
-    
-    # Process platform data (optimized)
-    platform_data = []
-    for _, row in filtered_df.head(1000).iterrows():  # Limit for performance
-        if pd.notna(row['platforms']):
-            platforms = row['platforms'].split('||')
-            for platform in platforms:
-                platform_data.append({
-                    'platform': platform.strip(),
-                    'total_users': row['total_users'],
-                    'ownership_rate': row['ownership_rate'],
-                    'engagement_score': row['engagement_score']
-                })
-    
-    platform_df = pd.DataFrame(platform_data)
-    if not platform_df.empty:
-        platform_summary = platform_df.groupby('platform').agg({
-            'total_users': 'sum',
-            'ownership_rate': 'mean',
-            'engagement_score': 'mean'
-        }).reset_index()
-        
-        platform_summary = platform_summary.sort_values('total_users', ascending=False).head(10)
-        
-        fig = px.bar(
-            platform_summary,
-            x='platform',
-            y='total_users',
-            color='engagement_score',
-            title=f'Market Penetration by Platform - {selected_genre}',
-            labels={'total_users': 'Total Users', 'platform': 'Platform'},
-            color_continuous_scale='Blues'
-        )
-        
-        fig.update_xaxes(tickangle=45)
-        return fig
-    
-    # Return empty figure if no data
-    return px.bar(title="No platform data available")
+@versioned_cache
+def update_churn_risk(pathname):
+    model = current_dataset().churn_model
+    genre_risk = model.genre_risk.head(15).iloc[::-1]
+    drivers = model.coefficients.reindex(model.coefficients.abs().nlargest(12).index).iloc[::-1]
+
+    fig = make_subplots(
+        rows=1, cols=2,
+        subplot_titles=('Predicted vs Observed Churn by Genre', 'Strongest Churn Drivers (standardized)'),
+        horizontal_spacing=0.25
+    )
+    fig.add_trace(
+        go.Bar(y=genre_risk['genres'], x=genre_risk['predicted_risk'], orientation='h',
+               name='Predicted Risk', marker_color='#E74C3C'),
+        row=1, col=1
+    )
+    fig.add_trace(
+        go.Scatter(y=genre_risk['genres'], x=genre_risk['observed_churn'], mode='markers',
+                   name='Observed Churn', marker=dict(color='#2c3e50', size=9, symbol='diamond')),
+        row=1, col=1
+    )
+    fig.add_trace(
+        go.Bar(y=drivers.index, x=drivers.values, orientation='h', name='Coefficient', showlegend=False,
+               marker_color=np.where(drivers.values > 0, '#E74C3C', '#27ae60')),
+        row=1, col=2
+    )
+
+    fig.update_xaxes(tickformat='.0%', row=1, col=1)
+    fig.update_layout(
+        title=f"Churn Risk Model: {model.training_games:,} games with players",
+        height=600,
+        legend=dict(orientation='h', y=-0.1)
+    )
+    return fig
 
-@app.callback(
+def combination_heatmap(table, metric, title):
+    """Heatmap of a genre combination table, genres with the most users first"""
+    fig = go.Figure(go.Heatmap(
+        z=table.to_numpy(),
+        x=table.columns,
+        y=table.index,
+        colorscale='Viridis' if metric == 'total_users' else 'RdYlGn',
+        colorbar=dict(title=COMBINATION_METRIC_LABELS[metric]),
+        hoverongaps=False,
+        hovertemplate='%{y} + %{x}<br>' + COMBINATION_METRIC_LABELS[metric] + ': %{z:,.1f}<extra></extra>'
+    ))
+    fig.update_layout(title=title, height=650, yaxis=dict(autorange='reversed'))
+    return fig
+
+@dashboard_callback(
+    Output('genre-pairs', 'figure'),
+    [Input('url', 'pathname'), Input('genre-pairs-metric', 'value')]
+)
+@versioned_cache
+def update_genre_pairs(pathname, metric):
+    combinations = current_dataset().genre_combinations
+    order = combinations.genre_pairs('total_users').max(axis=1).sort_values(ascending=False).index
+    table = combinations.genre_pairs(metric).loc[order, order]
+    # The diagonal is each genre on its own, not a combination
+    table = table.mask(np.eye(len(table), dtype=bool))
+    return combination_heatmap(table, metric, f"Genre Combinations: {COMBINATION_METRIC_LABELS[metric]}")
+
+@dashboard_callback(
+    Output('genre-platforms', 'figure'),
+    [Input('url', 'pathname'), Input('genre-platforms-metric', 'value')]
+)
+@versioned_cache
+def update_genre_platforms(pathname, metric):
+    combinations = current_dataset().genre_combinations
+    order = combinations.genre_pairs('total_users').max(axis=1).sort_values(ascending=False).index
+    table = combinations.genre_platforms(metric, CROSSTAB_PLATFORMS).loc[order]
+    return combination_heatmap(table, metric, f"Genre x Platform: {COMBINATION_METRIC_LABELS[metric]}")
+
+@dashboard_callback(
     Output('business-recommendations', 'children'),
-    [Input('url', 'pathname')]
+    [Input('url', 'pathname'), Input('score-weights', 'data')]
 )
-def update_recommendations(pathname):
+@versioned_cache
+def update_recommendations(pathname, weights):
+    ds = current_dataset()
+    genre_performance = ds.rescore(weights)['genre_performance']
+
     # Generate dynamic recommendations based on data
     top_genre = genre_performance.iloc[0]
     worst_churn_genre = genre_performance.loc[genre_performance['churn_rate'].idxmin()]
@@ -812,33 +975,22 @@ def update_recommendations(pathname):
         
         html.Div([
             html.H4("📊 KPI Focus", className="rec-title"), 
-            html.P(f"Industry average completion rate is {df_marketing['completion_rate'].mean()*100:.1f}% - focus on improving post-purchase engagement.", className="rec-text")
+            html.P(f"Industry average completion rate is {ds.df_marketing['completion_rate'].mean()*100:.1f}% - focus on improving post-purchase engagement.", className="rec-text")
         ], className="recommendation-card")
     ]
     
     return recommendations
 
-@app.callback(
+@dashboard_callback(
     Output('top-games-analysis', 'figure'),
-    [Input('top-games-analysis-dropdown', 'value')]
+    [Input('top-games-analysis-dropdown', 'value'), Input('score-weights', 'data')]
 )
-def update_top_games_analysis(selected_genre):
-    if selected_genre == 'All Games':
-        filtered_df = df_marketing_exploded[df_marketing_exploded['metacritic'].notna()]
-    else:
-        filtered_df = df_marketing_exploded[
-            (df_marketing_exploded['genres'] == selected_genre) & 
-            (df_marketing_exploded['metacritic'].notna())
-        ]
-    
-    # Get top 20 games by combined score (metacritic + user rating + engagement)
-    filtered_df['combined_score'] = (
-        (filtered_df['metacritic'] / 100 * 0.4) + 
-        (filtered_df['rating'] / 5 * 0.3) + 
-        (filtered_df['engagement_score'] / 100 * 0.3)
-    ) * 100
-    
-    top_games = filtered_df.nlargest(20, 'combined_score')
+@versioned_cache
+def update_top_games_analysis(selected_genre, weights):
+    # Top 20 games by combined score (metacritic + user rating + engagement), precomputed for the default weights
+    top_games = current_dataset().ranking('top_games', selected_genre, weights)
+    if top_games is None:
+        top_games = pd.DataFrame(columns=['combined_score', 'name', 'metacritic'])
     
     fig = px.bar(
         top_games,
@@ -858,11 +1010,16 @@ def update_top_games_analysis(selected_genre):
     fig.update_layout(yaxis={'categoryorder': 'total ascending'})
     return fig
 
-@app.callback(
+@dashboard_callback(
     Output('review-matrix', 'figure'),
-    [Input('review-matrix-dropdown', 'value')]
+    [Input('review-matrix-dropdown', 'value')],
+    background=True,
+    running=[(Output('review-matrix-status', 'children'), "Scanning reviews across the catalogue...", "")]
 )
+@snapshot_backed
 def update_review_matrix(selected_genre):
+    ds = current_dataset()
+    df_marketing_exploded = ds.df_marketing_exploded
     if selected_genre == 'All Games':
         filtered_df = df_marketing_exploded[
             (df_marketing_exploded['metacritic'].notna()) & 
@@ -876,7 +1033,7 @@ def update_review_matrix(selected_genre):
         ]
     
     # Focus on games with significant review activity
-    filtered_df = filtered_df[filtered_df['reviews_count'] > 10]
+    filtered_df = filtered_df[filtered_df['reviews_count'] > REVIEW_MATRIX_MIN_REVIEWS]
     
     fig = px.scatter(
         filtered_df.head(200),  # Top 200 for performance
@@ -895,9 +1052,9 @@ def update_review_matrix(selected_genre):
         color_continuous_scale='RdYlBu'
     )
     
-    # Add quadrant lines
-    median_reviews = filtered_df['reviews_count'].median()
-    median_metacritic = filtered_df['metacritic'].median()
+    # Add quadrant lines, at the medians kept in the load-time sketches
+    median_reviews = ds.review_quantiles.sketch('reviews_count', selected_genre).quantile(0.5)
+    median_metacritic = ds.review_quantiles.sketch('metacritic', selected_genre).quantile(0.5)
     
     fig.add_hline(y=median_metacritic, line_dash="dash", line_color="gray", 
                   annotation_text="Quality Threshold")
@@ -906,102 +1063,117 @@ def update_review_matrix(selected_genre):
     
     return fig
 
-@app.callback(
-    Output('marketing-targets-table', 'data'),
-    [Input('marketing-table-dropdown', 'value')]
+@dashboard_callback(
+    [Output('marketing-targets-table', 'data'), Output('marketing-targets-table', 'selected_rows')],
+    [Input('marketing-table-dropdown', 'value'), Input('score-weights', 'data')]
 )
-def update_marketing_table(selected_genre):
-    if selected_genre == 'All Games':
-        filtered_df = df_marketing_exploded
-    else:
-        filtered_df = df_marketing_exploded[df_marketing_exploded['genres'] == selected_genre]
-    
-    # Calculate marketing priority score
-    filtered_df['marketing_score'] = (
-        (filtered_df['engagement_score'] / 100 * 0.3) +
-        (filtered_df['metacritic'].fillna(0) / 100 * 0.25) +
-        (filtered_df['rating'].fillna(0) / 5 * 0.25) +
-        (filtered_df['completion_rate'].fillna(0) * 0.2)
-    ) * 100
-    
-    # Get top marketing targets
-    top_targets = filtered_df.nlargest(25, 'marketing_score')
-    
-    # Format data for table
+@versioned_cache
+def update_marketing_table(selected_genre, weights):
+    # Top marketing targets by marketing priority score, precomputed for the default weights.
+    # The selection is cleared with the new rows, as its positions would point at other games
+    top_targets = current_dataset().ranking('marketing_targets', selected_genre, weights)
+    if top_targets is None:
+        return [], []
+    
+    # Raw values for the table, which formats them; full titles, which wrap in their cells, so filters see all of them
     table_data = []
     for _, row in top_targets.iterrows():
-        # Shorten game titles for mobile
-        game_title = str(row['name'])
-        if len(game_title) > 25:
-            game_title = game_title[:22] + '...'
-            
         table_data.append({
-            'name': game_title,
-            'genres': str(row['genres']),
-            'metacritic': f"{row['metacritic']:.0f}" if pd.notna(row['metacritic']) else 'N/A',
-            'rating': f"{row['rating']:.1f}" if pd.notna(row['rating']) else 'N/A',
-            'engagement_score': f"{row['engagement_score']:.0f}",
-            'total_users': f"{row['total_users']/1000:.0f}k" if row['total_users'] >= 1000 else f"{row['total_users']:.0f}",
-            'completion_rate': f"{row['completion_rate']*100:.0f}%" if pd.notna(row['completion_rate']) else 'N/A',
-            'year': f"{row['year']:.0f}" if pd.notna(row['year']) else 'N/A'
+            'name': str(row['name']),
+            'genres': str(row['genres']) if pd.notna(row['genres']) else None,
+            **{column: float(row[column]) if pd.notna(row[column]) else None for column in TABLE_NUMERIC_COLUMNS},
+            'id': game_value(row)
         })
     
-    return table_data
+    return table_data, []
+
+@dashboard_callback(
+    Output('similar-games', 'children'),
+    [Input('marketing-targets-table', 'selected_row_ids'),
+     Input('similar-games-same-genre', 'value')]
+)
+def update_similar_games(selected_row_ids, same_genre):
+    if not selected_row_ids:
+        return html.P("Select a game in the table to find games with a similar engagement profile.", className="chart-description")
+    return similar_games_table(selected_row_ids[0], 'same-genre' in (same_genre or []))
+
+@versioned_cache
+def similar_games_table(selected_game, same_genre):
+    """Table of the games most similar to one marketing target"""
+    ds = current_dataset()
+    position = ds.search_index.position(selected_game)
+    if position is None:
+        return html.P("This game is no longer in the dataset.", className="chart-description")
+
+    positions, similarities = ds.similarity_index.similar(position, k=10, same_genre=same_genre)
+    similar = ds.df_marketing.iloc[positions]
+    rows = [{
+        'name': str(row['name']),
+        'genres': ', '.join(row['genres']),
+        'similarity': f"{similarity * 100:.0f}%",
+        'engagement_score': f"{row['engagement_score']:.0f}",
+        'metacritic': f"{row['metacritic']:.0f}" if pd.notna(row['metacritic']) else 'N/A'
+    } for (_, row), similarity in zip(similar.iterrows(), similarities)]
+
+    return html.Div([
+        html.H4(f"Games like {ds.df_marketing.iloc[position]['name']}", className="rec-title"),
+        dash_table.DataTable(
+            columns=[
+                {"name": "Game Title", "id": "name", "type": "text"},
+                {"name": "Genres", "id": "genres", "type": "text"},
+                {"name": "Similarity", "id": "similarity", "type": "text"},
+                {"name": "Engagement", "id": "engagement_score", "type": "text"},
+                {"name": "Critic Score", "id": "metacritic", "type": "text"}
+            ],
+            data=rows,
+            style_cell={'textAlign': 'left', 'padding': '8px', 'fontSize': '13px', 'fontFamily': 'Arial, sans-serif'},
+            style_header={'backgroundColor': '#3498db', 'color': 'white', 'fontWeight': 'bold', 'fontSize': '12px'}
+        )
+    ])
 
-@app.callback(
+@dashboard_callback(
     Output('success-factors', 'figure'),
-    [Input('url', 'pathname')]
+    [Input('success-factors-dropdown', 'value')]
 )
-def update_success_factors(pathname):
-    # Create correlation matrix of key success metrics
-    success_metrics = df_marketing_exploded[
-        ['metacritic', 'rating', 'total_users', 'engagement_score', 
-         'completion_rate', 'ownership_rate', 'playtime']
-    ].dropna()
-    
-    # Calculate correlation matrix
-    corr_matrix = success_metrics.corr()
-    
+@versioned_cache
+def update_success_factors(selected_genre):
+    # Assemble correlation matrix from the precomputed statistics
+    stats = current_dataset().success_factor_stats.get(selected_genre)
+    if stats is None:
+        stats = CorrelationStats(len(SUCCESS_FACTOR_COLUMNS))
+    corr_matrix = stats.correlation()
+
     # Create heatmap
     fig = px.imshow(
         corr_matrix,
         labels=dict(x="Metrics", y="Metrics", color="Correlation"),
-        x=['Metacritic', 'User Rating', 'Total Users', 'Engagement Score', 
-           'Completion Rate', 'Ownership Rate', 'Playtime'],
-        y=['Metacritic', 'User Rating', 'Total Users', 'Engagement Score', 
-           'Completion Rate', 'Ownership Rate', 'Playtime'],
+        x=SUCCESS_FACTOR_LABELS,
+        y=SUCCESS_FACTOR_LABELS,
         color_continuous_scale='RdBu',
-        title="Success Factors Correlation Matrix"
+        zmin=-1, zmax=1,
+        title=f"Success Factors Correlation Matrix - {selected_genre} ({stats.count} games)"
     )
-    
+
     # Add correlation values as text
-    fig.update_traces(text=corr_matrix.round(2), texttemplate="%{text}")
+    fig.update_traces(text=np.round(corr_matrix, 2), texttemplate="%{text}")
     fig.update_layout(height=600)
     
     return fig
 
 # New callback for top reviewed games table
-@app.callback(
+@dashboard_callback(
     Output('top-reviewed-table', 'data'),
     [Input('top-reviewed-dropdown', 'value')]
 )
+@versioned_cache
 def update_top_reviewed_table(selected_genre):
-    if selected_genre == 'All Games':
-        filtered_df = df_marketing_exploded_clean[df_marketing_exploded_clean['metacritic'].notna()]
-    else:
-        # Use the same filtering logic as other charts
-        filtered_df = df_marketing_exploded_clean[
-            (df_marketing_exploded_clean['genres'] == selected_genre) & 
-            (df_marketing_exploded_clean['metacritic'].notna())
-        ]
+    # Top 50 games by actual Metacritic scores are precomputed
+    top_reviewed = current_dataset().rankings['top_reviewed'].get(selected_genre)
     
     # If no games found, return empty list
-    if filtered_df.empty:
+    if top_reviewed is None:
         return []
     
-    # Sort by actual Metacritic scores and get top 50
-    top_reviewed = filtered_df.nlargest(50, 'metacritic')
-    
     # Format data for table
     table_data = []
     for _, row in top_reviewed.iterrows():
@@ -1034,14 +1206,198 @@ def update_top_reviewed_table(selected_genre):
     
     return table_data
 
+# Game search and drilldown
+def game_value(row):
+    """JSON-friendly key of a game row"""
+    game = row[current_dataset().key]
+    return game.item() if hasattr(game, 'item') else game
+
+def game_option(row):
+    """Dropdown option for one game"""
+    label = str(row['name'])
+    if pd.notna(row['year']):
+        label += f" ({row['year']:.0f})"
+    return {'label': label, 'value': game_value(row)}
+
+def playtime_band(bands):
+    """Genre play time median with its 10th-90th percentile range, from a sketch lookup"""
+    low, median, high = bands
+    if np.isnan(median):
+        return 'N/A'
+    return f"{median:.0f}h ({low:.0f}-{high:.0f}h)"
+
+@dashboard_callback(
+    Output('game-search', 'options'),
+    [Input('game-search', 'search_value')],
+    [State('game-search', 'value')]
+)
+def update_game_search_options(search_value, selected_game):
+    ds = current_dataset()
+    index = ds.search_index
+    positions = list(index.search(search_value or '', limit=10))
+
+    # Keep the selected game available so the dropdown doesn't clear it
+    selected_position = index.position(selected_game) if selected_game is not None else None
+    if selected_position is not None and selected_position not in positions:
+        positions.append(selected_position)
+
+    return [game_option(ds.df_marketing.iloc[position]) for position in positions]
+
+@dashboard_callback(
+    Output('game-drilldown', 'children'),
+    [Input('game-search', 'value')]
+)
+@versioned_cache
+def update_game_drilldown(selected_game):
+    ds = current_dataset()
+    position = ds.search_index.position(selected_game) if selected_game is not None else None
+    if position is None:
+        return html.P("Select a game to see its details.", className="chart-description")
+
+    game = ds.df_marketing.iloc[position]
+
+    # Game funnel, same stages as the genre funnel
+    fig = go.Figure(go.Funnel(
+        y=['Awareness', 'Ownership', 'Completion', 'Active Use'],
+        x=[game['total_users'], game['added_status_owned'], game['added_status_beaten'], game['added_status_playing']],
+        textinfo="value+percent initial",
+        marker=dict(color=["#FF6B6B", "#4ECDC4", "#45B7D1", "#96CEB4"])
+    ))
+    fig.update_layout(title=f"User Engagement Funnel - {game['name']}", font=dict(size=12), height=400)
+
+    # Percentile rank within each genre
+    percentiles = ds.genre_percentiles
+    playtime = ds.engagement_quantiles
+    genre_rows = [
+        html.Tr([
+            html.Td(genre),
+            html.Td(f"{percentiles.size(genre):,}"),
+            html.Td(f"{percentiles.percentile(genre, 'engagement_score', game['engagement_score']):.0f}"),
+            html.Td(f"{percentiles.percentile(genre, 'clv_proxy', game['clv_proxy']):.0f}"),
+            html.Td(playtime_band(playtime.percentiles('playtime', genre)))
+        ])
+        for genre in game['genres']
+    ]
+
+    return html.Div([
+        html.Div([
+            html.Div([
+                html.H3(f"{game['engagement_score']:.1f}", className="kpi-number"),
+                html.P("Engagement Score", className="kpi-label")
+            ], className="kpi-card"),
+            html.Div([
+                html.H3(f"{game['clv_proxy']:.1f}", className="kpi-number"),
+                html.P("CLV Proxy", className="kpi-label")
+            ], className="kpi-card"),
+            html.Div([
+                html.H3(f"{game['total_users']:,.0f}", className="kpi-number"),
+                html.P("Total Users", className="kpi-label")
+            ], className="kpi-card"),
+        ], className="kpi-container"),
+        dcc.Graph(figure=fig, className="chart-graph"),
+        html.Table([
+            html.Thead(html.Tr([html.Th("Genre"), html.Th("Games"), html.Th("Engagement Percentile"), html.Th("CLV Percentile"),
+                                html.Th("Genre Play Time (10th-90th)")])),
+            html.Tbody(genre_rows or [html.Tr(html.Td("No genre information", colSpan=5))])
+        ], className="percentile-table")
+    ])
+
+# Dataset version comparison - the live data against versions kept by the version store
+CURRENT_VERSION = 'current'
+
+def dataset_version(version_id):
+    """The live dataset, or a stored version by id"""
+    return current_dataset() if version_id == CURRENT_VERSION else version_store.open(version_id)
+
+@dashboard_callback(
+    [Output('version-base', 'options'), Output('version-base', 'value'),
+     Output('version-compare', 'options'), Output('version-compare', 'value')],
+    [Input('url', 'pathname')]
+)
+def update_version_options(pathname):
+    # Listed on every page load, as other workers may have stored versions since
+    live = current_dataset().fingerprint[:16]
+    options = [{'label': f"{manifest['label']} ({manifest['games']:,} games)", 'value': manifest['id']}
+               for manifest in version_store.versions() if manifest['id'] != live]
+    options.append({'label': f"Current data (version {current_dataset().version})", 'value': CURRENT_VERSION})
+    base = options[-2]['value'] if len(options) > 1 else CURRENT_VERSION
+    return options, base, options, CURRENT_VERSION
+
+@dashboard_callback(
+    [Output('version-comparison', 'figure'), Output('version-changes', 'children')],
+    [Input('version-base', 'value'), Input('version-compare', 'value')]
+)
+@versioned_cache
+def update_version_comparison(base_id, other_id):
+    if not version_store.enabled:
+        return go.Figure(), "Set VERSION_STORE_DIR to keep dataset versions for comparison."
+    if base_id is None or other_id is None:
+        return go.Figure(), "Pick two versions to compare."
+
+    try:
+        base, other = dataset_version(base_id), dataset_version(other_id)
+    except FileNotFoundError:
+        return go.Figure(), "That version is no longer in the version store."
+    changes = game_changes(base, other)
+    comparison = compare_versions(base, other)
+    change = comparison['change'].sort_values('engagement_score', na_position='first')
+    users_change = (change['total_users'] / comparison['before']['total_users'].reindex(change.index)).replace(np.inf, np.nan)
+
+    fig = make_subplots(
+        rows=1, cols=3, shared_yaxes=True,
+        subplot_titles=('Engagement Score Change', 'Total Users Change', 'Funnel Change (share of users)')
+    )
+    fig.add_trace(
+        go.Bar(y=change.index, x=change['engagement_score'], orientation='h', name='Engagement Score', showlegend=False,
+               marker_color=np.where(change['engagement_score'] >= 0, '#27ae60', '#E74C3C')),
+        row=1, col=1
+    )
+    fig.add_trace(
+        go.Bar(y=change.index, x=users_change, orientation='h', name='Total Users', showlegend=False,
+               marker_color='#45B7D1', customdata=change['total_users'],
+               hovertemplate='%{y}: %{x:+.1%} (%{customdata:+,.0f} users)<extra></extra>'),
+        row=1, col=2
+    )
+    for (share, label), color in zip([('owned_share', 'Owned'), ('completed_share', 'Completed'),
+                                      ('active_share', 'Active')], ['#4ECDC4', '#45B7D1', '#96CEB4']):
+        fig.add_trace(
+            go.Bar(y=change.index, x=change[share], orientation='h', name=label, marker_color=color),
+            row=1, col=3
+        )
+
+    fig.update_xaxes(tickformat='+.1%', row=1, col=2)
+    fig.update_xaxes(tickformat='+.1%', row=1, col=3)
+    fig.update_layout(height=max(450, 28 * len(change)), barmode='group', legend=dict(orientation='h', y=-0.08))
+
+    summary = (f"{changes['added']:,} games added, {changes['removed']:,} removed, {changes['updated']:,} updated "
+               f"and {changes['unchanged']:,} unchanged.")
+    return fig, summary
+
+# Initial page payload, checked against a byte budget when it is built
+LAYOUT_BYTE_BUDGET = int(os.environ.get('LAYOUT_BYTE_BUDGET', 64 * 1024))
+layout_stats = {}
+# The Flask app's logger, which is named after this module
+logger = logging.getLogger(__name__)
+
+@versioned_cache
+def marketing_layout_payload():
+    """Dashboard layout for the current dataset version, serialized once into plain JSON data"""
+    ds = current_dataset()
+    payload = pio.json.to_json_plotly(build_marketing_layout(ds))
+    size = len(payload.encode('utf-8'))
+    layout_stats.update(dataset_version=ds.version, bytes=size, budget=LAYOUT_BYTE_BUDGET)
+    if size > LAYOUT_BYTE_BUDGET:
+        logger.warning("Layout payload is %d bytes, over the %d byte budget", size, LAYOUT_BYTE_BUDGET)
+    return json.loads(payload)
+
 # Routing callback
-@app.callback(
+@dashboard_callback(
     Output('page-content', 'children'),
     [Input('url', 'pathname')]
 )
 def display_page(pathname):
     if pathname == '/marketing' or pathname == '/' or pathname is None:
-        return marketing_layout
+        return marketing_layout_payload()
     else:
         return html.Div([
             html.H1("404 - Page Not Found"),
@@ -1049,8 +1405,39 @@ def display_page(pathname):
             html.A("Go to Marketing Dashboard", href="/marketing")
         ])
 
-# Add custom CSS
-app.index_string = '''
+# Prerendered snapshot - the cached callbacks whose inputs are all listed here, for every combination
+def snapshot_inputs(ds):
+    """Input values a snapshot covers: every genre and metric, the landing path and the default weights"""
+    genres = ['All Games'] + sorted(ds.unique_genres)
+    return {
+        ('url', 'pathname'): ['/'],
+        ('score-weights', 'data'): [list(DEFAULT_SCORE_WEIGHTS)],
+        **{(dropdown, 'value'): genres for dropdown in GENRE_DROPDOWNS},
+        **{(f'{chart}-metric', 'value'): list(COMBINATION_METRIC_LABELS) for chart in COMBINATION_CHARTS},
+    }
+
+def callback_arguments(args):
+    """(component id, property) of a callback's inputs and then its states, in the order Dash passes them"""
+    dependencies = [dependency for arg in args for dependency in (arg if isinstance(arg, list) else [arg])]
+    return [(dependency.component_id, dependency.component_property)
+            for kind in (Input, State) for dependency in dependencies if isinstance(dependency, kind)]
+
+def callback_combinations(values):
+    """(callback, args) for every callback whose arguments all have values, over every combination"""
+    for func, args, kwargs in CALLBACKS:
+        arguments = callback_arguments(args)
+        if all(argument in values for argument in arguments):
+            for combination in itertools.product(*(values[argument] for argument in arguments)):
+                yield func, combination
+
+def snapshot_outputs(ds):
+    """(name, args, output) for every covered callback and input combination"""
+    for func, combination in callback_combinations(snapshot_inputs(ds)):
+        if hasattr(func, '__wrapped__'):
+            yield func.__name__, combination, func.__wrapped__(*combination)
+
+# Custom CSS
+INDEX_STRING = '''
 <!DOCTYPE html>
 <html>
     <head>
@@ -1125,6 +1512,32 @@ app.index_string = '''
             .genre-dropdown {
                 margin-bottom: 20px;
             }
+            .metric-toggle {
+                margin-bottom: 10px;
+                color: #2c3e50;
+            }
+            .metric-toggle label {
+                margin-right: 20px;
+            }
+            .chart-status {
+                color: #7f8c8d;
+                font-style: italic;
+            }
+            .version-pickers {
+                display: flex;
+                gap: 20px;
+            }
+            .version-pickers .genre-dropdown {
+                flex: 1;
+            }
+            .export-links {
+                margin-bottom: 20px;
+            }
+            .export-link {
+                margin-right: 20px;
+                color: #3498db;
+                font-weight: bold;
+            }
             .recommendations-section {
                 background: white;
                 padding: 30px;
@@ -1135,6 +1548,22 @@ app.index_string = '''
                 color: #2c3e50;
                 margin-bottom: 20px;
             }
+            .weight-container {
+                display: flex;
+                flex-wrap: wrap;
+                gap: 20px;
+            }
+            .weight-group {
+                flex: 1;
+                min-width: 250px;
+                background: #f8f9fa;
+                padding: 15px 20px;
+                border-radius: 8px;
+            }
+            .weight-label {
+                color: #7f8c8d;
+                font-size: 0.9em;
+            }
             .recommendation-card {
                 background: #f8f9fa;
                 padding: 20px;
@@ -1150,6 +1579,20 @@ app.index_string = '''
                 color: #34495e;
                 margin: 0;
             }
+            .percentile-table {
+                width: 100%;
+                border-collapse: collapse;
+            }
+            .percentile-table th {
+                background-color: #2c3e50;
+                color: white;
+                padding: 10px;
+            }
+            .percentile-table td {
+                padding: 8px;
+                text-align: center;
+                border-bottom: 1px solid #ecf0f1;
+            }
         </style>
     </head>
     <body>
@@ -1163,5 +1606,81 @@ app.index_string = '''
 </html>
 '''
 
+# Plotly Express reads the default template object itself, shared by every thread. Its child objects are
+# created on first access, so threads racing to create them can end up holding children the template dropped
+def warm_template(node, props):
+    """Create every child object the template holds, so figures only ever read it"""
+    for name, value in props.items():
+        child = node[name]
+        if isinstance(value, dict) and hasattr(child, 'to_plotly_json'):
+            warm_template(child, value)
+        elif isinstance(value, list) and value and isinstance(value[0], dict) and isinstance(child, tuple):
+            for element, element_props in zip(child, value):
+                warm_template(element, element_props)
+
+def create_app(config=None):
+    """Build the Dash app; the game data is loaded on first use unless PRELOAD_DATA is set"""
+    config = dict(DEFAULT_CONFIG, **(config or {}))
+    template = pio.templates[pio.templates.default]
+    warm_template(template, template.to_plotly_json())
+    profiling.configure(config['PROFILE'], config['PROFILE_DIR'])
+    version_store.configure(config['VERSION_STORE_DIR'])
+    data_layer.configure(config['GAME_DATA_PATH'], config['GAME_DATA_DELTA_PATH'],
+                         config['GAME_DATA_ROWS'], config['DATA_REFRESH_INTERVAL'],
+                         version_store if version_store.enabled else None)
+
+    background_callback_manager = DiskcacheManager(
+        diskcache.Cache(config['BACKGROUND_CACHE_DIR']),
+        # The content hash, not the version number: the store outlives the process and is shared by the workers,
+        # whose versions all start at 1
+        cache_by=[lambda: current_dataset().fingerprint],
+        expire=3600
+    )
+
+    flask_server = Flask(__name__)
+    flask_server.config.update({name: value for name, value in config.items() if name.startswith('COMPRESS_')})
+
+    # Initialize the Dash app
+    app = Dash(__name__, server=flask_server, compress=True, suppress_callback_exceptions=True,
+               background_callback_manager=background_callback_manager)
+    app.index_string = INDEX_STRING
+
+    # App layout for routing
+    app.layout = html.Div([
+        dcc.Location(id='url', refresh=False),
+        html.Div(id='page-content')
+    ])
+
+    snapshot_store.configure(config['SNAPSHOT_DIR'])
+    for func, args, kwargs in CALLBACKS:
+        if profiling.callbacks_enabled:
+            func = profiling.callback(func)
+        app.callback(*args, **kwargs)(func)
+    for args, kwargs in CLIENTSIDE_CALLBACKS:
+        app.clientside_callback(*args, **kwargs)
+
+    server = app.server
+    server.register_blueprint(export_blueprint)
+    server.register_blueprint(api_blueprint)
+    server.register_blueprint(static_blueprint)
+    server.add_url_rule('/healthz', 'healthz', healthz)
+    server.add_url_rule('/_stats/callbacks', 'callback_stats', callback_stats)
+
+    if config['PRELOAD_DATA']:
+        current_dataset()
+    return app
+
+def healthz():
+    return {'status': 'ok', 'dataset_loaded': data_layer.loaded,
+            'dataset_version': current_dataset().version if data_layer.loaded else None}
+
+def __getattr__(name):
+    # For deployment - `gunicorn datvis_marketing:server` builds the app and loads the data on first access
+    if name in ('app', 'server'):
+        app = create_app({'PRELOAD_DATA': True})
+        globals().update(app=app, server=app.server)
+        return globals()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 if __name__ == '__main__':
-    app.run(debug=True, port=8055, host='0.0.0.0') 
\ No newline at end of file
+    create_app({'PRELOAD_DATA': True}).run(debug=True, port=8055, host='0.0.0.0')
@@ -0,0 +1,10 @@
+import multiprocessing
+import os
+
+# One process per core, each serving requests from many threads over a single shared dataset
+worker_class = 'gthread'
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count()))
+threads = int(os.environ.get('GUNICORN_THREADS', 8))
+
+# Workers load and process the game data before they start serving
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
@@ -0,0 +1,444 @@
+import argparse
+import gzip
+import http.client
+import json
+import os
+import random
+import re
+import subprocess
+import sys
+import threading
+import time
+from collections import defaultdict
+from urllib.parse import urlencode, urlsplit
+
+import numpy as np
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Load testing - replays the callback traffic of real dashboard sessions against a gunicorn server
+LOADTEST_HOST = '127.0.0.1'
+LOADTEST_PORT = int(os.environ.get('LOADTEST_PORT', 8099))
+SERVER_START_TIMEOUT = 300
+PERCENTILES = [50, 95, 99]
+# Page load requests are reported under these names next to the callback outputs
+PAGE_REQUESTS = ['GET /', 'GET /_dash-layout', 'GET /_dash-dependencies']
+# Callbacks fired by a changed output are followed this many levels deep
+CHAIN_DEPTH = 3
+# Seconds the users wait for each other between phases before giving up on a stuck one
+BARRIER_TIMEOUT = 600
+# Ask for brotli like a browser would when the client can decode it
+ACCEPT_ENCODING = 'gzip, br' if brotli is not None else 'gzip'
+DASH_CONFIG = re.compile(r'<script id="_dash-config" type="application/json"[^>]*>(?P<config>.*?)</script>', re.S)
+
+# Local server
+def start_server(workers, threads, port=LOADTEST_PORT):
+    """Start gunicorn with the app's config and the given worker and thread counts"""
+    env = dict(os.environ, WEB_CONCURRENCY=str(workers), GUNICORN_THREADS=str(threads))
+    return subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', 'datvis_marketing:server', '--bind', f'{LOADTEST_HOST}:{port}'],
+        cwd=os.path.dirname(os.path.abspath(__file__)), env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+
+def stop_server(process):
+    process.terminate()
+    try:
+        process.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+def wait_until_ready(base_url, workers=1, process=None, timeout=SERVER_START_TIMEOUT):
+    """Block until /healthz answers with loaded data and every worker has booted"""
+    deadline = time.monotonic() + timeout
+    host = urlsplit(base_url).netloc
+    while time.monotonic() < deadline:
+        if process is not None and process.poll() is not None:
+            raise RuntimeError(f"Server exited with code {process.returncode}")
+        try:
+            connection = http.client.HTTPConnection(host, timeout=5)
+            connection.request('GET', '/healthz')
+            health = json.loads(connection.getresponse().read())
+            connection.close()
+            if health.get('dataset_loaded') and (process is None or len(worker_pids(process.pid)) >= workers):
+                return
+        except (OSError, ValueError, http.client.HTTPException):
+            pass
+        time.sleep(0.5)
+    raise RuntimeError(f"Server at {base_url} not ready after {timeout}s")
+
+# Worker memory - psutil when installed, /proc otherwise
+def worker_pids(master_pid):
+    try:
+        import psutil
+    except ImportError:
+        pids = []
+        for entry in os.listdir('/proc'):
+            if not entry.isdigit():
+                continue
+            try:
+                with open(f'/proc/{entry}/stat') as f:
+                    # The command name may contain spaces, the parent pid follows its closing parenthesis
+                    parent = int(f.read().rsplit(')', 1)[1].split()[1])
+            except (OSError, IndexError, ValueError):
+                continue
+            if parent == master_pid:
+                pids.append(int(entry))
+        return sorted(pids)
+    try:
+        return sorted(child.pid for child in psutil.Process(master_pid).children())
+    except psutil.NoSuchProcess:
+        return []
+
+def rss_bytes(pid):
+    try:
+        import psutil
+    except ImportError:
+        try:
+            with open(f'/proc/{pid}/status') as f:
+                for line in f:
+                    if line.startswith('VmRSS:'):
+                        return int(line.split()[1]) * 1024
+        except OSError:
+            pass
+        return None
+    try:
+        return psutil.Process(pid).memory_info().rss
+    except psutil.NoSuchProcess:
+        return None
+
+class MemorySampler:
+    """Peak resident memory of each worker, sampled in a background thread"""
+
+    def __init__(self, master_pid, interval=0.25):
+        self.master_pid = master_pid
+        self.interval = interval
+        self.peak = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='memory-sampler', daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+    def sample(self):
+        for pid in worker_pids(self.master_pid):
+            rss = rss_bytes(pid)
+            if rss is not None:
+                self.peak[pid] = max(self.peak.get(pid, 0), rss)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.sample()
+            self._stop.wait(self.interval)
+
+# Dash protocol
+def split_outputs(output):
+    """(id, property) pairs of a callback output string, multi-output or not"""
+    parts = output[2:-2].split('...') if output.startswith('..') else [output]
+    return [tuple(part.rsplit('.', 1)) for part in parts]
+
+def component_props(tree, props=None):
+    """Props of every component with an id in a layout tree"""
+    props = {} if props is None else props
+    if isinstance(tree, list):
+        for child in tree:
+            component_props(child, props)
+    elif isinstance(tree, dict) and 'props' in tree:
+        if 'id' in tree['props'] and isinstance(tree['props']['id'], str):
+            props[tree['props']['id']] = dict(tree['props'])
+        component_props(tree['props'].get('children'), props)
+    return props
+
+class Recorder:
+    """Latencies and errors per request name, shared by all virtual users"""
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.failed_sessions = []
+        self._lock = threading.Lock()
+
+    def record(self, name, seconds, ok):
+        with self._lock:
+            self.latencies[name].append(seconds)
+            if not ok:
+                self.errors[name] += 1
+
+    def fail(self, phase, error):
+        """Record a user whose session ended early"""
+        with self._lock:
+            self.failed_sessions.append(f'{phase}: {error}')
+
+    def count(self):
+        with self._lock:
+            return sum(len(values) for values in self.latencies.values())
+
+class DashSession:
+    """One browser tab: loads the page, then fires callbacks like the Dash renderer"""
+
+    def __init__(self, base_url, recorder):
+        self.host = urlsplit(base_url).netloc
+        self.recorder = recorder
+        self.connection = http.client.HTTPConnection(self.host, timeout=120)
+        self.props = {}
+        self.dependencies = []
+        self.end_id = None
+
+    def close(self):
+        self.connection.close()
+
+    def request(self, method, path, body=None):
+        headers = {'Accept-Encoding': ACCEPT_ENCODING}
+        if body is not None:
+            body = json.dumps(body)
+            headers['Content-Type'] = 'application/json'
+        for attempt in range(2):
+            try:
+                self.connection.request(method, path, body=body, headers=headers)
+                response = self.connection.getresponse()
+                return response.status, response.read(), response.getheader('Content-Encoding')
+            except (http.client.HTTPException, OSError):
+                # Keep-alive connection dropped by the server, retry once on a new one
+                self.connection.close()
+                self.connection = http.client.HTTPConnection(self.host, timeout=120)
+                if attempt:
+                    raise
+
+    def timed_get(self, path):
+        start = time.perf_counter()
+        status, data, encoding = self.request('GET', path)
+        self.recorder.record(f'GET {path}', time.perf_counter() - start, status == 200)
+        return decode(data, encoding) if status == 200 else None
+
+    def load_page(self):
+        """Fetch the page, layout and dependency graph, then fire the initial callbacks"""
+        page = self.timed_get('/')
+        match = DASH_CONFIG.search(page.decode()) if page else None
+        self.end_id = json.loads(match['config']).get('end_id') if match else None
+        self.props = component_props(json.loads(self.timed_get('/_dash-layout') or 'null'))
+        self.dependencies = [
+            dependency for dependency in json.loads(self.timed_get('/_dash-dependencies') or '[]')
+            if not dependency.get('clientside_function')
+        ]
+        # Callbacks on the layout's inputs render the dashboard, then the rendered components' callbacks fire
+        fired = []
+        while True:
+            ready = [dependency for dependency in self.dependencies
+                     if dependency not in fired and not dependency.get('prevent_initial_call')
+                     and all(i['id'] in self.props for i in dependency['inputs'])]
+            if not ready:
+                break
+            fired.extend(ready)
+            self.fire(set(), ready)
+
+    def genre_dropdowns(self):
+        """Dropdowns that take a genre, with the genres they offer"""
+        genres = [option['value'] for option in self.props.get('genre-options-store', {}).get('data') or []]
+        dropdowns = {i['id'] for dependency in self.dependencies for i in dependency['inputs']
+                     if i['id'].endswith('-dropdown') and i['property'] == 'value'}
+        return sorted(dropdowns), genres
+
+    def select(self, component, prop, value):
+        """Change an input the way a user would, firing everything that depends on it"""
+        self.props.setdefault(component, {})[prop] = value
+        self.fire({(component, prop)})
+
+    def fire(self, changed, dependencies=None, depth=0):
+        """Fire the callbacks on the changed props, then the ones on the props they update"""
+        if dependencies is None:
+            dependencies = [dependency for dependency in self.dependencies
+                            if any((i['id'], i['property']) in changed for i in dependency['inputs'])]
+        updated = set()
+        for dependency in dependencies:
+            updated |= self.post_callback(dependency, changed)
+        if updated and depth < CHAIN_DEPTH:
+            self.fire(updated, depth=depth + 1)
+
+    def post_callback(self, dependency, changed):
+        """POST one callback, polling background jobs until their result arrives"""
+        outputs = split_outputs(dependency['output'])
+        body = {
+            'output': dependency['output'],
+            'outputs': [{'id': c, 'property': p} for c, p in outputs] if len(outputs) > 1
+            else {'id': outputs[0][0], 'property': outputs[0][1]},
+            'inputs': [self.argument(i) for i in dependency['inputs']],
+            'state': [self.argument(s) for s in dependency['state']],
+            'changedPropIds': [f"{c}.{p}" for c, p in changed],
+        }
+        query = {'endId': self.end_id} if self.end_id else {}
+        name = dependency['output']
+
+        start = time.perf_counter()
+        status, data, encoding = self.request('POST', '/_dash-update-component?' + urlencode(query), body)
+        response = json.loads(decode(data, encoding)) if status == 200 else None
+        if response and 'job' in response:
+            interval = (dependency.get('background') or {}).get('interval', 1000) / 1000
+            query.update(cacheKey=response['cacheKey'], job=response['job'])
+            while status == 200 and 'response' not in response:
+                time.sleep(interval)
+                status, data, encoding = self.request('POST', '/_dash-update-component?' + urlencode(query), body)
+                response = json.loads(decode(data, encoding)) if status == 200 else None
+        self.recorder.record(name, time.perf_counter() - start, status in (200, 204))
+
+        updated = set()
+        for component, props in ((response or {}).get('response') or {}).items():
+            for prop, value in props.items():
+                self.props.setdefault(component, {})[prop] = value
+                updated.add((component, prop))
+                if prop == 'children':
+                    component_props(value, self.props)
+        return updated
+
+    def argument(self, dependency_input):
+        value = self.props.get(dependency_input['id'], {}).get(dependency_input['property'])
+        return {'id': dependency_input['id'], 'property': dependency_input['property'], 'value': value}
+
+def decode(data, encoding):
+    if encoding == 'gzip':
+        return gzip.decompress(data)
+    if encoding == 'br':
+        return brotli.decompress(data)
+    return data
+
+# Scenario - a page load storm, then every user browses genres in the dropdowns
+def virtual_user(base_url, recorder, barrier, browse_steps, seed):
+    session = DashSession(base_url, recorder)
+    phase = 'page load'
+    try:
+        barrier.wait()
+        try:
+            session.load_page()
+        finally:
+            # A failed page load still meets the other users, so their browsing goes ahead
+            barrier.wait()
+
+        phase = 'browse'
+        rng = random.Random(seed)
+        dropdowns, genres = session.genre_dropdowns()
+        for _ in range(browse_steps if dropdowns and genres else 0):
+            session.select(rng.choice(dropdowns), 'value', rng.choice(genres))
+    except threading.BrokenBarrierError:
+        recorder.fail(phase, 'another user did not finish its page load in time')
+    except Exception as e:
+        recorder.fail(phase, repr(e))
+    finally:
+        session.close()
+
+def run_load(base_url, users, browse_steps, seed=0):
+    """Run the scenario with concurrent users, returning per-request latencies and phase timings"""
+    recorder = Recorder()
+    # All users start the page load together, and browsing starts once every page has loaded
+    barrier = threading.Barrier(users + 1, timeout=BARRIER_TIMEOUT)
+    threads = [
+        threading.Thread(target=virtual_user, args=(base_url, recorder, barrier, browse_steps, seed + user), daemon=True)
+        for user in range(users)
+    ]
+    for thread in threads:
+        thread.start()
+
+    barrier.wait()
+    started = time.perf_counter()
+    try:
+        barrier.wait()
+    except threading.BrokenBarrierError:
+        # Users stuck in the page load are recorded as failed sessions
+        pass
+    storm = {'phase': 'page load', 'seconds': time.perf_counter() - started, 'requests': recorder.count()}
+    for thread in threads:
+        thread.join()
+    browse = {'phase': 'browse', 'seconds': time.perf_counter() - started - storm['seconds'],
+              'requests': recorder.count() - storm['requests']}
+    return recorder, [storm, browse]
+
+# Report
+def summarize(recorder, phases, memory, workers, threads, users):
+    rows = []
+    for name in sorted(recorder.latencies, key=lambda name: (name not in PAGE_REQUESTS, name)):
+        latencies = np.array(recorder.latencies[name]) * 1000
+        rows.append({
+            'request': name,
+            'count': len(latencies),
+            'errors': recorder.errors.get(name, 0),
+            **{f'p{q}_ms': round(float(value), 1) for q, value in zip(PERCENTILES, np.percentile(latencies, PERCENTILES))},
+        })
+    return {
+        'workers': workers,
+        'threads': threads,
+        'users': users,
+        'requests': rows,
+        'failed_sessions': recorder.failed_sessions,
+        'phases': [dict(phase, requests_per_second=round(phase['requests'] / phase['seconds'], 1) if phase['seconds'] else None)
+                   for phase in phases],
+        'worker_rss_mb': {str(pid): round(rss / 2 ** 20, 1) for pid, rss in sorted(memory.items())},
+    }
+
+def print_report(result):
+    print(f"\n{result['workers']} workers x {result['threads']} threads, {result['users']} users")
+    print(f"{'request':<60} {'count':>6} {'errors':>6} " + ' '.join(f"{f'p{q} ms':>9}" for q in PERCENTILES))
+    for row in result['requests']:
+        name = row['request'] if len(row['request']) <= 60 else row['request'][:57] + '...'
+        print(f"{name:<60} {row['count']:>6} {row['errors']:>6} " +
+              ' '.join(f"{row[f'p{q}_ms']:>9.1f}" for q in PERCENTILES))
+    for phase in result['phases']:
+        print(f"{phase['phase']}: {phase['requests']} requests in {phase['seconds']:.2f}s "
+              f"({phase['requests_per_second']} req/s)")
+    if result['failed_sessions']:
+        print(f"{len(result['failed_sessions'])} of {result['users']} users failed:")
+        for failure in result['failed_sessions']:
+            print(f"  {failure}")
+    if result['worker_rss_mb']:
+        rss = result['worker_rss_mb']
+        print(f"peak RSS per worker: {', '.join(f'{mb:.0f} MB' for mb in rss.values())} "
+              f"(total {sum(rss.values()):.0f} MB)")
+
+def counts(value):
+    return [int(count) for count in value.split(',')]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay dashboard callback traffic and report latency, "
+                                                 "throughput and worker memory")
+    parser.add_argument('--url', help="Target an already running server instead of starting one")
+    parser.add_argument('--workers', type=counts, default=[1],
+                        help="Worker counts to measure, comma separated for a scaling curve (default 1)")
+    parser.add_argument('--threads', type=counts, default=[8], help="Threads per worker, comma separated (default 8)")
+    parser.add_argument('--users', type=int, default=20, help="Concurrent virtual users (default 20)")
+    parser.add_argument('--browse', type=int, default=10, help="Dropdown changes per user after the page load (default 10)")
+    parser.add_argument('--port', type=int, default=LOADTEST_PORT)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', help="Also write the results to this file, e.g. to compare runs")
+    args = parser.parse_args(argv)
+
+    results = []
+    if args.url:
+        recorder, phases = run_load(args.url, args.users, args.browse, args.seed)
+        results.append(summarize(recorder, phases, {}, None, None, args.users))
+        print_report(results[-1])
+    else:
+        base_url = f'http://{LOADTEST_HOST}:{args.port}'
+        for workers in args.workers:
+            for threads in args.threads:
+                process = start_server(workers, threads, args.port)
+                try:
+                    wait_until_ready(base_url, workers, process)
+                    with MemorySampler(process.pid) as memory:
+                        recorder, phases = run_load(base_url, args.users, args.browse, args.seed)
+                    results.append(summarize(recorder, phases, memory.peak, workers, threads, args.users))
+                finally:
+                    stop_server(process)
+                print_report(results[-1])
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+import gzip
+import hashlib
+import json
+import os
+import threading
+
+from flask import Blueprint, Response, request
+
+from marketing_data import current_dataset
+from marketing_export import EXPORT_COLUMNS
+
+# Bodies smaller than this are sent as is, compression would not pay off
+API_GZIP_MIN_BYTES = 1024
+API_GZIP_LEVEL = int(os.environ.get('API_GZIP_LEVEL', 6))
+FUNNEL_STAGES = ['awareness', 'ownership', 'completion', 'active_use']
+
+api_blueprint = Blueprint('api', __name__, url_prefix='/api')
+
+# Serialized payloads for the current dataset version, dropped when it changes
+_payloads = {'version': None, 'entries': {}}
+_payload_lock = threading.Lock()
+
+def records(frame):
+    """DataFrame rows as JSON-ready dicts, missing values as null"""
+    return json.loads(frame.to_json(orient='records'))
+
+def cached_payload(ds, key, build):
+    """JSON body, gzipped body and ETag for a payload, built once per dataset version"""
+    with _payload_lock:
+        if _payloads['version'] != ds.version:
+            _payloads['version'] = ds.version
+            _payloads['entries'] = {}
+        entry = _payloads['entries'].get(key)
+    if entry is not None:
+        return entry
+
+    body = json.dumps({'dataset_version': ds.version, 'data': build(ds)}, separators=(',', ':')).encode()
+    compressed = gzip.compress(body, API_GZIP_LEVEL) if len(body) >= API_GZIP_MIN_BYTES else None
+    entry = (f'v{ds.version}-{hashlib.sha1(body).hexdigest()[:16]}', body, compressed)
+    with _payload_lock:
+        if _payloads['version'] == ds.version:
+            _payloads['entries'][key] = entry
+    return entry
+
+def json_response(ds, key, build):
+    """Serve a cached payload with a strong ETag, 304 on a match and gzip when accepted"""
+    etag, body, compressed = cached_payload(ds, key, build)
+    use_gzip = compressed is not None and request.accept_encodings['gzip'] > 0
+    if use_gzip:
+        # Each encoding is its own representation and needs its own strong ETag
+        etag, body = f'{etag}-gzip', compressed
+
+    if request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+    else:
+        response = Response(body, mimetype='application/json')
+        if use_gzip:
+            response.headers['Content-Encoding'] = 'gzip'
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['Vary'] = 'Accept-Encoding'
+    return response
+
+def genre_argument(ds):
+    """Genre from the query string, None when the dataset does not have it"""
+    genre = request.args.get('genre', 'All Games')
+    return genre if genre == 'All Games' or genre in ds.unique_genres else None
+
+@api_blueprint.route('/genres')
+def genre_performance():
+    """Marketing performance by genre"""
+    ds = current_dataset()
+    return json_response(ds, ('genres',), lambda ds: records(ds.genre_performance))
+
+@api_blueprint.route('/funnel')
+def funnel():
+    """Lifecycle funnel user counts for every genre"""
+    def build(ds):
+        return {
+            genre: dict(zip(FUNNEL_STAGES, charts['funnel']['values']), games=charts['funnel']['games'])
+            for genre, charts in ds.chart_aggregates.items()
+        }
+
+    ds = current_dataset()
+    return json_response(ds, ('funnel',), build)
+
+@api_blueprint.route('/cohorts')
+def cohorts():
+    """Average lifecycle rates by release year"""
+    ds = current_dataset()
+    return json_response(ds, ('cohorts',), lambda ds: records(ds.cohort_df))
+
+@api_blueprint.route('/targets')
+def marketing_targets():
+    """Top marketing targets for a genre, ranked by marketing score"""
+    ds = current_dataset()
+    genre = genre_argument(ds)
+    if genre is None:
+        return {'error': f"Unknown genre '{request.args['genre']}'"}, 404
+
+    def build(ds):
+        top = ds.rankings['marketing_targets'].get(genre)
+        return [] if top is None else records(top[[ds.key] + EXPORT_COLUMNS])
+
+    return json_response(ds, ('targets', genre), build)
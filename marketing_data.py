@@ -0,0 +1,1350 @@
+import hashlib
+import os
+import re
+import threading
+import time
+from functools import cached_property, lru_cache, reduce
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from marketing_profiling import profiling
+
+# Data files - the delta file holds appended or corrected rows
+GAME_DATA_PATH = os.environ.get('GAME_DATA_PATH', 'game_info.csv')
+GAME_DATA_DELTA_PATH = os.environ.get('GAME_DATA_DELTA_PATH', 'game_info_delta.csv')
+DATA_REFRESH_INTERVAL = float(os.environ.get('DATA_REFRESH_INTERVAL', '60'))
+# Optional cap on the number of game rows read, e.g. for tests or quick local runs
+GAME_DATA_ROWS = int(os.environ['GAME_DATA_ROWS']) if os.environ.get('GAME_DATA_ROWS') else None
+COUNTRIES_PATH = os.environ.get('COUNTRIES_PATH', 'countries_table.csv')
+
+TEXT_COLUMNS = ['name', 'slug', 'website', 'platforms', 'developers', 'genres', 'publishers', 'esrb_rating']
+
+# Games with this many community members count as commercial in the funnel
+COMMERCIAL_MIN_USERS = 100
+
+# Browser-side genre charts
+ENGAGEMENT_HISTOGRAM_BINS = 20
+PLATFORM_CHART_SIZE = 10
+
+# Ranking sizes used by the tables and the top games chart
+RANKING_SIZES = {
+    'top_games': 20,
+    'marketing_targets': 25,
+    'top_reviewed': 50,
+}
+
+# Score weights - engagement score, marketing appeal (combined_score) and marketing priority (marketing_score)
+SCORE_WEIGHTS = {
+    'engagement_score': {'ownership_rate': 0.3, 'engagement_rate': 0.4, 'completion_rate': 0.3},
+    'combined_score': {'metacritic': 0.4, 'rating': 0.3, 'engagement_score': 0.3},
+    'marketing_score': {'engagement_score': 0.3, 'metacritic': 0.25, 'rating': 0.25, 'completion_rate': 0.2},
+}
+SCORE_WEIGHT_KEYS = [(score, component) for score, parts in SCORE_WEIGHTS.items() for component in parts]
+DEFAULT_SCORE_WEIGHTS = tuple(SCORE_WEIGHTS[score][component] for score, component in SCORE_WEIGHT_KEYS)
+
+# Clean data to prevent JSON serialization issues
+def clean_text(text):
+    if pd.isna(text) or not isinstance(text, str):
+        return text
+    # Remove control characters that cause JSON issues
+    return re.sub(r'[\x00-\x1f\x7f-\x9f]', '', text)
+
+def read_games(path, nrows=None):
+    """Read a raw game export, keeping the last row for each game"""
+    raw = pd.read_csv(path, nrows=nrows)
+    key = game_key(raw)
+    return raw.drop_duplicates(subset=key, keep='last').reset_index(drop=True)
+
+def game_key(df):
+    """Column that identifies a game across exports"""
+    return 'id' if 'id' in df.columns else 'slug'
+
+def prepare_games(raw):
+    """Clean text columns and parse release dates and genres"""
+    df = raw.copy()
+
+    # Clean text columns that might have control characters
+    for col in TEXT_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].apply(clean_text)
+
+    df['released'] = pd.to_datetime(df['released'], errors='coerce')
+    df['year'] = df['released'].dt.year
+    df['genres'] = df['genres'].apply(lambda x: x.split('||') if pd.notna(x) and isinstance(x, str) else [])
+    return df
+
+# Create Marketing KPIs
+def calculate_marketing_metrics(df):
+    """Calculate key marketing metrics for each game"""
+    marketing_df = df.copy()
+
+    # Customer Lifecycle Metrics
+    marketing_df['total_users'] = (marketing_df['added_status_yet'].fillna(0) +
+                                  marketing_df['added_status_owned'].fillna(0) +
+                                  marketing_df['added_status_beaten'].fillna(0) +
+                                  marketing_df['added_status_toplay'].fillna(0) +
+                                  marketing_df['added_status_dropped'].fillna(0) +
+                                  marketing_df['added_status_playing'].fillna(0))
+
+    # Conversion Funnel Metrics
+    marketing_df['awareness_rate'] = marketing_df['total_users'] / marketing_df['total_users'].max()
+    marketing_df['ownership_rate'] = marketing_df['added_status_owned'].fillna(0) / marketing_df['total_users'].replace(0, 1)
+    marketing_df['engagement_rate'] = marketing_df['added_status_playing'].fillna(0) / marketing_df['added_status_owned'].fillna(1).replace(0, 1)
+    marketing_df['completion_rate'] = marketing_df['added_status_beaten'].fillna(0) / marketing_df['added_status_owned'].fillna(1).replace(0, 1)
+    marketing_df['churn_rate'] = marketing_df['added_status_dropped'].fillna(0) / marketing_df['added_status_owned'].fillna(1).replace(0, 1)
+
+    # Engagement Score (0-100)
+    weights = SCORE_WEIGHTS['engagement_score']
+    marketing_df['engagement_score'] = (
+        (marketing_df['ownership_rate'] * weights['ownership_rate']) +
+        (marketing_df['engagement_rate'] * weights['engagement_rate']) +
+        (marketing_df['completion_rate'] * weights['completion_rate'])
+    ) * 100
+
+    # Customer Lifetime Value Proxy
+    marketing_df['clv_proxy'] = (marketing_df['playtime'].fillna(0) *
+                                marketing_df['rating'].fillna(0) *
+                                marketing_df['completion_rate'])
+
+    return marketing_df
+
+def add_ranking_scores(df):
+    """Add the scores used to rank marketing targets"""
+    df = df.copy()
+
+    # Marketing appeal: metacritic + user rating + engagement
+    weights = SCORE_WEIGHTS['combined_score']
+    df['combined_score'] = (
+        (df['metacritic'] / 100 * weights['metacritic']) +
+        (df['rating'] / 5 * weights['rating']) +
+        (df['engagement_score'] / 100 * weights['engagement_score'])
+    ) * 100
+
+    # Marketing priority score
+    weights = SCORE_WEIGHTS['marketing_score']
+    df['marketing_score'] = (
+        (df['engagement_score'] / 100 * weights['engagement_score']) +
+        (df['metacritic'].fillna(0) / 100 * weights['metacritic']) +
+        (df['rating'].fillna(0) / 5 * weights['rating']) +
+        (df['completion_rate'].fillna(0) * weights['completion_rate'])
+    ) * 100
+    return df
+
+# Fix the funnel logic - Keep realistic interpretation
+def recalculate_funnel_metrics(df):
+    """Recalculate funnel with realistic business logic"""
+    df = df.copy()
+
+    # Total users (awareness/reach)
+    df['total_users'] = (df['added_status_yet'].fillna(0) +
+                        df['added_status_owned'].fillna(0) +
+                        df['added_status_beaten'].fillna(0) +
+                        df['added_status_toplay'].fillna(0) +
+                        df['added_status_dropped'].fillna(0) +
+                        df['added_status_playing'].fillna(0))
+
+    # Ownership (purchased/acquired)
+    df['owned_users'] = df['added_status_owned'].fillna(0)
+
+    # Active Use = Currently playing (snapshot)
+    df['active_users'] = df['added_status_playing'].fillna(0)
+
+    # Completion = Total ever completed (cumulative)
+    df['completed_users'] = df['added_status_beaten'].fillna(0)
+
+    return df
+
+# Additive aggregates - sums and counts can be updated by subtracting old rows
+GENRE_MEAN_COLUMNS = ['engagement_score', 'ownership_rate', 'engagement_rate', 'completion_rate', 'churn_rate',
+                      'clv_proxy', 'metacritic']
+GENRE_SUM_COLUMNS = ['total_users']
+FUNNEL_COLUMNS = ['total_users', 'owned_users', 'active_users', 'completed_users']
+COHORT_COLUMNS = ['ownership_rate', 'engagement_rate', 'completion_rate', 'churn_rate']
+PLATFORM_COLUMNS = ['total_users', 'ownership_rate', 'engagement_rate', 'completion_rate', 'engagement_score']
+
+def group_sums(df, keys, columns):
+    """Per-group row count, sums and non-null counts"""
+    grouped = df.groupby(keys)
+    table = pd.concat({
+        'sum': grouped[columns].sum(),
+        'count': grouped[columns].count(),
+    }, axis=1)
+    table[('size', 'rows')] = grouped.size()
+    return table
+
+def apply_group_delta(table, removed, added):
+    """Subtract removed contributions, add new ones and drop empty groups"""
+    table = table.sub(removed, fill_value=0).add(added, fill_value=0)
+    return table[table[('size', 'rows')] > 0]
+
+def group_means(table, columns):
+    """Means (skipping missing values) from a group_sums table"""
+    counts = table['count'][columns].replace(0, np.nan)
+    return table['sum'][columns] / counts
+
+def aggregate_contributions(marketing_rows):
+    """Additive genre, funnel, cohort and platform tables for a set of games"""
+    exploded = marketing_rows.explode('genres')
+    in_genre = exploded[exploded['genres'].notna()]
+
+    # Funnel: commercial games, per genre and over all games
+    commercial = recalculate_funnel_metrics(marketing_rows[marketing_rows['total_users'] >= COMMERCIAL_MIN_USERS])
+    commercial_exploded = commercial.explode('genres')
+    funnel = pd.concat([
+        group_sums(commercial.assign(genres='All Games'), 'genres', FUNNEL_COLUMNS),
+        group_sums(commercial_exploded[commercial_exploded['genres'].notna()], 'genres', FUNNEL_COLUMNS),
+    ])
+
+    # Cohorts: release years in focus
+    cohort_rows = marketing_rows[(marketing_rows['year'] >= 2000) & (marketing_rows['year'] <= 2020)]
+
+    # Platforms: one row per game and platform
+    clean = marketing_rows[marketing_rows['total_users'] > 0]
+    by_platform = clean.assign(platform=clean['platforms'].astype(object).str.split('||', regex=False)).explode('platform')
+    by_platform = by_platform[by_platform['platform'].notna()]
+    by_platform = by_platform.assign(platform=by_platform['platform'].str.strip())
+    by_platform = by_platform[by_platform['platform'] != '']
+    platform_genres = by_platform.explode('genres')
+    platform = pd.concat([
+        group_sums(by_platform.assign(genres='All Games'), ['genres', 'platform'], PLATFORM_COLUMNS),
+        group_sums(platform_genres[platform_genres['genres'].notna()], ['genres', 'platform'], PLATFORM_COLUMNS),
+    ])
+
+    return {
+        'genre': group_sums(in_genre, 'genres', GENRE_MEAN_COLUMNS + GENRE_SUM_COLUMNS),
+        'funnel': funnel,
+        'cohort': group_sums(cohort_rows, 'year', COHORT_COLUMNS),
+        'platform': platform,
+    }
+
+# Cohort Analysis by Release Year
+def create_cohort_data(cohort_sums):
+    """Create cohort analysis data"""
+    means = group_means(cohort_sums, COHORT_COLUMNS).sort_index()
+    cohort_df = pd.DataFrame({
+        'year': means.index.astype(float),
+        'avg_ownership_rate': means['ownership_rate'].values,
+        'avg_engagement_rate': means['engagement_rate'].values,
+        'avg_completion_rate': means['completion_rate'].values,
+        'avg_churn_rate': means['churn_rate'].values,
+        'games_released': cohort_sums.loc[means.index, ('size', 'rows')].astype(int).values
+    })
+    return cohort_df
+
+# Genre Performance Analysis
+def analyze_genre_performance(genre_sums):
+    """Analyze marketing performance by genre"""
+    genre_perf = group_means(genre_sums, GENRE_MEAN_COLUMNS)
+    genre_perf['total_users'] = genre_sums['sum']['total_users']
+    genre_perf = genre_perf[['engagement_score', 'ownership_rate', 'completion_rate', 'churn_rate',
+                             'clv_proxy', 'total_users', 'metacritic']].round(3)
+    genre_perf.index.name = 'genres'
+
+    genre_perf = genre_perf.sort_values('engagement_score', ascending=False)
+    return genre_perf.reset_index()
+
+# Success Factors Correlation - streaming sufficient statistics
+SUCCESS_FACTOR_COLUMNS = ['metacritic', 'rating', 'total_users', 'engagement_score',
+                          'completion_rate', 'ownership_rate', 'playtime']
+SUCCESS_FACTOR_LABELS = ['Metacritic', 'User Rating', 'Total Users', 'Engagement Score',
+                         'Completion Rate', 'Ownership Rate', 'Playtime']
+
+class CorrelationStats:
+    """Mergeable sufficient statistics (count, means, co-moments) for a correlation matrix"""
+
+    def __init__(self, n_columns):
+        self.count = 0
+        self.mean = np.zeros(n_columns)
+        self.comoment = np.zeros((n_columns, n_columns))
+
+    def update(self, values):
+        """Fold a block of complete rows into the statistics"""
+        values = np.asarray(values, dtype=float)
+        if len(values) == 0:
+            return self
+        block_mean = values.mean(axis=0)
+        centered = values - block_mean
+        self._combine(len(values), block_mean, centered.T @ centered)
+        return self
+
+    def merge(self, other):
+        """Return new statistics covering the rows of both operands"""
+        merged = CorrelationStats(len(self.mean))
+        merged._combine(self.count, self.mean, self.comoment)
+        merged._combine(other.count, other.mean, other.comoment)
+        return merged
+
+    def subtract(self, other):
+        """Return new statistics with the rows of `other` removed"""
+        remaining = CorrelationStats(len(self.mean))
+        count = self.count - other.count
+        if count <= 0:
+            return remaining
+        mean = (self.mean * self.count - other.mean * other.count) / count
+        delta = other.mean - mean
+        remaining.count = count
+        remaining.mean = mean
+        remaining.comoment = self.comoment - other.comoment - np.outer(delta, delta) * (count * other.count / self.count)
+        return remaining
+
+    def _combine(self, count, mean, comoment):
+        # Pairwise update (Chan et al.) keeps the co-moments numerically stable
+        if count == 0:
+            return
+        total = self.count + count
+        delta = mean - self.mean
+        self.comoment = self.comoment + comoment + np.outer(delta, delta) * (self.count * count / total)
+        self.mean = self.mean + delta * (count / total)
+        self.count = total
+
+    def correlation(self):
+        """Pearson correlation matrix assembled from the co-moments"""
+        std = np.sqrt(np.diag(self.comoment))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return self.comoment / np.outer(std, std)
+
+def build_success_factor_stats(df):
+    """Build correlation statistics for 'All Games' and for each genre"""
+    complete = df[SUCCESS_FACTOR_COLUMNS + ['genres']].dropna(subset=SUCCESS_FACTOR_COLUMNS)
+
+    stats = {}
+    all_games = CorrelationStats(len(SUCCESS_FACTOR_COLUMNS))
+    for genre, block in complete.groupby('genres', dropna=False, sort=False):
+        genre_stats = CorrelationStats(len(SUCCESS_FACTOR_COLUMNS)).update(block[SUCCESS_FACTOR_COLUMNS].to_numpy())
+        # Games without a genre only contribute to the overall view
+        if pd.notna(genre):
+            stats[genre] = genre_stats
+        all_games = all_games.merge(genre_stats)
+
+    stats['All Games'] = all_games
+    return stats
+
+def update_success_factor_stats(stats, removed_exploded, added_exploded):
+    """Apply removed and added rows to per-genre correlation statistics"""
+    stats = dict(stats)
+    removed = build_success_factor_stats(removed_exploded)
+    added = build_success_factor_stats(added_exploded)
+    empty = CorrelationStats(len(SUCCESS_FACTOR_COLUMNS))
+    for genre in set(removed) | set(added):
+        updated = stats.get(genre, empty).subtract(removed.get(genre, empty)).merge(added.get(genre, empty))
+        if updated.count > 0:
+            stats[genre] = updated
+        else:
+            stats.pop(genre, None)
+    return stats
+
+# Rankings - top games per genre for the tables and the top games chart
+def ranking_candidates(name, exploded):
+    """Rows eligible for a ranking, with the score column to rank by"""
+    if name == 'top_games':
+        return exploded[exploded['metacritic'].notna()], 'combined_score'
+    if name == 'marketing_targets':
+        return exploded, 'marketing_score'
+    clean = exploded[(exploded['total_users'] > 0) & exploded['metacritic'].notna()]
+    return clean, 'metacritic'
+
+def rank_rows(candidates, score, key):
+    """Candidates best score first, ties by game key and then genre, so the order does not depend on row order"""
+    return candidates.sort_values([score, key, 'genres'], ascending=[False, True, True], kind='stable')
+
+def build_rankings(exploded, key):
+    """Top games per genre and over all games for every ranking"""
+    # In game key and genre order once, so each stable score sort breaks ties the way rank_rows does
+    exploded = exploded.sort_values([key, 'genres'], kind='stable')
+    rankings = {}
+    for name, size in RANKING_SIZES.items():
+        candidates, score = ranking_candidates(name, exploded)
+        ranked = candidates.sort_values(score, ascending=False, kind='stable')
+        per_genre = ranked[ranked['genres'].notna()].groupby('genres', sort=False).head(size)
+        rankings[name] = {genre: rows for genre, rows in per_genre.groupby('genres', sort=False)}
+        rankings[name]['All Games'] = ranked.head(size)
+    return rankings
+
+def update_rankings(rankings, exploded, key, touched_keys, added_exploded):
+    """Merge changed games into the rankings, rescanning a genre only when needed"""
+    updated = {}
+    touched_genres = set(added_exploded['genres'].dropna()) | {'All Games'}
+    for name, size in RANKING_SIZES.items():
+        updated[name] = dict(rankings[name])
+        new_candidates, score = ranking_candidates(name, added_exploded)
+        for genre, top in rankings[name].items():
+            if top[key].isin(touched_keys).any():
+                touched_genres.add(genre)
+        for genre in touched_genres:
+            top = updated[name].get(genre)
+            genre_new = new_candidates if genre == 'All Games' else new_candidates[new_candidates['genres'] == genre]
+            if top is not None and not top[key].isin(touched_keys).any():
+                # Unchanged leaders still bound the top of the untouched games
+                merged = rank_rows(pd.concat([top, genre_new]), score, key).head(size)
+            else:
+                candidates, _ = ranking_candidates(name, exploded)
+                if genre != 'All Games':
+                    candidates = candidates[candidates['genres'] == genre]
+                merged = rank_rows(candidates, score, key).head(size)
+            if len(merged):
+                updated[name][genre] = merged
+            else:
+                updated[name].pop(genre, None)
+    return updated
+
+# Shared indexes are read by many request threads at once, so their arrays are frozen
+def read_only(array):
+    """Mark an array non-writeable and return it"""
+    array.flags.writeable = False
+    return array
+
+# Game search - sorted normalized titles, looked up by binary search
+def normalize_title(text):
+    """Lowercase a title or slug and collapse punctuation to single spaces"""
+    if not isinstance(text, str):
+        return ''
+    return re.sub(r'[^0-9a-z]+', ' ', text.casefold()).strip()
+
+class GameSearchIndex:
+    """Prefix index over game names and slugs"""
+
+    def __init__(self, df_marketing, key):
+        names = [normalize_title(name) for name in df_marketing['name']]
+        slugs = [normalize_title(slug) for slug in df_marketing['slug']]
+        terms = np.array(names + slugs, dtype=object)
+        positions = np.concatenate([np.arange(len(names)), np.arange(len(slugs))])
+
+        order = np.argsort(terms, kind='stable')
+        self.terms = read_only(terms[order])
+        self.positions = read_only(positions[order])
+        self.keys = pd.Index(df_marketing[key])
+        self.popularity = read_only(df_marketing['total_users'].to_numpy())
+
+    def search(self, query, limit=10):
+        """Row positions of the most popular games whose name or slug starts with `query`"""
+        prefix = normalize_title(query)
+        if not prefix:
+            return np.array([], dtype=int)
+        start = np.searchsorted(self.terms, prefix, side='left')
+        end = np.searchsorted(self.terms, prefix + '\uffff', side='left')
+        matches = self.positions[start:end]
+        if len(matches) > 2 * limit:
+            # Each game appears at most twice (name and slug), so 2 * limit candidates are enough, with every
+            # one tied with the last so ties still go by row order
+            popularity = self.popularity[matches]
+            matches = matches[popularity >= np.partition(popularity, len(matches) - 2 * limit)[len(matches) - 2 * limit]]
+        matches = np.unique(matches)
+        return matches[np.argsort(-self.popularity[matches], kind='stable')][:limit]
+
+    def position(self, game):
+        """Row position of a game key, or None"""
+        try:
+            return self.keys.get_loc(game)
+        except KeyError:
+            return None
+
+class GenrePercentiles:
+    """Per-genre sorted score arrays for percentile ranks"""
+
+    def __init__(self, df_exploded, columns):
+        self.scores = {}
+        for genre, rows in df_exploded[df_exploded['genres'].notna()].groupby('genres', sort=False):
+            self.scores[genre] = {col: read_only(np.sort(rows[col].dropna().to_numpy())) for col in columns}
+
+    def percentile(self, genre, column, value):
+        """Share of the genre's games scoring at or below `value` (0-100)"""
+        scores = self.scores.get(genre, {}).get(column)
+        if scores is None or len(scores) == 0 or pd.isna(value):
+            return np.nan
+        return np.searchsorted(scores, value, side='right') / len(scores) * 100
+
+    def size(self, genre):
+        genre_scores = self.scores.get(genre)
+        return len(next(iter(genre_scores.values()))) if genre_scores else 0
+
+# Quantile sketches - exact sorted values for small groups, a merging t-digest once they outgrow that
+QUANTILE_EXACT_LIMIT = 2048
+QUANTILE_COMPRESSION = 200
+PERCENTILE_BANDS = [0.1, 0.5, 0.9]
+# The review matrix only plots games with more reviews than this
+REVIEW_MATRIX_MIN_REVIEWS = 10
+
+def compress_centroids(means, weights, compression=QUANTILE_COMPRESSION):
+    """Merge sorted centroids so each spans at most one unit of the t-digest k1 scale"""
+    cumulative = np.cumsum(weights)
+    q = (cumulative - weights / 2) / cumulative[-1]
+    # k1 keeps centroids small in the tails, where the percentile bands need the resolution
+    k = np.floor(compression / (2 * np.pi) * np.arcsin(2 * q - 1))
+    starts = np.flatnonzero(np.diff(k, prepend=np.nan))
+    merged_weights = np.add.reduceat(weights, starts)
+    return np.add.reduceat(means * weights, starts) / merged_weights, merged_weights
+
+class QuantileSketch:
+    """Mergeable quantile summary: sorted centroid means with their weights"""
+
+    def __init__(self, means, weights, minimum=np.nan, maximum=np.nan):
+        self.means = read_only(means)
+        self.weights = read_only(weights)
+        self.count = float(weights.sum())
+        self.minimum = minimum
+        self.maximum = maximum
+        # Every centroid is one value until the sketch is first compressed
+        self.exact = self.count == len(weights)
+
+    @classmethod
+    def from_values(cls, values):
+        values = np.sort(np.asarray(values, dtype=np.float64))
+        values = values[~np.isnan(values)]
+        return cls.from_centroids(values, np.ones(len(values)))
+
+    @classmethod
+    def from_centroids(cls, means, weights, minimum=None, maximum=None):
+        """Sketch over centroids sorted by mean, compressed when past the exact limit"""
+        if len(means) == 0:
+            return cls(means, weights)
+        minimum = means[0] if minimum is None else minimum
+        maximum = means[-1] if maximum is None else maximum
+        if len(means) > QUANTILE_EXACT_LIMIT:
+            means, weights = compress_centroids(means, weights)
+        return cls(means, weights, minimum, maximum)
+
+    def merge(self, other):
+        """Sketch of both inputs' values together"""
+        means = np.concatenate([self.means, other.means])
+        weights = np.concatenate([self.weights, other.weights])
+        order = np.argsort(means, kind='stable')
+        return QuantileSketch.from_centroids(means[order], weights[order], np.fmin(self.minimum, other.minimum),
+                                             np.fmax(self.maximum, other.maximum))
+
+    def quantile(self, q):
+        """Values at quantiles `q` (0-1); exact, as pandas computes them, while the sketch is exact"""
+        q = np.asarray(q, dtype=np.float64)
+        if self.count == 0:
+            return np.full(q.shape, np.nan)
+        if self.exact:
+            return np.quantile(self.means, q)
+        # Centroids sit at the middle of their cumulative weight, the extremes at either end
+        positions = np.concatenate([[0], np.cumsum(self.weights) - self.weights / 2, [self.count]])
+        values = np.concatenate([[self.minimum], self.means, [self.maximum]])
+        return np.interp(q * self.count, positions, values)
+
+EMPTY_SKETCH = QuantileSketch(np.array([]), np.array([]))
+
+def sorted_quantiles(values, q):
+    """Values at quantiles `q` of sorted values, interpolated like np.quantile"""
+    positions = np.asarray(q, dtype=np.float64) * (len(values) - 1)
+    below = np.floor(positions).astype(np.intp)
+    above = np.minimum(below + 1, len(values) - 1)
+    return values[below] + (positions - below) * (values[above] - values[below])
+
+def sorted_histogram(values, bins):
+    """np.histogram of sorted values, from bin edge lookups instead of a pass over the values"""
+    edges = np.histogram_bin_edges(values, bins)
+    return np.diff(np.searchsorted(values, edges[:-1]), append=len(values)), edges
+
+class GenreQuantiles:
+    """Per-genre quantile sketches of some columns, merged when a filter spans several genres"""
+
+    def __init__(self, df_exploded, columns, df_all=None):
+        self.sketches = {}
+        for genre, rows in df_exploded.groupby('genres', dropna=False, sort=False):
+            # Games without a genre still count towards All Games
+            self.sketches[None if pd.isna(genre) else genre] = {
+                col: QuantileSketch.from_values(rows[col].to_numpy(dtype=np.float64, na_value=np.nan)) for col in columns
+            }
+        self._merged = lru_cache(maxsize=256)(self._merge)
+        if df_all is None:
+            self.all_games = {col: self._merge(col, tuple(self.sketches)) for col in columns}
+        else:
+            self.all_games = {col: QuantileSketch.from_values(df_all[col].to_numpy(dtype=np.float64, na_value=np.nan))
+                              for col in columns}
+
+    def sketch(self, column, genres='All Games'):
+        """Sketch for 'All Games', one genre or a list of genres"""
+        if genres == 'All Games':
+            return self.all_games[column]
+        if isinstance(genres, str):
+            genres = [genres]
+        return self._merged(column, tuple(sorted(set(genres))))
+
+    def percentiles(self, column, genres='All Games', quantiles=PERCENTILE_BANDS):
+        return self.sketch(column, genres).quantile(quantiles)
+
+    def _merge(self, column, genres):
+        sketches = [self.sketches[genre][column] for genre in genres if genre in self.sketches]
+        return reduce(QuantileSketch.merge, sketches, EMPTY_SKETCH)
+
+# Similar games - cosine similarity over normalized engagement profiles
+SIMILARITY_COLUMNS = ['ownership_rate', 'engagement_rate', 'completion_rate', 'churn_rate',
+                      'metacritic', 'rating', 'playtime']
+
+def incidence_matrix(exploded, n_rows, categories):
+    """Boolean row x category matrix from values exploded from row positions"""
+    codes = pd.Categorical(exploded.to_numpy(), categories=categories).codes
+    valid = codes >= 0
+    incidence = np.zeros((n_rows, len(categories)), dtype=bool)
+    incidence[exploded.index.to_numpy()[valid], codes[valid]] = True
+    return incidence
+
+def genre_incidence(genre_lists, genres):
+    """Boolean game x genre matrix"""
+    return incidence_matrix(pd.Series(genre_lists.to_numpy()).explode(), len(genre_lists), genres)
+
+def platform_incidence(platforms, platform_names):
+    """Boolean game x platform matrix from the '||' separated platform column"""
+    exploded = pd.Series(platforms.to_numpy(), dtype=object).str.split('||', regex=False).explode()
+    return incidence_matrix(exploded.str.strip(), len(platforms), platform_names)
+
+class SimilarityIndex:
+    """Unit-length float32 feature rows for batched nearest-neighbour search"""
+
+    def __init__(self, df_marketing, genres, batch_size=64):
+        # Standardize the metrics; missing values sit at the mean
+        numeric = df_marketing[SIMILARITY_COLUMNS].to_numpy(dtype=np.float64)
+        mean = np.nanmean(numeric, axis=0)
+        std = np.nanstd(numeric, axis=0)
+        std[std == 0] = 1
+        numeric = np.nan_to_num((numeric - mean) / std)
+
+        # Genre one-hot, scaled so multi-genre games don't outweigh the metrics
+        self.genres = read_only(genre_incidence(df_marketing['genres'], genres))
+        genre_counts = np.maximum(self.genres.sum(axis=1, keepdims=True), 1)
+        features = np.hstack([numeric, self.genres / np.sqrt(genre_counts)]).astype(np.float32)
+
+        norms = np.linalg.norm(features, axis=1, keepdims=True)
+        norms[norms == 0] = 1
+        self.features = read_only(features / norms)
+        self.batch_size = batch_size
+        self._cached = lru_cache(maxsize=1024)(self._similar)
+
+    def neighbours(self, positions, k=10, same_genre=False):
+        """Top-k (positions, similarities) for each query row, most similar first"""
+        results = []
+        for start in range(0, len(positions), self.batch_size):
+            batch = np.asarray(positions[start:start + self.batch_size])
+            scores = self.features[batch] @ self.features.T
+            scores[np.arange(len(batch)), batch] = -np.inf
+            if same_genre:
+                scores[~(self.genres[batch] @ self.genres.T)] = -np.inf
+
+            # Every game tied with the k-th kept, so ties go by row order rather than by argpartition's pick
+            cutoff = -np.partition(-scores, min(k, scores.shape[1]) - 1, axis=1)[:, min(k, scores.shape[1]) - 1]
+            for row in range(len(batch)):
+                candidates = np.flatnonzero((scores[row] >= cutoff[row]) & np.isfinite(scores[row]))
+                candidates = candidates[np.lexsort((candidates, -scores[row, candidates]))][:k]
+                results.append((candidates, scores[row, candidates]))
+        return results
+
+    def similar(self, position, k=10, same_genre=False):
+        """Cached top-k neighbours of one game"""
+        return self._cached(int(position), k, bool(same_genre))
+
+    def _similar(self, position, k, same_genre):
+        return self.neighbours([position], k, same_genre)[0]
+
+# Genre combinations - sparse game x genre and game x platform incidence, combined by matrix products
+COMBINATION_METRICS = ['total_users', 'engagement_score']
+# Means over fewer games than this are left out of the heatmaps
+COMBINATION_MIN_GAMES = 5
+
+def sparse_incidence(exploded, n_rows, categories):
+    """Sparse 0/1 row x category matrix from values exploded from row positions"""
+    codes = pd.Categorical(exploded.to_numpy(), categories=categories).codes
+    valid = codes >= 0
+    matrix = sparse.csr_matrix(
+        (np.ones(valid.sum(), dtype=np.float64), (exploded.index.to_numpy()[valid], codes[valid])),
+        shape=(n_rows, len(categories))
+    )
+    # A genre or platform listed twice still counts once
+    matrix.data[:] = 1
+    return matrix
+
+class GenreCombinations:
+    """Users and engagement for every genre pair and genre x platform pairing"""
+
+    def __init__(self, df_clean, genres):
+        exploded_platforms = (pd.Series(df_clean['platforms'].to_numpy(), dtype=object)
+                              .str.split('||', regex=False).explode().str.strip())
+        exploded_platforms = exploded_platforms[exploded_platforms.notna() & (exploded_platforms != '')]
+        self.genres = list(genres)
+        self.platforms = exploded_platforms.value_counts().index.tolist()
+        self.genre_matrix = sparse_incidence(pd.Series(df_clean['genres'].to_numpy()).explode(), len(df_clean), self.genres)
+        self.platform_matrix = sparse_incidence(exploded_platforms, len(df_clean), self.platforms)
+
+        # Per-game values on the diagonal: G'DG sums them over the games sharing two genres
+        values = {
+            'games': np.ones(len(df_clean)),
+            'total_users': df_clean['total_users'].to_numpy(dtype=np.float64),
+            'engagement_score': df_clean['engagement_score'].to_numpy(dtype=np.float64, na_value=0),
+        }
+        genres_t = self.genre_matrix.T.tocsr()
+        self.pair_sums = {name: self.frame(genres_t @ sparse.diags(value) @ self.genre_matrix, self.genres)
+                          for name, value in values.items()}
+        self.platform_sums = {name: self.frame(genres_t @ sparse.diags(value) @ self.platform_matrix, self.platforms)
+                              for name, value in values.items()}
+
+    def frame(self, product, columns):
+        return pd.DataFrame(product.toarray(), index=self.genres, columns=columns)
+
+    def table(self, sums, metric):
+        """Summed users or mean engagement per cell, NaN where too few games"""
+        if metric == 'total_users':
+            return sums['total_users'].where(sums['games'] > 0)
+        return (sums['engagement_score'] / sums['games']).where(sums['games'] >= COMBINATION_MIN_GAMES)
+
+    def genre_pairs(self, metric):
+        """Genre x genre table for games listing both genres; the diagonal holds each genre on its own"""
+        return self.table(self.pair_sums, metric)
+
+    def genre_platforms(self, metric, size=None):
+        """Genre x platform table, the platforms with the most games first"""
+        table = self.table(self.platform_sums, metric)
+        return table if size is None else table.iloc[:, :size]
+
+# Alternative score weights - every score is linear in these components
+SCORE_COMPONENTS = ['ownership_rate', 'engagement_rate', 'completion_rate', 'metacritic', 'rating']
+ENGAGEMENT_COMPONENTS = SCORE_COMPONENTS[:3]
+# Rankings that follow the weights, with the row of the score they rank by
+SCORE_RANKINGS = {'top_games': 1, 'marketing_targets': 2}
+
+def normalize_score_weights(values):
+    """Weight vector with each score's weights scaled to sum to one"""
+    if values is None:
+        return DEFAULT_SCORE_WEIGHTS
+    values = np.clip(np.nan_to_num(np.asarray(values, dtype=np.float64)), 0, None)
+    default = np.asarray(DEFAULT_SCORE_WEIGHTS)
+    normalized = []
+    for score in SCORE_WEIGHTS:
+        group = [i for i, (name, _) in enumerate(SCORE_WEIGHT_KEYS) if name == score]
+        total = values[group].sum()
+        normalized.extend(values[group] / total if total > 0 else default[group])
+    return tuple(round(float(weight), 4) for weight in normalized)
+
+def score_coefficients(weights):
+    """Component-to-score matrix (engagement, appeal, priority) for a weight vector"""
+    w = {key: weight for key, weight in zip(SCORE_WEIGHT_KEYS, weights)}
+    engagement = np.array([w['engagement_score', col] for col in ENGAGEMENT_COMPONENTS] + [0, 0])
+    appeal = (w['combined_score', 'engagement_score'] * engagement +
+              np.array([0, 0, 0, w['combined_score', 'metacritic'], w['combined_score', 'rating']]))
+    priority = (w['marketing_score', 'engagement_score'] * engagement +
+                np.array([0, 0, w['marketing_score', 'completion_rate'],
+                          w['marketing_score', 'metacritic'], w['marketing_score', 'rating']]))
+    return (np.column_stack([engagement, appeal, priority]) * 100).astype(np.float32)
+
+def score_components(df):
+    """Float32 component matrix, critic and user scores scaled to 0-1 with gaps as zero"""
+    components = df[SCORE_COMPONENTS].to_numpy(dtype=np.float32, na_value=np.nan)
+    return np.nan_to_num(components / np.array([1, 1, 1, 100, 5], dtype=np.float32))
+
+class ScoreModel:
+    """Precomputed score components for re-ranking every game under new weights"""
+
+    def __init__(self, df_marketing, df_marketing_exploded, genres, aggregates, chart_aggregates):
+        # Components laid out one row per component, so each score comes out contiguous
+        self.game_components = read_only(np.ascontiguousarray(score_components(df_marketing[df_marketing['total_users'] > 0]).T))
+        self.row_components = read_only(np.ascontiguousarray(score_components(df_marketing_exploded).T))
+
+        # Exploded row positions for each genre
+        codes = pd.Categorical(df_marketing_exploded['genres'], categories=genres).codes
+        order = np.argsort(codes, kind='stable')
+        bounds = np.searchsorted(codes[order], np.arange(len(genres) + 1))
+        genre_rows = {genre: read_only(order[bounds[i]:bounds[i + 1]]) for i, genre in enumerate(genres)}
+        genre_rows['All Games'] = read_only(np.arange(len(df_marketing_exploded)))
+
+        # Ranking candidates, matching ranking_candidates and the NaN-propagating appeal score
+        rated = (df_marketing_exploded['metacritic'].notna() & df_marketing_exploded['rating'].notna()).to_numpy()
+        clean = (df_marketing_exploded['total_users'] > 0).to_numpy()
+        self.candidate_rows = {
+            'top_games': {genre: read_only(rows[rated[rows]]) for genre, rows in genre_rows.items()},
+            'marketing_targets': genre_rows,
+        }
+        self.clean_rows = {genre: read_only(rows[clean[rows]]) for genre, rows in genre_rows.items() if genre != 'All Games'}
+
+        # Position of each row in game key and genre order, which breaks score ties the way rank_rows does
+        key = game_key(df_marketing)
+        tie_order = df_marketing_exploded[[key, 'genres']].reset_index(drop=True).sort_values(
+            [key, 'genres'], kind='stable').index.to_numpy()
+        self.tie_rank = np.empty(len(tie_order), dtype=np.intp)
+        self.tie_rank[tie_order] = np.arange(len(tie_order))
+        read_only(self.tie_rank)
+
+        # Mean engagement components per genre and per charted platform
+        self.genre_means = group_means(aggregates['genre'], ENGAGEMENT_COMPONENTS)
+        platform_means = group_means(aggregates['platform'], ENGAGEMENT_COMPONENTS)
+        self.platform_means = {
+            genre: read_only(platform_means.loc[[(genre, platform) for platform in chart['platforms']['platform']]].to_numpy())
+            for genre, chart in chart_aggregates.items()
+        }
+
+    def top_rows(self, scores, rows, size):
+        """Positions of the best rows, highest score first"""
+        candidates = scores[rows]
+        if len(rows) > size:
+            # Every row tied with the last one kept, so the tie break decides between them
+            cutoff = np.partition(candidates, len(rows) - size)[len(rows) - size]
+            best = candidates >= cutoff
+            rows, candidates = rows[best], candidates[best]
+        return rows[np.lexsort((self.tie_rank[rows], -candidates))[:size]]
+
+# Churn risk - weighted logistic regression of the share of players who drop a game
+STARTED_COLUMNS = ['added_status_owned', 'added_status_playing', 'added_status_beaten', 'added_status_dropped']
+# Numeric features; owned, playing and beaten shares are left out as they split the same players as the target
+CHURN_NUMERIC_FEATURES = ['playtime (log)', 'rating', 'metacritic', 'metacritic missing', 'reviews (log)',
+                          'users (log)', 'to-play share', 'not-yet share']
+CHURN_PLATFORMS = 20
+CHURN_BATCH_ROWS = 65536
+CHURN_L2 = 1e-4
+CHURN_MAX_ITER = 25
+
+def status_counts(df, column):
+    return df[column].fillna(0).to_numpy(dtype=np.float64)
+
+def churn_numeric_features(df):
+    """Play time, scores, popularity and the not-yet-played status shares"""
+    total = np.maximum(df['total_users'].to_numpy(dtype=np.float64), 1)
+    metacritic = df['metacritic'].to_numpy(dtype=np.float64, na_value=np.nan)
+    return np.column_stack([
+        np.log1p(np.clip(df['playtime'].to_numpy(dtype=np.float64, na_value=0), 0, None)),
+        df['rating'].to_numpy(dtype=np.float64, na_value=0) / 5,
+        np.nan_to_num(metacritic / 100),
+        np.isnan(metacritic),
+        np.log1p(np.clip(df['reviews_count'].to_numpy(dtype=np.float64, na_value=0), 0, None)),
+        np.log1p(total),
+        status_counts(df, 'added_status_toplay') / total,
+        status_counts(df, 'added_status_yet') / total,
+    ])
+
+def sigmoid(z):
+    return 1 / (1 + np.exp(-np.clip(z, -30, 30)))
+
+def fit_logistic(features, target, weights, rows, l2=CHURN_L2, max_iter=CHURN_MAX_ITER, tol=1e-6):
+    """Weighted logistic regression on some rows of a float32 design matrix, by Newton's method over row batches
+
+    Returns (coefficients, intercept, iterations).
+    """
+    n_features = features.shape[1]
+    weights = weights[rows] / weights[rows].sum()
+    target = target[rows]
+    mean = np.dot(weights, target)
+    beta = np.zeros(n_features + 1)
+    beta[-1] = np.log(mean / (1 - mean)) if 0 < mean < 1 else 0
+    penalty = np.diag(np.append(np.full(n_features, l2), 0))
+
+    for iteration in range(1, max_iter + 1):
+        gradient = penalty @ beta
+        hessian = penalty.copy()
+        for start in range(0, len(rows), CHURN_BATCH_ROWS):
+            batch = features[rows[start:start + CHURN_BATCH_ROWS]]
+            batch = np.hstack([batch, np.ones((len(batch), 1), dtype=np.float32)])
+            w = weights[start:start + CHURN_BATCH_ROWS]
+            p = sigmoid(batch @ beta.astype(np.float32))
+            gradient += batch.T @ (w * (p - target[start:start + CHURN_BATCH_ROWS])).astype(np.float32)
+            hessian += (batch * (w * p * (1 - p)).astype(np.float32)[:, None]).T @ batch
+        step = np.linalg.solve(hessian, gradient)
+        beta -= step
+        if np.abs(step).max() < tol:
+            break
+    return beta[:-1], beta[-1], iteration
+
+class ChurnModel:
+    """Churn risk for every game, from a logistic model trained on the games' player statuses"""
+
+    def __init__(self, df_marketing, genres, platforms):
+        started = time.perf_counter()
+        self.genres = list(genres)
+        self.platforms = list(platforms)
+        self.feature_names = (CHURN_NUMERIC_FEATURES + [f'genre: {genre}' for genre in self.genres] +
+                              [f'platform: {platform}' for platform in self.platforms])
+
+        # Target: the share of players who started a game and dropped it, weighted by those players
+        players = sum(status_counts(df_marketing, column) for column in STARTED_COLUMNS)
+        dropped = status_counts(df_marketing, 'added_status_dropped')
+        train = np.flatnonzero(players > 0)
+
+        # Design matrix: standardized numeric features, then genre and platform one-hots
+        numeric = churn_numeric_features(df_marketing)
+        mean = numeric[train].mean(axis=0)
+        std = numeric[train].std(axis=0)
+        std[std == 0] = 1
+        genre_columns = genre_incidence(df_marketing['genres'], self.genres)
+        features = np.hstack([(numeric - mean) / std, genre_columns,
+                              platform_incidence(df_marketing['platforms'], self.platforms)], dtype=np.float32)
+
+        coefficients, self.intercept, self.iterations = fit_logistic(
+            features, np.divide(dropped, players, out=np.zeros_like(dropped), where=players > 0), players, train)
+        self.coefficients = pd.Series(coefficients, index=self.feature_names)
+        self.training_games = len(train)
+
+        # Score every game in batches
+        risk = np.empty(len(features), dtype=np.float32)
+        coefficients = coefficients.astype(np.float32)
+        for start in range(0, len(features), CHURN_BATCH_ROWS):
+            risk[start:start + CHURN_BATCH_ROWS] = sigmoid(features[start:start + CHURN_BATCH_ROWS] @ coefficients + self.intercept)
+        self.risk = read_only(risk)
+
+        # Player-weighted predicted and observed churn per genre
+        membership = np.hstack([genre_columns, np.ones((len(features), 1), dtype=bool)]).astype(np.float32)
+        predicted, observed, genre_players = np.vstack([risk * players, dropped, players]).astype(np.float32) @ membership
+        with np.errstate(divide='ignore', invalid='ignore'):
+            self.genre_risk = pd.DataFrame({
+                'genres': self.genres + ['All Games'],
+                'predicted_risk': predicted / genre_players,
+                'observed_churn': observed / genre_players,
+                'players': genre_players,
+            }).dropna().sort_values('predicted_risk', ascending=False, ignore_index=True)
+        self.seconds = time.perf_counter() - started
+
+# Lazily derived structures built before a dataset version goes live, in order
+WARM_STRUCTURES = ['search_index', 'genre_percentiles', 'chart_aggregates', 'review_quantiles',
+                   'genre_combinations', 'churn_model', 'score_model']
+
+class MarketingDataset:
+    """Immutable snapshot of the processed game data and its aggregates"""
+
+    def __init__(self, version, df, df_marketing, df_marketing_exploded, df_marketing_clean,
+                 df_marketing_exploded_clean, aggregates, success_factor_stats, rankings, row_hashes, raw_dtypes):
+        self.version = version
+        self.key = game_key(df)
+        self.df = df
+        self.df_marketing = df_marketing
+        self.df_marketing_exploded = df_marketing_exploded
+        self.df_marketing_clean = df_marketing_clean
+        self.df_marketing_exploded_clean = df_marketing_exploded_clean
+        self.aggregates = aggregates
+        self.success_factor_stats = success_factor_stats
+        self.rankings = rankings
+        self.row_hashes = row_hashes
+        self.raw_dtypes = raw_dtypes
+
+        # Views derived from the additive aggregates
+        with profiling.stage('cohort'):
+            self.cohort_df = create_cohort_data(aggregates['cohort'])
+        with profiling.stage('genre performance'):
+            self.genre_performance = analyze_genre_performance(aggregates['genre'])
+        self.unique_genres = df_marketing_exploded['genres'].dropna().unique().tolist()
+        self._rescored = lru_cache(maxsize=32)(self._rescore)
+
+    @classmethod
+    def from_raw(cls, raw, version=1):
+        """Run the full processing pipeline over a raw game export"""
+        print("Pre-calculating analytics data...")
+        with profiling.stage('clean'):
+            df = prepare_games(raw)
+
+        # Apply marketing metrics
+        with profiling.stage('metrics'):
+            df_marketing = add_ranking_scores(calculate_marketing_metrics(df))
+        with profiling.stage('explode'):
+            df_marketing_exploded = df_marketing.explode('genres')
+
+        # Cache frequently used data, recalculated with better funnel logic
+        with profiling.stage('funnel'):
+            df_marketing_clean = recalculate_funnel_metrics(df_marketing[df_marketing['total_users'] > 0])
+            df_marketing_exploded_clean = recalculate_funnel_metrics(df_marketing_exploded[df_marketing_exploded['total_users'] > 0])
+
+        with profiling.stage('aggregates'):
+            aggregates = aggregate_contributions(df_marketing)
+        with profiling.stage('success factors'):
+            success_factor_stats = build_success_factor_stats(df_marketing_exploded)
+        with profiling.stage('rankings'):
+            rankings = build_rankings(df_marketing_exploded, game_key(df_marketing))
+        with profiling.stage('row hashes'):
+            row_hashes = hash_rows(raw)
+
+        dataset = cls(
+            version, df, df_marketing, df_marketing_exploded, df_marketing_clean, df_marketing_exploded_clean,
+            aggregates, success_factor_stats, rankings, row_hashes, raw.dtypes
+        )
+        print("Data pre-processing complete!")
+        return dataset
+
+    @cached_property
+    def search_index(self):
+        return GameSearchIndex(self.df_marketing, self.key)
+
+    @cached_property
+    def genre_percentiles(self):
+        return GenrePercentiles(self.df_marketing_exploded, ['engagement_score', 'clv_proxy'])
+
+    @cached_property
+    def similarity_index(self):
+        return SimilarityIndex(self.df_marketing, self.unique_genres)
+
+    @cached_property
+    def score_model(self):
+        return ScoreModel(self.df_marketing, self.df_marketing_exploded, self.unique_genres,
+                          self.aggregates, self.chart_aggregates)
+
+    @cached_property
+    def review_quantiles(self):
+        """Review count and critic score sketches for the games the review matrix plots"""
+        exploded = self.df_marketing_exploded
+        reviewed = exploded[exploded['metacritic'].notna() & (exploded['reviews_count'] > REVIEW_MATRIX_MIN_REVIEWS)]
+        return GenreQuantiles(reviewed, ['reviews_count', 'metacritic'])
+
+    @cached_property
+    def engagement_quantiles(self):
+        """Engagement score and play time sketches for the games with users"""
+        return GenreQuantiles(self.df_marketing_exploded_clean, ['engagement_score', 'playtime'], self.df_marketing_clean)
+
+    @cached_property
+    def genre_combinations(self):
+        return GenreCombinations(self.df_marketing_clean, self.unique_genres)
+
+    @cached_property
+    def churn_model(self):
+        """Churn model trained on this version's games, on the most common platforms"""
+        platform_games = self.aggregates['platform'].loc['All Games'][('size', 'rows')]
+        model = ChurnModel(self.df_marketing, self.unique_genres, platform_games.nlargest(CHURN_PLATFORMS).index)
+        print(f"Churn model trained on {model.training_games} games in {model.seconds:.1f}s")
+        return model
+
+    @cached_property
+    def chart_aggregates(self):
+        """Compact per-genre funnel, engagement histogram and platform data for the browser"""
+        funnel = self.aggregates['funnel']
+        platforms = self.aggregates['platform']
+        exploded_clean = self.df_marketing_exploded_clean
+        clean_by_genre = dict(list(exploded_clean.groupby('genres')[['engagement_score'] + FUNNEL_COLUMNS]))
+        clean_by_genre['All Games'] = self.df_marketing_clean
+
+        charts = {}
+        for genre in ['All Games'] + self.unique_genres:
+            games = clean_by_genre.get(genre)
+            if games is None or games.empty:
+                continue
+
+            # Funnel: commercial games, falling back to the top 50 games
+            if genre in funnel.index:
+                funnel_sums = funnel.loc[genre, 'sum']
+                funnel_games = int(funnel.loc[genre, ('size', 'rows')])
+            else:
+                top_games = games.nlargest(50, 'total_users')
+                funnel_sums = top_games[FUNNEL_COLUMNS].sum()
+                funnel_games = len(top_games)
+
+            # Engagement score histogram
+            scores = games['engagement_score'].dropna().to_numpy()
+            counts, edges = np.histogram(scores, bins=ENGAGEMENT_HISTOGRAM_BINS)
+
+            # Top platforms by total users
+            platform_summary = pd.DataFrame(columns=PLATFORM_COLUMNS)
+            if genre in platforms.index.get_level_values('genres'):
+                genre_platforms = platforms.xs(genre, level='genres')
+                platform_summary = group_means(genre_platforms, PLATFORM_COLUMNS)
+                platform_summary['total_users'] = genre_platforms['sum']['total_users']
+                platform_summary = platform_summary.sort_values('total_users', ascending=False).head(PLATFORM_CHART_SIZE)
+
+            charts[genre] = {
+                'funnel': {
+                    'values': [float(funnel_sums[col]) for col in ['total_users', 'owned_users', 'completed_users', 'active_users']],
+                    'games': funnel_games
+                },
+                'engagement': {
+                    'counts': counts.tolist(),
+                    'edges': np.round(edges, 4).tolist(),
+                    'average': float(scores.mean()) if len(scores) else None,
+                    'percentiles': (np.round(self.engagement_quantiles.percentiles('engagement_score', genre), 3).tolist()
+                                    if len(scores) else []),
+                    'games': len(games)
+                },
+                'platforms': {
+                    'platform': platform_summary.index.tolist(),
+                    'total_users': platform_summary['total_users'].astype(float).tolist(),
+                    'engagement_score': platform_summary['engagement_score'].astype(float).round(3).tolist()
+                }
+            }
+        return charts
+
+    def rescore(self, weights):
+        """Genre performance and chart data under alternative score weights"""
+        weights = normalize_score_weights(weights)
+        if weights == DEFAULT_SCORE_WEIGHTS:
+            return {'genre_performance': self.genre_performance, 'chart_aggregates': self.chart_aggregates}
+        return self._rescored(weights)
+
+    def ranking(self, name, genre, weights=DEFAULT_SCORE_WEIGHTS):
+        """Top rows of a ranking for a genre under the given score weights, None if the genre has none"""
+        weights = normalize_score_weights(weights)
+        if weights == DEFAULT_SCORE_WEIGHTS or name not in SCORE_RANKINGS:
+            return self.rankings[name].get(genre)
+        top = self._rescored(weights)['rankings'][name].get(genre)
+        if top is None:
+            return None
+        positions, scores = top
+        return self.df_marketing_exploded.iloc[positions].assign(
+            **{score: values for score, values in zip(SCORE_WEIGHTS, scores)}
+        )
+
+    def _rescore(self, weights):
+        model = self.score_model
+        coefficients = score_coefficients(weights)
+        engagement = coefficients[:3, 0].astype(np.float64)
+
+        # One fused pass: engagement, appeal and priority scores for every row
+        row_scores = coefficients.T @ model.row_components
+        # Top rows and their scores only; frames are assembled per genre on request
+        rankings = {}
+        for name, score in SCORE_RANKINGS.items():
+            rankings[name] = {}
+            for genre, rows in model.candidate_rows[name].items():
+                if len(rows):
+                    top = model.top_rows(row_scores[score], rows, RANKING_SIZES[name])
+                    rankings[name][genre] = (top, row_scores[:, top].astype(np.float64))
+
+        # Genre averages follow from the additive component means
+        genre_engagement = model.genre_means @ engagement
+        genre_performance = self.genre_performance.assign(
+            engagement_score=self.genre_performance['genres'].map(genre_engagement).round(3)
+        ).sort_values('engagement_score', ascending=False).reset_index(drop=True)
+
+        # Browser chart data with re-scored histograms and platform engagement
+        game_engagement = coefficients[:, 0] @ model.game_components
+        charts = {}
+        for genre, chart in self.chart_aggregates.items():
+            if genre == 'All Games':
+                scores = game_engagement
+            else:
+                scores = row_scores[0, model.clean_rows[genre]]
+            average = float(scores.mean()) if len(scores) else None
+            # One sort gives the histogram and the exact percentile bands, faster than partitioning for them
+            scores = np.sort(scores)
+            counts, edges = sorted_histogram(scores, ENGAGEMENT_HISTOGRAM_BINS)
+            platform_engagement = np.round(model.platform_means[genre] @ engagement, 3).tolist()
+            charts[genre] = dict(
+                chart,
+                engagement=dict(chart['engagement'], counts=counts.tolist(), edges=np.round(edges, 4).tolist(),
+                                average=average,
+                                percentiles=(np.round(sorted_quantiles(scores, PERCENTILE_BANDS), 3).tolist()
+                                             if len(scores) else [])),
+                platforms=dict(chart['platforms'], engagement_score=platform_engagement)
+            )
+
+        return {'rankings': rankings, 'genre_performance': genre_performance, 'chart_aggregates': charts}
+
+    @cached_property
+    def fingerprint(self):
+        """Content hash of the raw rows in order, the same for the same data in any process"""
+        return hashlib.sha1(self.row_hashes.to_numpy().tobytes()).hexdigest()
+
+    def warm(self):
+        """Build the lazily derived lookup structures before the dataset goes live"""
+        for name in WARM_STRUCTURES:
+            with profiling.stage(name.replace('_', ' ')):
+                getattr(self, name)
+        return self
+
+    @property
+    def df_metacritic(self):
+        """Critically reviewed games, one row per genre"""
+        df_metacritic = self.df[self.df['metacritic'].notna() & (self.df['metacritic'] > 0)]
+        return df_metacritic.explode('genres')
+
+    def changed_rows(self, raw, detect_removals=True):
+        """Rows of `raw` that are new or differ from this snapshot, and removed keys"""
+        # Match the original schema so unchanged rows hash identically
+        raw = raw.reindex(columns=self.raw_dtypes.index)
+        for col, dtype in self.raw_dtypes.items():
+            try:
+                raw[col] = raw[col].astype(dtype)
+            except (TypeError, ValueError):
+                pass
+        new_hashes = hash_rows(raw)
+
+        old_hashes = self.row_hashes
+        common = new_hashes.index.intersection(old_hashes.index)
+        differs = common[new_hashes.loc[common].values != old_hashes.loc[common].values]
+        changed_keys = new_hashes.index.difference(old_hashes.index).union(differs)
+
+        removed_keys = old_hashes.index.difference(new_hashes.index) if detect_removals else old_hashes.index[:0]
+        return raw[raw[self.key].isin(changed_keys)], removed_keys
+
+    def apply_changes(self, changed_raw, removed_keys=()):
+        """Build the next version, recomputing metrics only for the changed games"""
+        key = self.key
+        touched_keys = pd.Index(changed_raw[key]).union(pd.Index(removed_keys))
+
+        # Metrics for the changed games only
+        added = add_ranking_scores(calculate_marketing_metrics(prepare_games(changed_raw)))
+        added_exploded = added.explode('genres')
+        removed = self.df_marketing[self.df_marketing[key].isin(touched_keys)]
+
+        def replace_rows(frame, new_rows):
+            return pd.concat([frame[~frame[key].isin(touched_keys)], new_rows], ignore_index=True)
+
+        df = replace_rows(self.df, prepare_games(changed_raw))
+        df_marketing = replace_rows(self.df_marketing, added)
+        df_marketing_exploded = replace_rows(self.df_marketing_exploded, added_exploded)
+        df_marketing_clean = replace_rows(self.df_marketing_clean,
+                                          recalculate_funnel_metrics(added[added['total_users'] > 0]))
+        df_marketing_exploded_clean = replace_rows(self.df_marketing_exploded_clean,
+                                                   recalculate_funnel_metrics(added_exploded[added_exploded['total_users'] > 0]))
+
+        # Awareness is relative to the most popular game in the whole catalogue
+        max_users = df_marketing['total_users'].max()
+        for frame in (df_marketing, df_marketing_exploded, df_marketing_clean, df_marketing_exploded_clean):
+            frame['awareness_rate'] = frame['total_users'] / max_users
+
+        removed_contributions = aggregate_contributions(removed)
+        added_contributions = aggregate_contributions(added)
+        aggregates = {
+            name: apply_group_delta(table, removed_contributions[name], added_contributions[name])
+            for name, table in self.aggregates.items()
+        }
+
+        row_hashes = pd.concat([self.row_hashes.drop(touched_keys, errors='ignore'), hash_rows(changed_raw)])
+
+        return MarketingDataset(
+            self.version + 1, df, df_marketing, df_marketing_exploded, df_marketing_clean, df_marketing_exploded_clean,
+            aggregates,
+            update_success_factor_stats(self.success_factor_stats, removed.explode('genres'), added_exploded),
+            update_rankings(self.rankings, df_marketing_exploded, key, touched_keys, added_exploded),
+            row_hashes,
+            self.raw_dtypes
+        )
+
+def hash_rows(raw):
+    """Content hash of every raw row, indexed by game key"""
+    hashes = pd.util.hash_pandas_object(raw, index=False)
+    hashes.index = pd.Index(raw[game_key(raw)])
+    return hashes
+
+def load_dataset(path=None, nrows=None, version=1):
+    """Read a game export and build its first dataset version"""
+    with profiling.startup():
+        with profiling.stage('read'):
+            raw = read_games(path or GAME_DATA_PATH, nrows)
+        return MarketingDataset.from_raw(raw, version).warm()
+
+@lru_cache(maxsize=None)
+def countries_table(path=None):
+    """Country reference table, read on first use"""
+    return pd.read_csv(path or COUNTRIES_PATH)
+
+class DataLayer:
+    """Current dataset, loaded on first use and replaced atomically on refresh"""
+
+    def __init__(self):
+        self._dataset = None
+        self._next_version = 1
+        self._lock = threading.Lock()
+        self.refresher = None
+        self.configure()
+
+    def configure(self, path=None, delta_path=None, nrows=None, refresh_interval=None, version_store=None):
+        """Data files and row cap for the next load, and where to keep the versions it produces"""
+        with self._lock:
+            source = (path or GAME_DATA_PATH, delta_path or GAME_DATA_DELTA_PATH,
+                      GAME_DATA_ROWS if nrows is None else nrows)
+            if self._dataset is not None and source != (self.path, self.delta_path, self.nrows):
+                # Different data - load it on next use, numbering on from the old versions so nothing
+                # cached per version is served for the new data
+                self._next_version = self._dataset.version + 1
+                self._dataset = None
+                self.refresher.stop()
+            self.path, self.delta_path, self.nrows = source
+            self.refresh_interval = DATA_REFRESH_INTERVAL if refresh_interval is None else refresh_interval
+            self.version_store = version_store
+
+    @property
+    def loaded(self):
+        return self._dataset is not None
+
+    @property
+    def dataset(self):
+        # Callbacks keep the snapshot they started with while a newer one is swapped in
+        dataset = self._dataset
+        if dataset is not None:
+            return dataset
+        with self._lock:
+            if self._dataset is not None:
+                return self._dataset
+            dataset = self._dataset = load_dataset(self.path, self.nrows, self._next_version)
+            # Pick up new or changed game rows without restarting the workers
+            self.refresher = DatasetRefresher(self.path, self.delta_path, self.refresh_interval, self.nrows)
+            self.refresher.start()
+        # Writing the version to disk need not hold up the callbacks waiting for the data
+        self.keep_version(dataset)
+        return dataset
+
+    def set(self, dataset):
+        with self._lock:
+            self._dataset = dataset
+        self.keep_version(dataset)
+
+    def keep_version(self, dataset):
+        """Store a dataset version alongside the earlier ones, when a version store is configured"""
+        if self.version_store is None:
+            return
+        try:
+            self.version_store.save(dataset)
+        except OSError as e:
+            print(f"Could not store dataset version {dataset.version}: {e}")
+
+data_layer = DataLayer()
+
+def current_dataset():
+    return data_layer.dataset
+
+def set_dataset(dataset):
+    data_layer.set(dataset)
+
+class DatasetRefresher:
+    """Watch the game data files and swap in incrementally updated versions"""
+
+    def __init__(self, path=None, delta_path=None, interval=None, nrows=None):
+        self.path = path or GAME_DATA_PATH
+        self.delta_path = delta_path or GAME_DATA_DELTA_PATH
+        self.interval = DATA_REFRESH_INTERVAL if interval is None else interval
+        self.nrows = nrows
+        self._lock = threading.Lock()
+        self._seen = {self.path: file_signature(self.path), self.delta_path: None}
+        self._thread = None
+        self._stopped = threading.Event()
+
+    def start(self):
+        """Poll for changes in a daemon thread (disabled when interval is 0)"""
+        if self.interval <= 0 or self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name='dataset-refresher', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop polling, e.g. when the data layer moves to other files"""
+        self._stopped.set()
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            try:
+                self.check()
+            except Exception as e:
+                print(f"Data refresh failed: {e}")
+
+    def check(self):
+        """Apply any change to the main or delta file, returning the new version or None"""
+        with self._lock:
+            version = None
+            if self._stopped.is_set():
+                return version
+            for path, full in ((self.path, True), (self.delta_path, False)):
+                signature = file_signature(path)
+                if signature is None or signature == self._seen.get(path):
+                    continue
+                version = self._apply(path, full) or version
+                self._seen[path] = signature
+            return version
+
+    def _apply(self, path, full):
+        dataset = current_dataset()
+        changed, removed = dataset.changed_rows(read_games(path, self.nrows if full else None), detect_removals=full)
+        if changed.empty and removed.empty:
+            return None
+        updated = dataset.apply_changes(changed, removed).warm()
+        set_dataset(updated)
+        print(f"Dataset updated to version {updated.version}: "
+              f"{len(changed)} changed, {len(removed)} removed games")
+        return updated.version
+
+def file_signature(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
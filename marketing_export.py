@@ -0,0 +1,186 @@
+import io
+import re
+
+import numpy as np
+import pandas as pd
+from flask import Blueprint, Response, request, stream_with_context
+
+from marketing_data import (
+    DEFAULT_SCORE_WEIGHTS, SCORE_WEIGHTS, current_dataset, normalize_score_weights, rank_rows,
+    ranking_candidates, score_coefficients
+)
+
+# Columns written to exports - raw values, not the formatted table strings
+EXPORT_COLUMNS = ['name', 'slug', 'genres', 'year', 'metacritic', 'rating', 'playtime', 'reviews_count',
+                  'total_users', 'ownership_rate', 'engagement_rate', 'completion_rate', 'churn_rate',
+                  'engagement_score', 'clv_proxy', 'marketing_score']
+EXPORT_CHUNK_ROWS = 20000
+
+export_blueprint = Blueprint('export', __name__)
+
+# DataTable filter_query clauses, e.g. {engagement_score} >= 50 && {name} icontains zelda, evaluated the way the
+# table evaluates them in the browser, on the same raw values the table holds
+FILTER_CLAUSE = re.compile(r'^\{(?P<column>[^}]+)\}\s*(?P<case>[is]?)(?P<op>>=|<=|!=|=|<|>|eq|ne|lt|le|gt|ge|contains)\s*(?P<value>.+)$')
+FILTER_OPERATORS = {
+    '=': 'eq', 'eq': 'eq', '!=': 'ne', 'ne': 'ne', '<': 'lt', 'lt': 'lt',
+    '<=': 'le', 'le': 'le', '>': 'gt', 'gt': 'gt', '>=': 'ge', 'ge': 'ge',
+}
+NUMERIC_VALUE = re.compile(r'^[+-]?(\d+\.?\d*|\.\d+)([eE][+-]?\d+)?$')
+
+def filter_value(text):
+    """A clause's value as the table reads it: quoted text, or a number when it looks like one"""
+    text = text.strip()
+    if len(text) > 1 and text[0] == text[-1] and text[0] in '"\'`':
+        return text[1:-1]
+    return float(text) if NUMERIC_VALUE.match(text) else text
+
+def clause_mask(column, op, value, ignore_case):
+    """Rows of one column matching one clause"""
+    numeric = column.dtype.kind in 'biuf'
+    if op == 'contains':
+        # Only text contains anything, so a number never matches a numeric column
+        if numeric and not isinstance(value, str):
+            return np.zeros(len(column), dtype=bool)
+        text = column.map(format_number) if numeric else column.astype(str)
+        needle = value if isinstance(value, str) else format_number(value)
+        return (column.notna() & text.str.contains(needle, case=not ignore_case, regex=False)).to_numpy()
+
+    op = FILTER_OPERATORS[op]
+    if not isinstance(value, str):
+        # Numbers compare as numbers, text holding one included; ordering takes a missing value as 0
+        values = column if numeric else pd.to_numeric(column, errors='coerce')
+        if numeric and op not in ('eq', 'ne'):
+            values = values.fillna(0)
+        return getattr(values, op)(value).to_numpy()
+    text = column.map(format_number) if numeric else column.astype(str)
+    if ignore_case:
+        text, value = text.str.upper(), value.upper()
+    return (column.notna() & getattr(text, op)(value)).to_numpy()
+
+def format_number(value):
+    """A number as the browser writes it, without a trailing .0"""
+    if pd.isna(value):
+        return ''
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+def filter_mask(frame, filter_query):
+    """Boolean mask for a DataTable filter query, applied to the raw columns"""
+    mask = np.ones(len(frame), dtype=bool)
+    if not filter_query:
+        return mask
+
+    for clause in filter_query.split('&&'):
+        match = FILTER_CLAUSE.match(clause.strip())
+        if not match or match['column'] not in EXPORT_COLUMNS:
+            raise ValueError(f"Unsupported filter clause: {clause.strip()}")
+        mask &= clause_mask(frame[match['column']], match['op'], filter_value(match['value']), match['case'] == 'i')
+    return mask
+
+def score_weights_argument(value):
+    """Score weights from a comma separated query parameter, the defaults when missing"""
+    if not value:
+        return DEFAULT_SCORE_WEIGHTS
+    weights = [float(weight) for weight in value.split(',')]
+    if len(weights) != len(DEFAULT_SCORE_WEIGHTS):
+        raise ValueError(f"Expected {len(DEFAULT_SCORE_WEIGHTS)} score weights, got {len(weights)}")
+    return normalize_score_weights(weights)
+
+def rescored_candidates(ds, candidates, weights):
+    """Candidate rows with their scores recomputed under alternative weights"""
+    if weights == DEFAULT_SCORE_WEIGHTS:
+        return candidates
+    scores = score_coefficients(weights).T @ ds.score_model.row_components
+    return candidates.assign(**{score: values.astype(np.float64) for score, values in zip(SCORE_WEIGHTS, scores)})
+
+def ranked_positions(candidates, score, key, selected_genre, filter_query):
+    """Row positions of the matching targets, in the table's ranking order"""
+    mask = filter_mask(candidates, filter_query)
+    if selected_genre != 'All Games':
+        mask &= (candidates['genres'] == selected_genre).to_numpy()
+    positions = np.flatnonzero(mask)
+    matching = candidates[[score, key, 'genres']].iloc[positions].assign(position=positions)
+    return rank_rows(matching, score, key)['position'].to_numpy()
+
+def ranked_chunks(candidates, order, columns):
+    """Export columns for the ranked rows, a bounded chunk at a time"""
+    for start in range(0, max(len(order), 1), EXPORT_CHUNK_ROWS):
+        chunk = candidates.iloc[order[start:start + EXPORT_CHUNK_ROWS]][columns]
+        yield chunk.assign(rank=np.arange(start + 1, start + len(chunk) + 1))
+
+def csv_chunks(chunks):
+    """Ranked rows as CSV text"""
+    for number, chunk in enumerate(chunks):
+        yield chunk.to_csv(index=False, header=(number == 0))
+
+class ChunkSink(io.RawIOBase):
+    """Writable file object that hands written bytes back in chunks"""
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+def parquet_chunks(chunks):
+    """Ranked rows as a Parquet file, one row group per chunk"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    sink = ChunkSink()
+    writer = None
+    for chunk in chunks:
+        table = pa.Table.from_pandas(chunk, preserve_index=False)
+        if writer is None:
+            writer = pq.ParquetWriter(sink, table.schema)
+        writer.write_table(table)
+        yield sink.drain()
+    writer.close()
+    yield sink.drain()
+
+EXPORT_FORMATS = {
+    'csv': (csv_chunks, 'text/csv'),
+    'parquet': (parquet_chunks, 'application/vnd.apache.parquet'),
+}
+
+@export_blueprint.route('/export/marketing-targets.<fmt>')
+def export_marketing_targets(fmt):
+    """Stream the full ranked marketing target list for a genre and filter"""
+    if fmt not in EXPORT_FORMATS:
+        return {'error': f"Unsupported format '{fmt}', use csv or parquet"}, 404
+    if fmt == 'parquet':
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            return {'error': "Parquet export needs pyarrow installed"}, 501
+
+    ds = current_dataset()
+    selected_genre = request.args.get('genre', 'All Games')
+    candidates, score = ranking_candidates('marketing_targets', ds.df_marketing_exploded)
+    try:
+        weights = score_weights_argument(request.args.get('weights'))
+        candidates = rescored_candidates(ds, candidates, weights)
+        order = ranked_positions(candidates, score, ds.key, selected_genre, request.args.get('filter', ''))
+    except ValueError as e:
+        return {'error': str(e)}, 400
+
+    encode, mimetype = EXPORT_FORMATS[fmt]
+    filename = f"marketing-targets-{re.sub(r'[^0-9A-Za-z]+', '-', selected_genre).strip('-').lower()}-v{ds.version}.{fmt}"
+    return Response(
+        stream_with_context(encode(ranked_chunks(candidates, order, [ds.key] + EXPORT_COLUMNS))),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename="{filename}"'}
+    )
@@ -0,0 +1,196 @@
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from functools import wraps
+from urllib.parse import parse_qs, urlsplit
+
+# Opt-in profiling - PROFILE=startup samples the data pipeline, PROFILE=request also any page opened with
+# ?profile=1, PROFILE=all every callback
+PROFILE = os.environ.get('PROFILE', '')
+PROFILE_MODES = ['startup', 'request', 'all']
+PROFILE_DIR = os.environ.get('PROFILE_DIR', 'profiles')
+# Seconds between stack samples (threads only swap every 5ms by default), and speedscope or
+# collapsed (flamegraph.pl) output
+PROFILE_INTERVAL = float(os.environ.get('PROFILE_INTERVAL', '0.005'))
+PROFILE_FORMAT = os.environ.get('PROFILE_FORMAT', 'speedscope')
+
+def frame_name(frame):
+    """Module and qualified function name of a stack frame"""
+    return f"{frame.f_globals.get('__name__', '?')}:{frame.f_code.co_qualname}"
+
+class SamplingProfiler:
+    """Samples one thread's Python stack from a background thread, tagged with the current stage"""
+
+    def __init__(self, name, thread_id=None, interval=PROFILE_INTERVAL):
+        self.name = name
+        self.thread_id = thread_id or threading.get_ident()
+        self.interval = interval
+        self.samples = Counter()
+        self.times = Counter()
+        self.stage = None
+        self.stage_seconds = {}
+        self.stage_samples = Counter()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self.started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name=f'profiler-{self.name}', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stopped.set()
+        self._thread.join()
+        self.seconds = time.perf_counter() - self.started
+        return self
+
+    def _run(self):
+        last = time.perf_counter()
+        while not self._stopped.wait(self.interval):
+            # Samples stand for the time since the previous one, which runs over the interval under load
+            now = time.perf_counter()
+            elapsed, last = now - last, now
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None or self._stopped.is_set():
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(frame_name(frame))
+                frame = frame.f_back
+            stage = self.stage
+            if stage is not None:
+                stack.append(f'[{stage}]')
+                self.stage_samples[stage] += 1
+            stack = tuple(reversed(stack))
+            self.samples[stack] += 1
+            self.times[stack] += elapsed
+
+    @contextmanager
+    def stage_of(self, name):
+        """Time a pipeline stage and tag the samples taken during it"""
+        outer, self.stage = self.stage, name
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stage_seconds[name] = self.stage_seconds.get(name, 0) + time.perf_counter() - started
+            self.stage = outer
+
+    def write(self, directory, fmt=PROFILE_FORMAT):
+        """Write the samples as a speedscope or collapsed-stack file, returning its path"""
+        os.makedirs(directory, exist_ok=True)
+        stamp = time.strftime('%Y%m%d-%H%M%S') + f'-{int(time.time() * 1000) % 1000:03d}'
+        if fmt == 'collapsed':
+            path = os.path.join(directory, f'{self.name}-{stamp}.folded')
+            with open(path, 'w', encoding='utf-8') as f:
+                f.writelines(f"{';'.join(stack)} {count}\n" for stack, count in self.samples.most_common())
+            return path
+        path = os.path.join(directory, f'{self.name}-{stamp}.speedscope.json')
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(speedscope_profile(self.name, self.times), f)
+        return path
+
+    def stage_table(self):
+        """Per-stage wall time, share of the total and samples taken"""
+        width = max([len(name) for name in self.stage_seconds] + [5])
+        lines = [f"{'Stage':<{width}}  {'Seconds':>8}  {'Share':>6}  {'Samples':>7}"]
+        for name, seconds in self.stage_seconds.items():
+            lines.append(f"{name:<{width}}  {seconds:>8.3f}  {seconds / self.seconds:>6.1%}  "
+                         f"{self.stage_samples[name]:>7}")
+        lines.append(f"{'Total':<{width}}  {self.seconds:>8.3f}  {1:>6.0%}  {sum(self.samples.values()):>7}")
+        return '\n'.join(lines)
+
+def speedscope_profile(name, times):
+    """Sampled profile in the speedscope file format, one entry per distinct stack weighted by its time"""
+    frames = {}
+    stacks = [[frames.setdefault(frame, len(frames)) for frame in stack] for stack in times]
+    weights = [round(seconds * 1000, 3) for seconds in times.values()]
+    return {
+        '$schema': 'https://www.speedscope.app/file-format-schema.json',
+        'shared': {'frames': [{'name': frame} for frame in frames]},
+        'profiles': [{
+            'type': 'sampled', 'name': name, 'unit': 'milliseconds',
+            'startValue': 0, 'endValue': sum(weights),
+            'samples': stacks, 'weights': weights,
+        }],
+        'name': name,
+    }
+
+class Profiling:
+    """Which parts of the app are profiled, and where the profiles go"""
+
+    def __init__(self):
+        self.startup_profiler = None
+        self.configure(PROFILE, PROFILE_DIR)
+
+    def configure(self, mode, directory=None):
+        if mode and mode not in PROFILE_MODES:
+            raise ValueError(f"PROFILE must be one of {', '.join(PROFILE_MODES)}, not {mode!r}")
+        self.mode = mode or None
+        self.directory = directory or PROFILE_DIR
+
+    @property
+    def callbacks_enabled(self):
+        return self.mode in ('request', 'all')
+
+    @contextmanager
+    def startup(self):
+        """Profile the data pipeline run inside, then write the profile and print the stage table"""
+        if self.mode is None or self.startup_profiler is not None:
+            yield
+            return
+        profiler = self.startup_profiler = SamplingProfiler('startup').start()
+        try:
+            yield
+        finally:
+            self.startup_profiler = None
+            profiler.stop()
+            path = profiler.write(self.directory)
+            print(f"Startup stages (profile in {path}):\n{profiler.stage_table()}")
+
+    @contextmanager
+    def stage(self, name):
+        """Pipeline stage, timed and tagged when startup profiling is on"""
+        profiler = self.startup_profiler
+        if profiler is None or profiler.thread_id != threading.get_ident():
+            yield
+            return
+        with profiler.stage_of(name):
+            yield
+
+    def requested(self):
+        """Whether the current request asks for a profile, in its own or its page's query string"""
+        from flask import has_request_context, request
+        if not has_request_context():
+            return False
+        if 'profile' in request.args:
+            return True
+        return 'profile' in parse_qs(urlsplit(request.referrer or '').query, keep_blank_values=True)
+
+    def callback(self, func):
+        """Wrap a callback to profile the calls the mode selects"""
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            requested = self.requested()
+            if self.mode != 'all' and not requested:
+                return func(*args, **kwargs)
+            # A requested profile is of the work itself, past any output cache in front of it
+            call = getattr(func, '__wrapped__', func) if requested else func
+            profiler = SamplingProfiler(func.__name__).start()
+            try:
+                return call(*args, **kwargs)
+            finally:
+                profiler.stop()
+                # Calls answered before the first sample (e.g. from a cache) leave no file
+                if profiler.samples:
+                    path = profiler.write(os.path.join(self.directory, 'callbacks'))
+                    print(f"Profiled {func.__name__} ({profiler.seconds:.3f}s, "
+                          f"{sum(profiler.samples.values())} samples) to {path}")
+        return wrapper
+
+profiling = Profiling()
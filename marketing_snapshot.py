@@ -0,0 +1,149 @@
+import argparse
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+import plotly.io as pio
+
+# Prerendered callback outputs - one JSON file per callback and argument tuple, built for one dataset
+SNAPSHOT_DIR = os.environ.get('SNAPSHOT_DIR') or None
+SNAPSHOT_MANIFEST = 'manifest.json'
+
+def snapshot_file(name, args):
+    """Path of a callback output within the snapshot, from the callback name and its arguments"""
+    digest = hashlib.sha1(json.dumps(list(args)).encode()).hexdigest()[:16]
+    return f'{name}/{digest}.json'
+
+def serialize(value):
+    """Callback output as the JSON Dash would send for it"""
+    return pio.json.to_json_plotly(value)
+
+def write_snapshot(directory, dataset, outputs):
+    """Write rendered (name, args, value) outputs, then the manifest that makes them visible"""
+    callbacks = {}
+    for name, args, value in outputs:
+        path = snapshot_file(name, args)
+        os.makedirs(os.path.join(directory, name), exist_ok=True)
+        with open(os.path.join(directory, path), 'w', encoding='utf-8') as f:
+            f.write(serialize(value))
+        callbacks.setdefault(name, []).append({'args': list(args), 'file': path})
+
+    manifest = {
+        'fingerprint': dataset.fingerprint,
+        'games': len(dataset.df),
+        'created': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'callbacks': callbacks,
+    }
+    # Written last and swapped in, so a reader never sees a manifest for half-written files
+    temporary = os.path.join(directory, SNAPSHOT_MANIFEST + '.tmp')
+    with open(temporary, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=1)
+    os.replace(temporary, os.path.join(directory, SNAPSHOT_MANIFEST))
+    return manifest
+
+def read_manifest(directory):
+    with open(os.path.join(directory, SNAPSHOT_MANIFEST), encoding='utf-8') as f:
+        return json.load(f)
+
+def compare_snapshot(directory, dataset, outputs):
+    """Files whose stored output differs from a fresh render, for using a snapshot as a regression baseline"""
+    manifest = read_manifest(directory)
+    if manifest['fingerprint'] != dataset.fingerprint:
+        raise ValueError("Snapshot was built from different game data")
+
+    differences = []
+    expected = {entry['file'] for entries in manifest['callbacks'].values() for entry in entries}
+    for name, args, value in outputs:
+        path = snapshot_file(name, args)
+        expected.discard(path)
+        try:
+            with open(os.path.join(directory, path), encoding='utf-8') as f:
+                stored = f.read()
+        except FileNotFoundError:
+            differences.append((path, name, args, 'missing from snapshot'))
+            continue
+        if stored != serialize(value):
+            differences.append((path, name, args, 'changed'))
+    differences.extend((path, path.split('/')[0], None, 'no longer rendered') for path in sorted(expected))
+    return differences
+
+class SnapshotStore:
+    """Prerendered outputs served in place of the callbacks, while the live data matches the snapshot"""
+
+    def __init__(self):
+        self.directory = None
+        self.manifest = None
+        self._files = set()
+        self._lock = threading.Lock()
+        self.stats = Counter()
+        # Background jobs read the snapshot in processes forked from threaded workers, where a lock
+        # another thread held at the fork would never be released
+        os.register_at_fork(after_in_child=self._after_fork)
+
+    def _after_fork(self):
+        self._lock = threading.Lock()
+        self.stats = Counter()
+
+    def configure(self, directory):
+        """Serve from a snapshot directory, or stop serving from one when `directory` is None"""
+        manifest = read_manifest(directory) if directory else None
+        with self._lock:
+            self.directory = directory
+            self.manifest = manifest
+            self._files = {entry['file'] for entries in (manifest or {}).get('callbacks', {}).values()
+                           for entry in entries}
+
+    def get(self, name, args, dataset):
+        """(True, output) from the snapshot, (False, None) when it has none for this data"""
+        if self.manifest is None:
+            return False, None
+        path = snapshot_file(name, args)
+        if dataset.fingerprint != self.manifest['fingerprint'] or path not in self._files:
+            with self._lock:
+                self.stats['misses'] += 1
+            return False, None
+        with open(os.path.join(self.directory, path), encoding='utf-8') as f:
+            value = json.load(f)
+        with self._lock:
+            self.stats['hits'] += 1
+        return True, value
+
+snapshot_store = SnapshotStore()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Prerender every genre and chart combination to static JSON, "
+                                                 "or check a snapshot against a fresh render")
+    parser.add_argument('command', choices=['build', 'verify'])
+    parser.add_argument('directory', nargs='?', default=SNAPSHOT_DIR or 'snapshot')
+    args = parser.parse_args(argv)
+
+    from datvis_marketing import create_app, snapshot_outputs
+    from marketing_data import current_dataset
+
+    create_app({'PRELOAD_DATA': True, 'DATA_REFRESH_INTERVAL': 0, 'SNAPSHOT_DIR': None})
+    dataset = current_dataset()
+    started = time.perf_counter()
+
+    if args.command == 'build':
+        manifest = write_snapshot(args.directory, dataset, snapshot_outputs(dataset))
+        files = sum(len(entries) for entries in manifest['callbacks'].values())
+        print(f"Wrote {files} outputs of {len(manifest['callbacks'])} callbacks to {args.directory} "
+              f"in {time.perf_counter() - started:.1f}s")
+        return 0
+
+    try:
+        differences = compare_snapshot(args.directory, dataset, snapshot_outputs(dataset))
+    except ValueError as e:
+        print(f"Cannot verify {args.directory}: {e}")
+        return 1
+    for path, name, call_args, reason in differences:
+        print(f"{path}: {name}{tuple(call_args) if call_args is not None else ''} {reason}")
+    print(f"{len(differences)} differences from {args.directory} ({time.perf_counter() - started:.1f}s)")
+    return 1 if differences else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
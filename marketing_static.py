@@ -0,0 +1,112 @@
+import hashlib
+import mimetypes
+import os
+import posixpath
+import re
+import threading
+
+from flask import Blueprint, Response, abort, send_from_directory
+
+# Landing page assets, served under content-hashed URLs that never change meaning
+STATIC_ROOT = os.path.dirname(os.path.abspath(__file__))
+STATIC_ASSET_DIRS = ['vendors', 'images', 'css']
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+static_blueprint = Blueprint('static_assets', __name__)
+
+CSS_URL = re.compile(r'''url\(\s*(['"]?)(?P<path>[^'")?#]+)(?P<suffix>[^'")]*)\1\s*\)''')
+PAGE_REFERENCE = re.compile(r'''(?P<attr>href|src)="(?P<path>[^"?#:]+)"''')
+
+def hashed_name(path, content):
+    """File path with a short content hash before the extension"""
+    root, ext = posixpath.splitext(path)
+    return f"{root}.{hashlib.sha256(content).hexdigest()[:10]}{ext}"
+
+class AssetManifest:
+    """Content-hashed URLs for the static asset directories"""
+
+    def __init__(self, root=STATIC_ROOT, directories=STATIC_ASSET_DIRS):
+        self.root = root
+        self.hashed = {}       # original path -> hashed path
+        self.originals = {}    # hashed path -> original path
+        self.rewritten = {}    # hashed path -> stylesheet body with hashed url() references
+
+        files = []
+        for directory in directories:
+            for dirpath, _, filenames in os.walk(os.path.join(root, directory)):
+                for filename in filenames:
+                    files.append(os.path.relpath(os.path.join(dirpath, filename), root).replace(os.sep, '/'))
+
+        # Stylesheets are hashed after their url() references, so a changed image changes the CSS URL too
+        for path in sorted(files, key=lambda path: path.endswith('.css')):
+            with open(os.path.join(root, path), 'rb') as f:
+                content = f.read()
+            if path.endswith('.css'):
+                content = self.rewrite_css(path, content)
+            hashed = hashed_name(path, content)
+            self.hashed[path] = hashed
+            self.originals[hashed] = path
+            if path.endswith('.css'):
+                self.rewritten[hashed] = content
+
+    def rewrite_css(self, path, content):
+        """Point a stylesheet's relative url() references at their hashed files"""
+        directory = posixpath.dirname(path)
+
+        def replace(match):
+            target = posixpath.normpath(posixpath.join(directory, match['path']))
+            if target not in self.hashed:
+                return match.group(0)
+            relative = posixpath.relpath(self.hashed[target], directory)
+            return f'url("{relative}{match["suffix"]}")'
+
+        return CSS_URL.sub(replace, content.decode('utf-8')).encode('utf-8')
+
+    def url(self, path):
+        """Hashed URL for an asset path, the path itself when it is not an asset"""
+        return '/' + self.hashed[path] if path in self.hashed else path
+
+_manifest = None
+_manifest_lock = threading.Lock()
+
+def asset_manifest():
+    """Asset manifest, built on first use"""
+    global _manifest
+    with _manifest_lock:
+        if _manifest is None:
+            _manifest = AssetManifest()
+        return _manifest
+
+def serve_asset(directory, filename):
+    """Hashed asset URLs are cached forever, plain ones are revalidated"""
+    manifest = asset_manifest()
+    path = f'{directory}/{filename}'
+    original = manifest.originals.get(path)
+    if original is None:
+        if path not in manifest.hashed:
+            abort(404)
+        response = send_from_directory(manifest.root, path, max_age=0)
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
+
+    if path in manifest.rewritten:
+        response = Response(manifest.rewritten[path], mimetype='text/css')
+    else:
+        response = send_from_directory(manifest.root, original, mimetype=mimetypes.guess_type(original)[0])
+    response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+    return response
+
+for _directory in STATIC_ASSET_DIRS:
+    static_blueprint.add_url_rule(f'/{_directory}/<path:filename>', f'{_directory}_asset',
+                                  lambda filename, directory=_directory: serve_asset(directory, filename))
+
+@static_blueprint.route('/landing')
+def landing_page():
+    """Landing page with its stylesheets, scripts and images on hashed URLs"""
+    manifest = asset_manifest()
+    with open(os.path.join(manifest.root, 'index.html'), encoding='utf-8') as f:
+        page = f.read()
+    page = PAGE_REFERENCE.sub(lambda match: f'{match["attr"]}="{manifest.url(match["path"])}"', page)
+    response = Response(page, mimetype='text/html')
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
@@ -0,0 +1,277 @@
+import argparse
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from marketing_data import group_means, read_games, MarketingDataset
+
+# Stored dataset versions - content-addressed .npy files, shared by the versions that contain them. Aggregate
+# columns are one file each, game columns one file per block of about VERSION_BLOCK_ROWS games
+VERSION_STORE_DIR = os.environ.get('VERSION_STORE_DIR') or None
+VERSION_COLUMNS = 'columns'
+VERSION_BLOCK_ROWS = int(os.environ.get('VERSION_BLOCK_ROWS', '4096'))
+VERSION_MANIFESTS = 'versions'
+AGGREGATE_TABLES = ['genre', 'funnel', 'cohort', 'platform']
+
+# Per-genre figures a comparison shows, and the funnel stages it turns into shares of all users
+VERSION_MEAN_COLUMNS = ['engagement_score', 'ownership_rate', 'completion_rate', 'churn_rate']
+FUNNEL_SHARES = {'owned_share': 'owned_users', 'completed_share': 'completed_users', 'active_share': 'active_users'}
+
+def column_digest(values):
+    """Content hash of an array, its dtype and shape included"""
+    digest = hashlib.sha1(f'{values.dtype.str}{values.shape}'.encode())
+    digest.update(np.ascontiguousarray(values).view(np.uint8).data)
+    return digest.hexdigest()
+
+def column_array(column):
+    """Column values as an array np.save writes without pickling"""
+    if column.dtype.kind in 'biufcmM':
+        return column.to_numpy()
+    return np.asarray(column.astype(str).to_numpy(), dtype=str)
+
+def game_columns(dataset):
+    """Games sorted by key, so a column only changes where its values do, with each row's content hash"""
+    games = dataset.df_marketing.sort_values(dataset.key, kind='stable')
+    games = games[[col for col in games.columns if games[col].dtype.kind in 'biufmM']]
+    return games.assign(row_hash=dataset.row_hashes.reindex(games[dataset.key]).to_numpy())
+
+def block_bounds(keys):
+    """(start, end) rows splitting key-sorted games into blocks, each ending at a game whose key hash says so"""
+    # The ends follow the keys, not row positions, so added, removed or updated games only change their own block
+    ends = np.flatnonzero(pd.util.hash_array(np.asarray(keys)) % VERSION_BLOCK_ROWS == 0) + 1
+    ends = np.append(ends[ends < len(keys)], len(keys))
+    return list(zip(np.r_[0, ends[:-1]].tolist(), ends.tolist()))
+
+def frame_digests(stored):
+    """Digests of every file a stored frame's columns take up"""
+    for _, digest in stored['columns']:
+        yield from digest if isinstance(digest, list) else [digest]
+
+class StoredVersion:
+    """A dataset version read back from the store, with its columns memory-mapped"""
+
+    def __init__(self, store, manifest):
+        self.store = store
+        self.manifest = manifest
+        self.id = manifest['id']
+        self.fingerprint = manifest['fingerprint']
+        self.key = manifest['key']
+        self.aggregates = {name: self.frame(name) for name in AGGREGATE_TABLES}
+        games = self.frame('games', [self.key, 'row_hash'])
+        self.row_hashes = pd.Series(games['row_hash'].to_numpy(), index=pd.Index(games[self.key]))
+
+    def frame(self, name, columns=None):
+        """Stored frame (or some of its columns), single-file columns views of the mapped files"""
+        stored = self.manifest['frames'][name]
+        selected = [(column, digest) for column, digest in stored['columns'] if columns is None or column in columns]
+        frame = pd.DataFrame({position: self.store.values(digest) for position, (_, digest) in enumerate(selected)},
+                             copy=False)
+        names = [tuple(column) if isinstance(column, list) else column for column, _ in selected]
+        frame.columns = pd.MultiIndex.from_tuples(names) if names and isinstance(names[0], tuple) else names
+        if stored['index']:
+            frame.index = pd.MultiIndex.from_arrays([self.store.array(digest) for _, digest in stored['index']],
+                                                    names=[level for level, _ in stored['index']])
+            if frame.index.nlevels == 1:
+                frame.index = frame.index.get_level_values(0)
+        return frame
+
+class VersionStore:
+    """Dataset versions kept side by side on disk, deduplicated column by column and, for games, block by block"""
+
+    def __init__(self):
+        self.directory = None
+        self._arrays = {}
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def configure(self, directory):
+        """Keep versions in `directory`, or none when it is None"""
+        with self._lock:
+            self.directory = directory
+            self._arrays.clear()
+            self._versions.clear()
+
+    @property
+    def enabled(self):
+        return self.directory is not None
+
+    def array(self, digest):
+        """Mapped column file, shared by every version that holds the same values"""
+        with self._lock:
+            array = self._arrays.get(digest)
+            if array is None:
+                path = os.path.join(self.directory, VERSION_COLUMNS, f'{digest}.npy')
+                array = self._arrays[digest] = np.load(path, mmap_mode='r')
+            return array
+
+    def values(self, digest):
+        """Column from its file, or joined from its block files"""
+        if not isinstance(digest, list):
+            return self.array(digest)
+        blocks = [self.array(block) for block in digest]
+        return blocks[0] if len(blocks) == 1 else np.concatenate(blocks)
+
+    def write_array(self, values):
+        """Store a column unless an identical one is already there, returning its digest"""
+        digest = column_digest(values)
+        path = os.path.join(self.directory, VERSION_COLUMNS, f'{digest}.npy')
+        if not os.path.exists(path):
+            temporary = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+            with open(temporary, 'wb') as f:
+                np.save(f, values, allow_pickle=False)
+            os.replace(temporary, path)
+        return digest
+
+    def write_frame(self, frame, index=True, blocks=None):
+        """Store a frame's columns and index levels, returning their digests (lists of them for blocked columns)"""
+        def write(values):
+            if blocks is None:
+                return self.write_array(values)
+            return [self.write_array(values[start:end]) for start, end in blocks]
+
+        levels = [[level, self.write_array(column_array(frame.index.get_level_values(position).to_series()))]
+                  for position, level in enumerate(frame.index.names)] if index else []
+        return {
+            'index': levels,
+            'rows': len(frame),
+            'columns': [[list(column) if isinstance(column, tuple) else column, write(column_array(frame[column]))]
+                        for column in frame.columns],
+        }
+
+    def save(self, dataset, label=None):
+        """Store a dataset version once, returning its manifest (None when no store is configured)"""
+        if not self.enabled:
+            return None
+        version_id = dataset.fingerprint[:16]
+        path = os.path.join(self.directory, VERSION_MANIFESTS, f'{version_id}.json')
+        if os.path.exists(path):
+            return read_json(path)
+
+        os.makedirs(os.path.join(self.directory, VERSION_COLUMNS), exist_ok=True)
+        os.makedirs(os.path.join(self.directory, VERSION_MANIFESTS), exist_ok=True)
+        frames = {name: self.write_frame(dataset.aggregates[name]) for name in AGGREGATE_TABLES}
+        games = game_columns(dataset)
+        frames['games'] = self.write_frame(games, index=False, blocks=block_bounds(games[dataset.key]))
+        created = time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())
+        manifest = {
+            'id': version_id,
+            'fingerprint': dataset.fingerprint,
+            'label': label or created[:10],
+            'key': dataset.key,
+            'games': len(dataset.df),
+            'created': created,
+            'frames': frames,
+        }
+        # The manifest goes in last, so listed versions always have all their columns
+        temporary = f'{path}.{os.getpid()}.tmp'
+        with open(temporary, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=1)
+        os.replace(temporary, path)
+        return manifest
+
+    def versions(self):
+        """Manifests of the stored versions, oldest first"""
+        if not self.enabled:
+            return []
+        directory = os.path.join(self.directory, VERSION_MANIFESTS)
+        if not os.path.isdir(directory):
+            return []
+        manifests = [read_json(os.path.join(directory, name)) for name in os.listdir(directory) if name.endswith('.json')]
+        return sorted(manifests, key=lambda manifest: manifest['created'])
+
+    def open(self, version_id):
+        """Stored version by id, mapped once per process"""
+        version = self._versions.get(version_id)
+        if version is None:
+            manifest = read_json(os.path.join(self.directory, VERSION_MANIFESTS, f'{version_id}.json'))
+            version = self._versions[version_id] = StoredVersion(self, manifest)
+        return version
+
+    def stats(self):
+        """Stored versions and the column bytes they would take without sharing"""
+        manifests = self.versions()
+        digests = [digest for manifest in manifests for frame in manifest['frames'].values()
+                   for digest in frame_digests(frame)]
+        sizes = {digest: os.path.getsize(os.path.join(self.directory, VERSION_COLUMNS, f'{digest}.npy'))
+                 for digest in set(digests)}
+        return {'versions': len(manifests), 'files': len(sizes),
+                'bytes': sum(sizes.values()), 'bytes_without_sharing': sum(sizes[digest] for digest in digests)}
+
+version_store = VersionStore()
+
+def read_json(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+# Comparisons - from the per-genre aggregates and row hashes, never the raw rows
+def version_summary(aggregates):
+    """Per-genre games, users, mean scores and funnel shares from a version's aggregates"""
+    genre = aggregates['genre']
+    summary = group_means(genre, VERSION_MEAN_COLUMNS)
+    summary.insert(0, 'games', genre[('size', 'rows')])
+    summary.insert(1, 'total_users', genre['sum']['total_users'])
+    funnel = aggregates['funnel']['sum']
+    for share, column in FUNNEL_SHARES.items():
+        summary[share] = funnel[column] / funnel['total_users'].replace(0, np.nan)
+    summary.index.name = 'genres'
+    return summary
+
+def compare_versions(base, other):
+    """Per-genre figures of two versions, with the change from `base` to `other`"""
+    before, after = version_summary(base.aggregates), version_summary(other.aggregates)
+    genres = before.index.union(after.index)
+    before, after = before.reindex(genres), after.reindex(genres)
+    return pd.concat({'before': before, 'after': after, 'change': after - before}, axis=1)
+
+def game_changes(base, other):
+    """Games added, removed and updated between two versions"""
+    before, after = base.row_hashes, other.row_hashes
+    common = before.index.intersection(after.index)
+    updated = int((before.loc[common].to_numpy() != after.loc[common].to_numpy()).sum())
+    return {
+        'added': len(after.index.difference(before.index)),
+        'removed': len(before.index.difference(after.index)),
+        'updated': updated,
+        'unchanged': len(common) - updated,
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Keep processed game exports as dataset versions and compare them")
+    parser.add_argument('--directory', default=VERSION_STORE_DIR or 'versions')
+    commands = parser.add_subparsers(dest='command', required=True)
+    save = commands.add_parser('save', help="process a game export and store it as a version")
+    save.add_argument('path')
+    save.add_argument('--label')
+    commands.add_parser('list', help="list the stored versions")
+    compare = commands.add_parser('compare', help="per-genre changes between two stored versions")
+    compare.add_argument('base')
+    compare.add_argument('other')
+    args = parser.parse_args(argv)
+
+    version_store.configure(args.directory)
+    if args.command == 'save':
+        started = time.perf_counter()
+        manifest = version_store.save(MarketingDataset.from_raw(read_games(args.path)), args.label)
+        print(f"Stored version {manifest['id']} ({manifest['label']}, {manifest['games']:,} games) "
+              f"in {time.perf_counter() - started:.1f}s")
+    elif args.command == 'list':
+        for manifest in version_store.versions():
+            print(f"{manifest['id']}  {manifest['created']}  {manifest['games']:>9,} games  {manifest['label']}")
+        stats = version_store.stats()
+        print(f"{stats['versions']} versions in {stats['bytes'] / 2**20:.1f} MB "
+              f"({stats['bytes_without_sharing'] / 2**20:.1f} MB without shared files)")
+    else:
+        base, other = version_store.open(args.base), version_store.open(args.other)
+        print(game_changes(base, other))
+        with pd.option_context('display.width', 200, 'display.max_columns', 20):
+            print(compare_versions(base, other)['change'].round(3).sort_values('engagement_score'))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,75 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SAMPLE_GENRES = ['Action', 'Adventure', 'RPG', 'Strategy', 'Shooter', 'Puzzle', 'Indie', 'Casual', 'Simulation',
+                 'Racing', 'Sports', 'Platformer', 'Arcade', 'Family', 'Card']
+SAMPLE_PLATFORMS = ['PC', 'PlayStation 4', 'Xbox One', 'Nintendo Switch', 'iOS', 'Android', 'macOS', 'Linux']
+
+def sample_games(n=3000, seed=0):
+    """Synthetic game export with the columns and value shapes of the RAWG data"""
+    rng = np.random.default_rng(seed)
+
+    def pick(pool, k):
+        return '||'.join(rng.choice(pool, size=k, replace=False))
+
+    def counts(scale):
+        values = np.round(rng.pareto(1.5, n) * scale)
+        values[rng.random(n) < 0.6] = 0
+        return values
+
+    metacritic = rng.normal(72, 10, n).round()
+    metacritic[rng.random(n) < 0.8] = np.nan
+    return pd.DataFrame({
+        'id': np.arange(1, n + 1),
+        'slug': [f'game-{i}' for i in range(1, n + 1)],
+        'name': [f'Game {i} {rng.choice(["Quest", "Legends", "Saga", "Tactics"])}' for i in range(1, n + 1)],
+        'metacritic': metacritic,
+        'released': (pd.Timestamp('1998-01-01') + pd.to_timedelta(rng.integers(0, 8000, n), unit='D')).strftime('%Y-%m-%d'),
+        'website': '',
+        'rating': np.round(rng.uniform(0, 5, n), 2),
+        'playtime': rng.integers(0, 60, n),
+        'reviews_count': counts(20),
+        'platforms': [pick(SAMPLE_PLATFORMS, rng.integers(1, 4)) for _ in range(n)],
+        'developers': 'Developer',
+        'publishers': 'Publisher',
+        'genres': [pick(SAMPLE_GENRES, rng.integers(1, 4)) if rng.random() > 0.1 else np.nan for _ in range(n)],
+        'esrb_rating': 'Everyone',
+        'added_status_yet': counts(10),
+        'added_status_owned': counts(40),
+        'added_status_beaten': counts(10),
+        'added_status_toplay': counts(5),
+        'added_status_dropped': counts(5),
+        'added_status_playing': counts(3),
+    })
+
+@pytest.fixture(scope='session')
+def sample_csv(tmp_path_factory):
+    path = tmp_path_factory.mktemp('data') / 'game_info.csv'
+    sample_games().to_csv(path, index=False)
+    return path
+
+@pytest.fixture(scope='session')
+def app_config(sample_csv, tmp_path_factory):
+    """create_app() settings for the sample data, with refreshes, snapshots, versions and profiling off"""
+    directory = tmp_path_factory.mktemp('app')
+    return {
+        'GAME_DATA_PATH': str(sample_csv),
+        'GAME_DATA_DELTA_PATH': str(directory / 'game_info_delta.csv'),
+        'DATA_REFRESH_INTERVAL': 0,
+        'PRELOAD_DATA': True,
+        'BACKGROUND_CACHE_DIR': str(directory / 'background'),
+        'SNAPSHOT_DIR': None,
+        'VERSION_STORE_DIR': None,
+        'PROFILE': '',
+    }
+
+@pytest.fixture(scope='session')
+def app(app_config):
+    from datvis_marketing import create_app
+    return create_app(app_config)
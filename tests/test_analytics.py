@@ -0,0 +1,139 @@
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import optimize
+
+import marketing_data
+from conftest import sample_games
+from marketing_data import (
+    CHURN_L2, SUCCESS_FACTOR_COLUMNS, ChurnModel, MarketingDataset, QuantileSketch, fit_logistic, normalize_title,
+    sigmoid
+)
+
+@pytest.fixture(scope='module')
+def ds():
+    # Re-released copies of some games, so scores and profiles tie exactly
+    raw = sample_games()
+    copies = raw.head(30).assign(id=lambda df: df['id'] + 100000, slug=lambda df: df['slug'] + '-remaster')
+    return MarketingDataset.from_raw(pd.concat([raw, copies], ignore_index=True))
+
+def test_correlation_stats_match_pandas(ds):
+    complete = ds.df_marketing_exploded.dropna(subset=SUCCESS_FACTOR_COLUMNS)
+    for genre, stats in ds.success_factor_stats.items():
+        rows = complete if genre == 'All Games' else complete[complete['genres'] == genre]
+        assert stats.count == len(rows)
+        np.testing.assert_allclose(stats.correlation(), rows[SUCCESS_FACTOR_COLUMNS].corr().to_numpy(), atol=1e-9)
+
+    # Removing a genre's rows leaves the statistics of the rest
+    rest = ds.success_factor_stats['All Games'].subtract(ds.success_factor_stats['Action'])
+    expected = complete[complete['genres'] != 'Action'][SUCCESS_FACTOR_COLUMNS].corr().to_numpy()
+    np.testing.assert_allclose(rest.correlation(), expected, atol=1e-9)
+
+@pytest.mark.parametrize('limit', [10, 300])
+@pytest.mark.parametrize('query', ['game 1', 'Game 12', 'quest', 'game-2', 'GAME 3 s', 'new', ''])
+def test_search_matches_scan(ds, query, limit):
+    prefix = normalize_title(query)
+    names = ds.df_marketing['name'].map(normalize_title)
+    slugs = ds.df_marketing['slug'].map(normalize_title)
+    matches = np.flatnonzero(names.str.startswith(prefix) | slugs.str.startswith(prefix)) if prefix else np.array([], dtype=int)
+    # Most popular first, ties in row order
+    expected = matches[np.argsort(-ds.df_marketing['total_users'].to_numpy()[matches], kind='stable')][:limit]
+    assert ds.search_index.search(query, limit).tolist() == expected.tolist()
+
+def test_genre_percentiles_match_scan(ds):
+    exploded = ds.df_marketing_exploded
+    for genre in ['Action', 'Card', 'Puzzle']:
+        for column in ['engagement_score', 'clv_proxy']:
+            scores = exploded.loc[exploded['genres'] == genre, column].dropna().to_numpy()
+            for value in np.concatenate([scores[:50], [scores.min() - 1, scores.max() + 1]]):
+                assert ds.genre_percentiles.percentile(genre, column, value) == pytest.approx((scores <= value).mean() * 100)
+
+@pytest.mark.parametrize('same_genre', [False, True])
+def test_similar_games_match_dot_product(ds, same_genre):
+    index = ds.similarity_index
+    positions = list(range(0, len(ds.df_marketing), 97)) + list(range(10))
+    for position, (neighbours, similarities) in zip(positions, index.neighbours(positions, k=10, same_genre=same_genre)):
+        scores = index.features.astype(np.float64) @ index.features[position].astype(np.float64)
+        eligible = np.flatnonzero((index.genres @ index.genres[position]) if same_genre else np.ones(len(scores), dtype=bool))
+        eligible = eligible[eligible != position]
+        # Highest similarity first, ties in row order
+        expected = eligible[np.lexsort((eligible, -scores[eligible]))][:10]
+        np.testing.assert_allclose(similarities, scores[expected], atol=1e-5)
+        assert neighbours.tolist() == expected.tolist()
+
+def test_genre_combinations_match_groupby(ds):
+    combinations = ds.genre_combinations
+    games = ds.df_marketing_clean.reset_index(drop=True).assign(games=1.0)
+    games['engagement_score'] = games['engagement_score'].fillna(0)
+    values = ['games', 'total_users', 'engagement_score']
+    genres = games[values].join(games['genres'].explode().rename('genre')).dropna(subset=['genre'])
+    genres = genres.reset_index().drop_duplicates(['index', 'genre'])
+    platforms = games['platforms'].str.split('||', regex=False).explode().str.strip().rename('platform')
+    platforms = platforms[platforms.notna() & (platforms != '')].reset_index().drop_duplicates()
+
+    pairs = genres.merge(genres[['index', 'genre']], on='index', suffixes=('', '_other'))
+    pair_sums = pairs.groupby(['genre', 'genre_other'])[values].sum()
+    platform_sums = genres.merge(platforms, on='index').groupby(['genre', 'platform'])[values].sum()
+    for name in values:
+        expected = pair_sums[name].unstack().reindex(index=combinations.genres, columns=combinations.genres).fillna(0)
+        pd.testing.assert_frame_equal(combinations.pair_sums[name], expected, check_names=False)
+        expected = platform_sums[name].unstack().reindex(index=combinations.genres, columns=combinations.platforms).fillna(0)
+        pd.testing.assert_frame_equal(combinations.platform_sums[name], expected, check_names=False)
+
+def rank_error(values, estimate, q):
+    """How far quantile `q` lies outside the range of ranks held by `estimate` among the sorted values"""
+    low, high = np.searchsorted(values, estimate, side='left'), np.searchsorted(values, estimate, side='right')
+    return max(low / len(values) - q, q - high / len(values), 0)
+
+def test_sketches_exact_for_small_genres(ds):
+    quantiles = ds.engagement_quantiles
+    clean = ds.df_marketing_exploded_clean
+    for genre in ['Action', 'Card', ['RPG', 'Puzzle']]:
+        rows = clean[clean['genres'].isin([genre] if isinstance(genre, str) else genre)]
+        for column in ['engagement_score', 'playtime']:
+            np.testing.assert_array_equal(quantiles.percentiles(column, genre, [0, 0.1, 0.5, 0.9, 1]),
+                                          rows[column].dropna().quantile([0, 0.1, 0.5, 0.9, 1]).to_numpy())
+
+@pytest.mark.parametrize('distribution', ['counts', 'scores'])
+def test_sketches_within_rank_error_for_large_groups(distribution):
+    # Skewed, rounded values like review counts, or continuous ones like engagement scores, sketched in blocks and
+    # merged as genres are
+    rng = np.random.default_rng(0)
+    values = np.round(rng.pareto(1.5, 200000) * 20) if distribution == 'counts' else rng.lognormal(3, 1, 200000)
+    sketch = QuantileSketch.from_values(values[:20000])
+    for block in np.array_split(values[20000:], 9):
+        sketch = sketch.merge(QuantileSketch.from_values(block))
+    assert not sketch.exact and sketch.count == len(values)
+
+    values = np.sort(values)
+    for q in [0.001, 0.01, 0.1, 0.25, 0.5, 0.75, 0.9, 0.99, 0.999]:
+        assert rank_error(values, sketch.quantile(q), q) <= 0.005, q
+    assert sketch.quantile(0) == values[0] and sketch.quantile(1) == values[-1]
+
+def test_churn_model_batches_match_one_batch(ds, monkeypatch):
+    whole = ChurnModel(ds.df_marketing, ds.unique_genres, ds.churn_model.platforms)
+    monkeypatch.setattr(marketing_data, 'CHURN_BATCH_ROWS', 256)
+    batched = ChurnModel(ds.df_marketing, ds.unique_genres, ds.churn_model.platforms)
+    np.testing.assert_allclose(batched.coefficients, whole.coefficients, atol=1e-4)
+    np.testing.assert_allclose(batched.risk, whole.risk, atol=1e-5)
+
+def test_churn_fit_matches_optimizer():
+    rng = np.random.default_rng(0)
+    features = rng.normal(size=(5000, 6)).astype(np.float32)
+    target = sigmoid(features @ np.array([1.0, -0.5, 0.25, 0, 2, -1]) - 0.5)
+    weights = rng.integers(1, 50, len(features)).astype(np.float64)
+    rows = np.arange(len(features))
+    coefficients, intercept, _ = fit_logistic(features, target, weights, rows)
+
+    # Reference: the same penalized weighted log loss, minimized in float64 over all rows at once
+    design = np.hstack([features, np.ones((len(features), 1))]).astype(np.float64)
+    share = weights / weights.sum()
+
+    def loss(beta):
+        p = np.clip(sigmoid(design @ beta), 1e-12, 1 - 1e-12)
+        penalty = CHURN_L2 / 2 * beta[:-1] @ beta[:-1]
+        return -share @ (target * np.log(p) + (1 - target) * np.log(1 - p)) + penalty, \
+            design.T @ (share * (p - target)) + np.append(CHURN_L2 * beta[:-1], 0)
+
+    expected = optimize.minimize(loss, np.zeros(design.shape[1]), jac=True, method='BFGS', options={'gtol': 1e-10}).x
+    np.testing.assert_allclose(np.append(coefficients, intercept), expected, atol=1e-3)
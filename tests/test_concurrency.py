@@ -0,0 +1,70 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import plotly.io as pio
+import pytest
+
+import datvis_marketing as dashboard
+from marketing_data import DEFAULT_SCORE_WEIGHTS, SCORE_WEIGHT_KEYS, load_dataset, current_dataset, set_dataset, data_layer
+from marketing_versions import version_store
+
+ROUNDS = 2
+# Callbacks whose output names the dataset version, which differs between the two runs by design
+VERSION_LABELLED = {'update_version_options'}
+
+def callback_values(ds):
+    """Argument values for every callback: the snapshot's inputs cut to a few genres, plus the interactive ones"""
+    values = dashboard.snapshot_inputs(ds)
+    genres = values[('marketing-table-dropdown', 'value')][:4]
+    games = [dashboard.game_value(row) for _, row in ds.df_marketing.head(4).iterrows()]
+    stored = version_store.versions()[0]['id']
+    values.update({(dropdown, 'value'): genres for dropdown in dashboard.GENRE_DROPDOWNS})
+    values.update({
+        ('url', 'pathname'): ['/', '/missing'],
+        ('score-weights', 'data'): [list(DEFAULT_SCORE_WEIGHTS), [0.6, 0.2, 0.2, 0.2, 0.4, 0.4, 0.1, 0.3, 0.3, 0.3]],
+        **{(f'weight-{score}-{component}', 'value'): [0.5] for score, component in SCORE_WEIGHT_KEYS},
+        ('game-search', 'search_value'): ['game 1', 'quest', ''],
+        ('game-search', 'value'): [None] + games,
+        ('marketing-targets-table', 'selected_row_ids'): [[]] + [[game] for game in games],
+        ('similar-games-same-genre', 'value'): [[], ['same-genre']],
+        ('version-base', 'value'): [stored],
+        ('version-compare', 'value'): [dashboard.CURRENT_VERSION],
+    })
+    return values
+
+def render(func, args):
+    """Callback output as the JSON Dash would send"""
+    return pio.json.to_json_plotly(func(*args))
+
+def next_dataset():
+    """A fresh load of the data under a new version number, so nothing cached for the old one is reused"""
+    dataset = load_dataset(data_layer.path, data_layer.nrows, current_dataset().version + 1)
+    set_dataset(dataset)
+    return dataset
+
+@pytest.fixture
+def stored_version(app, tmp_path):
+    version_store.configure(str(tmp_path))
+    version_store.save(current_dataset())
+    yield
+    version_store.configure(None)
+
+def test_every_callback_is_covered(app, stored_version):
+    covered = {func for func, _ in dashboard.callback_combinations(callback_values(current_dataset()))}
+    assert [func.__name__ for func, _, _ in dashboard.CALLBACKS if func not in covered] == []
+
+def test_concurrent_callbacks_match_serial_run(app, stored_version):
+    calls = list(dashboard.callback_combinations(callback_values(current_dataset()))) * ROUNDS
+
+    # Cold lazy structures and output caches, built by whichever thread gets there first
+    next_dataset()
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        concurrent = list(pool.map(lambda call: render(*call), calls))
+
+    # The same calls one at a time after a swap to another version
+    next_dataset()
+    serial = [render(*call) for call in calls]
+
+    assert len(concurrent) == len(serial)
+    mismatched = sorted({calls[i][0].__name__ for i, (a, b) in enumerate(zip(concurrent, serial))
+                         if a != b and calls[i][0].__name__ not in VERSION_LABELLED})
+    assert mismatched == []
@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+
+from conftest import sample_games
+from datvis_marketing import create_app, update_marketing_table
+from marketing_data import MarketingDataset, current_dataset, data_layer
+
+def test_second_app_serves_its_own_data(app, app_config, tmp_path):
+    first = current_dataset()
+    update_marketing_table('All Games', None)
+    other = tmp_path / 'other_games.csv'
+    sample_games(n=500, seed=1).to_csv(other, index=False)
+
+    try:
+        create_app({**app_config, 'GAME_DATA_PATH': str(other)})
+        ds = current_dataset()
+        assert len(ds.df) == 500 and data_layer.path == str(other)
+        # Outputs cached for the first dataset are not served for the second
+        assert ds.version > first.version
+        assert {row['id'] for row in update_marketing_table('All Games', None)[0]} <= set(ds.df['id'])
+    finally:
+        create_app(app_config)
+    assert len(current_dataset().df) == len(first.df)
+
+def modified_export(raw):
+    """The sample export with changed funnels, critic scores and genres, some games removed and some added"""
+    modified = raw.copy()
+    modified.loc[:199, 'added_status_owned'] *= 2
+    modified.loc[100:299, 'metacritic'] = 75
+    modified.loc[300:329, 'genres'] = 'RPG||Puzzle'
+    added = sample_games(n=40, seed=2).assign(id=lambda df: df['id'] + 100000, slug=lambda df: 'new-' + df['slug'])
+    return pd.concat([modified.drop(index=range(len(raw) - 50, len(raw))), added], ignore_index=True)
+
+def test_incremental_update_matches_full_rebuild():
+    raw = sample_games()
+    modified = modified_export(raw)
+    incremental = MarketingDataset.from_raw(raw).apply_changes(*MarketingDataset.from_raw(raw).changed_rows(modified))
+    full = MarketingDataset.from_raw(modified)
+
+    for name, table in full.aggregates.items():
+        pd.testing.assert_frame_equal(incremental.aggregates[name].sort_index(), table.sort_index(), check_dtype=False)
+    pd.testing.assert_frame_equal(incremental.genre_performance.sort_values('genres', ignore_index=True),
+                                  full.genre_performance.sort_values('genres', ignore_index=True), check_dtype=False)
+    pd.testing.assert_frame_equal(incremental.cohort_df, full.cohort_df, check_dtype=False)
+
+    assert incremental.success_factor_stats.keys() == full.success_factor_stats.keys()
+    for genre, stats in full.success_factor_stats.items():
+        assert incremental.success_factor_stats[genre].count == stats.count
+        np.testing.assert_allclose(incremental.success_factor_stats[genre].correlation(), stats.correlation(), atol=1e-9)
+
+    # Tied scores rank in the same order however the rows were assembled
+    for name, genres in full.rankings.items():
+        assert incremental.rankings[name].keys() == genres.keys()
+        for genre, top in genres.items():
+            assert incremental.rankings[name][genre][['id', 'genres']].values.tolist() == top[['id', 'genres']].values.tolist()
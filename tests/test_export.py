@@ -0,0 +1,55 @@
+import io
+import operator
+
+import pandas as pd
+import pytest
+
+from datvis_marketing import update_marketing_table
+from marketing_data import DEFAULT_SCORE_WEIGHTS, current_dataset
+from marketing_export import FILTER_CLAUSE, filter_value
+
+QUERIES = [
+    '{completion_rate} >= 0.5',
+    '{total_users} > 1000',
+    '{metacritic} < 60',
+    '{metacritic} = 75',
+    '{rating} != 3',
+    '{name} contains 1',
+    '{name} icontains "quest"',
+    '{completion_rate} contains 50',
+    '{genres} = Action',
+    '{engagement_score} >= 30 && {engagement_score} < 50',
+]
+COMPARISONS = {'<': operator.lt, '<=': operator.le, '>': operator.gt, '>=': operator.ge}
+
+def table_matches(cell, op, value, ignore_case):
+    """One table cell against one clause, the way the browser table evaluates it"""
+    if op == 'contains':
+        needle = value if isinstance(value, str) else f'{value:g}'
+        return isinstance(cell, str) and (needle.lower() in cell.lower() if ignore_case else needle in cell)
+    if op in COMPARISONS:
+        return COMPARISONS[op](0 if cell is None else cell, value)
+    equal = cell is not None and cell == value
+    return equal if op == '=' else not equal
+
+def table_filter(rows, filter_query):
+    """(game, genre) of the table rows a filter query keeps, in table order"""
+    clauses = [FILTER_CLAUSE.match(clause.strip()) for clause in filter_query.split('&&')]
+    return [(row['id'], row['genres']) for row in rows
+            if all(table_matches(row[c['column']], c['op'], filter_value(c['value']), c['case'] == 'i') for c in clauses)]
+
+@pytest.mark.parametrize('genre', ['All Games', 'Action'])
+@pytest.mark.parametrize('filter_query', QUERIES)
+def test_export_matches_table_filter(app, genre, filter_query):
+    rows, _ = update_marketing_table(genre, list(DEFAULT_SCORE_WEIGHTS))
+    response = app.server.test_client().get('/export/marketing-targets.csv',
+                                            query_string={'genre': genre, 'filter': filter_query})
+    assert response.status_code == 200
+
+    # The table holds the top of the ranking, so its filtered rows are the export's rows among them. A game is
+    # ranked once per genre, so rows are told apart by both
+    exported = pd.read_csv(io.BytesIO(response.data))
+    exported = exported.astype(object).where(exported.notna(), None)
+    exported = list(zip(exported[current_dataset().key], exported['genres']))
+    shown = {(row['id'], row['genres']) for row in rows}
+    assert [game for game in exported if game in shown] == table_filter(rows, filter_query)
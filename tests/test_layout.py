@@ -0,0 +1,7 @@
+import json
+
+from datvis_marketing import LAYOUT_BYTE_BUDGET, marketing_layout_payload
+
+def test_layout_payload_fits_byte_budget(app):
+    payload = json.dumps(marketing_layout_payload.__wrapped__(), separators=(',', ':'))
+    assert len(payload.encode('utf-8')) <= LAYOUT_BYTE_BUDGET
@@ -0,0 +1,23 @@
+import marketing_versions
+from conftest import sample_games
+from marketing_data import MarketingDataset
+from marketing_versions import VersionStore
+
+def test_versions_share_unchanged_blocks(tmp_path, monkeypatch):
+    monkeypatch.setattr(marketing_versions, 'VERSION_BLOCK_ROWS', 64)
+    store = VersionStore()
+    store.configure(str(tmp_path))
+
+    games = sample_games()
+    corrected = games.copy()
+    corrected.loc[[10, 1500, 2900], 'added_status_owned'] += 100
+    first = store.save(MarketingDataset.from_raw(games))
+    store.save(MarketingDataset.from_raw(corrected))
+
+    stats = store.stats()
+    assert stats['versions'] == 2
+    # A second version differing in three games costs a small fraction of a full copy
+    assert stats['bytes'] - stats['bytes_without_sharing'] / 2 < 0.1 * stats['bytes_without_sharing'] / 2
+
+    version = store.open(first['id'])
+    assert version.row_hashes.index.tolist() == sorted(games['id'])